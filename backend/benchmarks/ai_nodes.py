@@ -0,0 +1,94 @@
+"""
+Compare how many nodes AIEngine searches with and without move ordering.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/ai_nodes.py [--positions 20]
+
+Every position is searched to the full depth of each difficulty (the time
+budget is lifted, the opening book and the endgame solver are off) so both
+engines do the same amount of work apart from what alpha-beta manages to
+prune.
+"""
+
+import argparse
+import random
+import time
+
+from fourfury.ai.engine import AIEngine
+from fourfury.ai.opening_book import OpeningBook
+from fourfury.constants import M, PlayerEnum
+from fourfury.core import calculate_row_by_col, detect_winner_at, init_board
+
+UNLIMITED_MS = 10**9
+
+
+def random_positions(
+    count: int, seed: int = 0
+) -> list[list[list[PlayerEnum]]]:
+    """Random mid-game positions with player 2 (the AI) to move."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = init_board()
+        for ply in range(2 * rng.randint(0, 8) + 1):
+            piece = (
+                PlayerEnum.PLAYER_1 if ply % 2 == 0 else PlayerEnum.PLAYER_2
+            )
+            col = rng.choice(
+                [
+                    c
+                    for c in range(M)
+                    if calculate_row_by_col(board, c) is not None
+                ]
+            )
+            row = calculate_row_by_col(board, col)
+            board[row][col] = piece
+            if detect_winner_at(board, row, col) is not None:
+                break
+        else:
+            positions.append(board)
+    return positions
+
+
+def search(
+    difficulty: int, positions: list[list[list[PlayerEnum]]], ordering: bool
+) -> tuple[int, float]:
+    nodes = 0
+    start = time.perf_counter()
+    for board in positions:
+        ai = AIEngine(
+            difficulty,
+            time_budget_ms=UNLIMITED_MS,
+            move_ordering=ordering,
+            opening_book=OpeningBook(),
+            endgame_solver=False,
+        )
+        ai.get_best_move([row[:] for row in board])
+        nodes += ai.nodes
+    return nodes, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    positions = random_positions(args.positions, args.seed)
+    print(
+        f"{'difficulty':>10} {'unordered':>12} {'ordered':>12} "
+        f"{'saved':>7} {'unord. (s)':>10} {'ord. (s)':>10}"
+    )
+    for difficulty in range(1, 6):
+        plain_nodes, plain_time = search(difficulty, positions, False)
+        ordered_nodes, ordered_time = search(difficulty, positions, True)
+        saved = 1 - ordered_nodes / plain_nodes
+        print(
+            f"{difficulty:>10} {plain_nodes:>12} {ordered_nodes:>12} "
+            f"{saved:>7.1%} {plain_time:>10.2f} {ordered_time:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare the size and speed of the codecs used to cache games.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/game_codecs.py [--games 200]
+
+Games are random but complete (finished or drawn) so the board and the move
+list are as large as they get in the cache.
+"""
+
+import argparse
+import random
+import time
+
+from bson import ObjectId
+
+from fourfury.api.codecs import CODECS
+from fourfury.api.models import Game, GameMode
+from fourfury.api.utils import make_move
+from fourfury.constants import M
+
+
+def random_games(count: int, seed: int = 0) -> list[Game]:
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        game = Game(
+            id=ObjectId(),
+            player_1="player-one",
+            player_1_username="alice",
+            player_2="player-two",
+            player_2_username="bob",
+            mode=GameMode.ONLINE,
+        )
+        while game.finished_at is None:
+            col = rng.choice([c for c in range(M) if game.board[0][c] == 0])
+            make_move(game, col)
+        games.append(game)
+    return games
+
+
+# JsonGameCodec always validates, so it has a single row.
+ROWS = (
+    ("json", "json", False),
+    ("compact", "compact", True),
+    ("compact (validated)", "compact", False),
+)
+
+
+def measure(
+    label: str, name: str, games: list[Game], trusted: bool, rounds: int
+) -> None:
+    codec = CODECS[name]
+    encoded = [codec.encode(game) for game in games]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for game in games:
+            codec.encode(game)
+    encode_us = (time.perf_counter() - start) / rounds / len(games) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for data in encoded:
+            codec.decode(data, trusted)
+    decode_us = (time.perf_counter() - start) / rounds / len(games) * 1e6
+
+    size = sum(len(data.encode()) for data in encoded) / len(games)
+    print(f"{label:>20} {size:>8.0f} {encode_us:>12.1f} {decode_us:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    games = random_games(args.games, args.seed)
+    print(
+        f"{'codec':>20} {'bytes':>8} {'encode (us)':>12} {'decode (us)':>12}"
+    )
+    for label, name, trusted in ROWS:
+        measure(label, name, games, trusted, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
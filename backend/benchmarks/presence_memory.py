@@ -0,0 +1,157 @@
+"""
+Measure the Redis memory used by the presence of active games.
+
+Run from the backend directory, against a Redis server nobody else is
+using (the chosen database is flushed):
+
+    PYTHONPATH=src python benchmarks/presence_memory.py [--games 10000 100000]
+
+Every game has two players who reported their status; a fraction of them
+has one player disconnected, with a countdown running. "before" is the
+previous layout, one string key per player status and per countdown, and
+"after" the current one, one hash per game and one sorted set of countdown
+deadlines. Memory per game is reported twice: the sum of MEMORY USAGE over
+every key written, and the growth of INFO's used_memory, which also counts
+the keyspace's own tables.
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+import redis
+from bson import ObjectId
+from redis.client import Pipeline
+
+from fourfury.cache import PresenceManager
+from fourfury.session import generate_username
+
+BATCH_SIZE = 1000  # games written per pipeline
+
+Game = tuple[str, str, str, bool]  # id, players, second one disconnected
+
+
+def before(pipe: Pipeline, game: Game, now: float) -> None:
+    game_id, player_1, player_2, disconnected = game
+    pipe.set(
+        f"game:presence:{game_id}:{player_1}",
+        "online",
+        ex=PresenceManager.PRESENCE_EXPIRY,
+    )
+    pipe.set(
+        f"game:presence:{game_id}:{player_2}",
+        "offline" if disconnected else "online",
+        ex=PresenceManager.PRESENCE_EXPIRY,
+    )
+    if disconnected:
+        pipe.set(
+            f"game:countdown:{game_id}:{player_2}",
+            "disconnected",
+            ex=PresenceManager.PLAYER_TIMEOUT,
+        )
+
+
+def after(pipe: Pipeline, game: Game, now: float) -> None:
+    game_id, player_1, player_2, disconnected = game
+    key = f"{PresenceManager.PRESENCE_PREFIX}:{game_id}"
+    pipe.hset(
+        key,
+        mapping={
+            f"status:{player_1}": "online",
+            f"seen:{player_1}": now,
+            f"status:{player_2}": "offline" if disconnected else "online",
+            f"seen:{player_2}": now,
+        },
+    )
+    pipe.expire(key, PresenceManager.PRESENCE_EXPIRY)
+    if disconnected:
+        pipe.zadd(
+            PresenceManager.COUNTDOWNS_KEY,
+            {f"{game_id}:{player_2}": now + PresenceManager.PLAYER_TIMEOUT},
+        )
+
+
+LAYOUTS: tuple[tuple[str, Callable[[Pipeline, Game, float], None]], ...] = (
+    ("before", before),
+    ("after", after),
+)
+
+
+def random_games(count: int, disconnected: float, seed: int) -> list[Game]:
+    rng = random.Random(seed)
+    return [
+        (
+            str(ObjectId()),
+            generate_username(),
+            generate_username(),
+            rng.random() < disconnected,
+        )
+        for _ in range(count)
+    ]
+
+
+def used_memory(client: redis.Redis) -> int:
+    return int(client.info("memory")["used_memory"])
+
+
+def memory_usage(client: redis.Redis) -> int:
+    """Sum of MEMORY USAGE over every key, counting every element."""
+    total = 0
+    keys = list(client.scan_iter(count=BATCH_SIZE))
+    for i in range(0, len(keys), BATCH_SIZE):
+        with client.pipeline(transaction=False) as pipe:
+            for key in keys[i : i + BATCH_SIZE]:
+                pipe.memory_usage(key, samples=0)
+            total += sum(usage or 0 for usage in pipe.execute())
+    return total
+
+
+def measure(
+    client: redis.Redis,
+    write: Callable[[Pipeline, Game, float], None],
+    games: list[Game],
+) -> tuple[int, float, float]:
+    """Keys written, and bytes per game by MEMORY USAGE and used_memory."""
+    client.flushdb()
+    start = used_memory(client)
+    now = time.time()
+    for i in range(0, len(games), BATCH_SIZE):
+        with client.pipeline(transaction=False) as pipe:
+            for game in games[i : i + BATCH_SIZE]:
+                write(pipe, game, now)
+            pipe.execute()
+    keys = client.dbsize()
+    grown = used_memory(client) - start
+    usage = memory_usage(client)
+    client.flushdb()
+    return keys, usage / len(games), grown / len(games)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--games", type=int, nargs="+", default=[10_000, 100_000]
+    )
+    parser.add_argument("--disconnected", type=float, default=0.1)
+    parser.add_argument("--url", default="redis://localhost:6379/15")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client = redis.Redis.from_url(args.url)
+    print(
+        f"{'games':>8} {'layout':>7} {'keys':>8}"
+        f" {'usage/game':>11} {'used/game':>10}"
+    )
+    for count in args.games:
+        games = random_games(count, args.disconnected, args.seed)
+        for label, write in LAYOUTS:
+            keys, usage, used = measure(client, write, games)
+            print(
+                f"{count:>8} {label:>7} {keys:>8}"
+                f" {usage:>11.0f} {used:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Count the Redis round trips each endpoint spends on sessions.
+
+Run from the backend directory, with Redis running as configured in .env:
+
+    PYTHONPATH=src python benchmarks/session_round_trips.py [--rounds 200]
+
+"before" is the previous SessionManager, one command per round trip and no
+session cache, and "after" the current one. Every flow runs on a single warm
+connection, so a round trip is one write of one or more commands to it.
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import redis.asyncio
+from redis.asyncio.connection import Connection
+
+from fourfury.cache import redis_url
+from fourfury.session import (
+    SESSION_EXPIRY,
+    SESSION_KEY_PREFIX,
+    USERNAME_KEY_PREFIX,
+    SessionManager,
+    generate_session_id,
+    generate_username,
+)
+
+
+class CountingConnection(Connection):
+    round_trips = 0
+
+    async def send_packed_command(
+        self, command: Any, check_health: bool = True
+    ) -> None:
+        CountingConnection.round_trips += 1
+        await super().send_packed_command(command, check_health)
+
+
+class SequentialSessionManager(SessionManager):
+    """SessionManager as it was, one command per round trip."""
+
+    async def create_session(self) -> tuple[str, str]:
+        session_id = generate_session_id()
+        username = generate_username()
+        await self.redis.setex(
+            f"{SESSION_KEY_PREFIX}{session_id}", SESSION_EXPIRY, username
+        )
+        await self.redis.setex(
+            f"{USERNAME_KEY_PREFIX}{username}", SESSION_EXPIRY, session_id
+        )
+        return session_id, username
+
+    async def validate_session(self, session_id: str, username: str) -> bool:
+        stored_username = await self.get_username(session_id)
+        return stored_username == username
+
+    async def refresh_session(self, session_id: str) -> None:
+        username = await self.get_username(session_id)
+        if username:
+            await self.redis.expire(
+                f"{SESSION_KEY_PREFIX}{session_id}", SESSION_EXPIRY
+            )
+            await self.redis.expire(
+                f"{USERNAME_KEY_PREFIX}{username}", SESSION_EXPIRY
+            )
+
+    async def delete_session(self, session_id: str) -> None:
+        username = await self.get_username(session_id)
+        if username:
+            await self.redis.delete(f"{SESSION_KEY_PREFIX}{session_id}")
+            await self.redis.delete(f"{USERNAME_KEY_PREFIX}{username}")
+
+    async def create_or_validate_session(
+        self, session_id: str | None = None, username: str | None = None
+    ) -> tuple[str, str]:
+        if (
+            not session_id
+            or not username
+            or not await self.validate_session(session_id, username)
+        ):
+            if session_id:
+                await self.delete_session(session_id)
+            return await self.create_session()
+
+        await self.refresh_session(session_id)
+        return session_id, username
+
+
+# A flow sets up what an endpoint finds in Redis and returns the session
+# work the endpoint then does, which is what gets measured.
+Call = Callable[[], Awaitable[object]]
+Flow = Callable[[SessionManager, bool], Awaitable[Call]]
+
+
+async def new_player(manager: SessionManager, before: bool) -> Call:
+    return manager.create_or_validate_session
+
+
+async def returning_player(manager: SessionManager, before: bool) -> Call:
+    session_id, username = await manager.create_session()
+    return lambda: manager.create_or_validate_session(session_id, username)
+
+
+async def expired_cookie(manager: SessionManager, before: bool) -> Call:
+    session_id, username = await manager.create_session()
+    await manager.redis.delete(f"{SESSION_KEY_PREFIX}{session_id}")
+    return lambda: manager.create_or_validate_session(session_id, username)
+
+
+async def stale_cookie(manager: SessionManager, before: bool) -> Call:
+    # The cookie names a different user than the session belongs to.
+    session_id, _ = await manager.create_session()
+    return lambda: manager.create_or_validate_session(
+        session_id, "SomeoneElse0000"
+    )
+
+
+async def start_game(manager: SessionManager, before: bool) -> Call:
+    session_id, username = await manager.create_session()
+
+    async def call() -> None:
+        await manager.validate_session(session_id, username)
+        if before:
+            # start_new_game validated the session a second time.
+            await manager.validate_session(session_id, username)
+
+    return call
+
+
+async def other_endpoint(manager: SessionManager, before: bool) -> Call:
+    session_id, username = await manager.create_session()
+    return lambda: manager.validate_session(session_id, username)
+
+
+async def repeat_request(manager: SessionManager, before: bool) -> Call:
+    # The player's previous request validated the session.
+    session_id, username = await manager.create_session()
+    await manager.validate_session(session_id, username)
+    return lambda: manager.validate_session(session_id, username)
+
+
+async def refresh(manager: SessionManager, before: bool) -> Call:
+    session_id, _ = await manager.create_session()
+    return lambda: manager.refresh_session(session_id)
+
+
+async def delete(manager: SessionManager, before: bool) -> Call:
+    session_id, _ = await manager.create_session()
+    return lambda: manager.delete_session(session_id)
+
+
+FLOWS: tuple[tuple[str, Flow], ...] = (
+    ("POST create_session (new)", new_player),
+    ("POST create_session (valid)", returning_player),
+    ("POST create_session (expired)", expired_cookie),
+    ("POST create_session (stale)", stale_cookie),
+    ("POST start", start_game),
+    ("GET games, GET/POST game", other_endpoint),
+    ("  ... session seen recently", repeat_request),
+    ("refresh_session", refresh),
+    ("delete_session", delete),
+)
+
+
+async def measure(
+    manager: SessionManager, flow: Flow, before: bool, rounds: int
+) -> tuple[int, float]:
+    """Round trips of one run of the flow and its mean time in ms."""
+    elapsed = 0.0
+    for _ in range(rounds):
+        call = await flow(manager, before)
+        CountingConnection.round_trips = 0
+        start = time.perf_counter()
+        await call()
+        elapsed += time.perf_counter() - start
+    return CountingConnection.round_trips, elapsed / rounds * 1000
+
+
+async def run(rounds: int) -> None:
+    pool = redis.asyncio.BlockingConnectionPool.from_url(
+        redis_url(),
+        max_connections=1,
+        connection_class=CountingConnection,
+        decode_responses=True,
+    )
+    client = redis.asyncio.Redis(connection_pool=pool)
+    await client.ping()
+    managers = {True: SequentialSessionManager(), False: SessionManager()}
+    for manager in managers.values():
+        manager.redis = client
+
+    print(
+        f"{'flow':>30} {'before':>7} {'after':>7}"
+        f" {'before (ms)':>12} {'after (ms)':>12}"
+    )
+    for label, flow in FLOWS:
+        trips_before, ms_before = await measure(
+            managers[True], flow, True, rounds
+        )
+        trips_after, ms_after = await measure(
+            managers[False], flow, False, rounds
+        )
+        print(
+            f"{label:>30} {trips_before:>7} {trips_after:>7}"
+            f" {ms_before:>12.2f} {ms_after:>12.2f}"
+        )
+    # Every flow starts from a new session, so "after" never needs to
+    # extend one.
+    print(f"after: {managers[False].refresh_stats()}")
+    await client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.rounds))
+
+
+if __name__ == "__main__":
+    main()
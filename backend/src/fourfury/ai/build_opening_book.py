@@ -0,0 +1,86 @@
+"""
+Build the AI opening book from deep ``AIEngine`` searches.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python -m fourfury.ai.build_opening_book --moves 3 --depth 8
+
+Every reply of player 1 is expanded, while player 2 (the AI) only follows
+the move stored in the book, so the book covers exactly the positions the
+AI can reach in its first ``--moves`` moves.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from ..constants import M, PlayerEnum
+from ..core import calculate_row_by_col, detect_winner_at, init_board
+from .engine import AIEngine
+from .opening_book import BOOK_PATH, OpeningBook, canonical_key
+
+UNLIMITED_MS = 10**9
+
+
+def build(moves: int, depth: int, verbose: bool = False) -> OpeningBook:
+    book = OpeningBook(depth=depth)
+    # An empty book keeps the engine from reading the one being replaced.
+    engine = AIEngine(
+        5, time_budget_ms=UNLIMITED_MS, opening_book=OpeningBook()
+    )
+    engine.max_depth = depth
+
+    # Positions with player 1 to move.
+    frontier = [init_board()]
+    for ai_move in range(1, moves + 1):
+        start = time.perf_counter()
+        next_frontier = []
+        for board in frontier:
+            for col in range(M):
+                row = calculate_row_by_col(board, col)
+                if row is None:
+                    continue
+                child = [cells[:] for cells in board]
+                child[row][col] = PlayerEnum.PLAYER_1
+                if detect_winner_at(child, row, col) is not None:
+                    continue
+                if canonical_key(child)[0] in book.entries:
+                    continue
+
+                column = engine.get_best_move(child)
+                book.add(child, column)
+
+                reply_row = calculate_row_by_col(child, column)
+                if reply_row is None:
+                    continue
+                child[reply_row][column] = PlayerEnum.PLAYER_2
+                if detect_winner_at(child, reply_row, column) is None:
+                    next_frontier.append(child)
+
+        frontier = next_frontier
+        if verbose:
+            print(
+                f"AI move {ai_move}: {len(book)} positions "
+                f"({time.perf_counter() - start:.1f}s)"
+            )
+    return book
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the AI opening book.")
+    parser.add_argument(
+        "--moves", type=int, default=3, help="AI moves covered by the book"
+    )
+    parser.add_argument(
+        "--depth", type=int, default=8, help="search depth per position"
+    )
+    parser.add_argument("--output", type=Path, default=BOOK_PATH)
+    args = parser.parse_args()
+
+    book = build(args.moves, args.depth, verbose=True)
+    book.save(args.output)
+    print(f"Wrote {len(book)} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,129 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import cast
+
 from ..constants import M, N, PlayerEnum
-from ..core import DIRECTIONS, calculate_row_by_col, detect_winner
+from ..core import calculate_row_by_col, detect_winner, detect_winner_at
+from .evaluation import IncrementalEvaluator, evaluate
+from .opening_book import OpeningBook, default_book
+from .solver import MAX_EMPTY_CELLS, Solver, SolverResult
+from .transposition import (
+    ZOBRIST,
+    ZOBRIST_MAXIMIZING,
+    Bound,
+    TranspositionTable,
+    zobrist_hash,
+)
+
+logger = logging.getLogger(__name__)
+
+# How many nodes are searched between two checks of the clock.
+TIME_CHECK_INTERVAL = 1024
+
+# Columns closest to the center take part in the most lines, so they are
+# usually the strongest moves and are searched first.
+CENTER_ORDER = sorted(range(M), key=lambda col: abs(col - M // 2))
+
+# Killer moves remembered per search depth.
+KILLER_SLOTS = 2
+
+# Score of a win found with no search depth left. Wins found earlier score a
+# multiple of it, so faster wins score higher.
+WIN_SCORE = 100_000.0
+
+# Scores at least this large are wins. Heuristic scores never reach it, see
+# ``evaluation.MAX_EVALUATION``, so they are stored and probed unchanged.
+MATE_THRESHOLD = WIN_SCORE / 2
+
+# Lowest difficulty that plays from the opening book by default.
+BOOK_MIN_DIFFICULTY = 4
+
+# Lowest difficulty that solves the endgame exactly by default, and the
+# number of empty cells at or below which it does.
+SOLVER_MIN_DIFFICULTY = 4
+SOLVER_MAX_EMPTY_CELLS = MAX_EMPTY_CELLS
+
+
+class SearchTimeoutError(Exception):
+    """Raised inside the search once the time budget is used up."""
+
+
+def _score_to_tt(score: float, depth: int) -> float:
+    """
+    Turn a win score into the number of plies from this node to the win,
+    so the entry stays right when it is reused at another search depth.
+    """
+    if abs(score) < MATE_THRESHOLD:
+        return score
+    plies = depth + 1 - abs(score) / WIN_SCORE
+    return math.copysign(WIN_SCORE * (plies + 1), score)
+
+
+def _score_from_tt(score: float, depth: int) -> float:
+    """Inverse of ``_score_to_tt`` for a node with ``depth`` plies left."""
+    if abs(score) < MATE_THRESHOLD:
+        return score
+    plies = abs(score) / WIN_SCORE - 1
+    # A win beyond this node's horizon still scores as a win.
+    return math.copysign(WIN_SCORE * max(depth - plies + 1, 1), score)
 
 
 class AIEngine:
-    def __init__(self, difficulty: int = 3):
+    def __init__(
+        self,
+        difficulty: int = 3,
+        transposition_table: TranspositionTable | None = None,
+        time_budget_ms: int | None = None,
+        move_ordering: bool = True,
+        opening_book: OpeningBook | None = None,
+        endgame_solver: bool | None = None,
+    ):
         self.difficulty = min(
             max(difficulty, 1), 5
         )  # Ensure difficulty is between 1-5
         self.max_depth = self._get_depth_from_difficulty()
+        self.time_budget_ms = (
+            time_budget_ms
+            if time_budget_ms is not None
+            else self._get_time_budget_from_difficulty()
+        )
+        self.tt = transposition_table or TranspositionTable()
+        self.move_ordering = move_ordering
+        if opening_book is None and self.difficulty >= BOOK_MIN_DIFFICULTY:
+            opening_book = default_book()
+        self.opening_book = opening_book
+        self.endgame_solver = (
+            endgame_solver
+            if endgame_solver is not None
+            else self.difficulty >= SOLVER_MIN_DIFFICULTY
+        )
+        self.solver_result: SolverResult | None = None
+        self.nodes = 0
+        self.completed_depth = 0
+        self.principal_variation: list[int] = []
+        self._pv_moves: dict[int, int] = {}
+        self._deadline: float | None = None
+        self._evaluator: IncrementalEvaluator | None = None
+        self._killers: dict[int, list[int]] = {}
+        # Cutoff counts per side (indexed by ``maximizing``) and cell.
+        self._history = [[[0] * M for _ in range(N)] for _ in range(2)]
 
     def _get_depth_from_difficulty(self) -> int:
         # Map difficulty levels to search depth
         depth_map = {1: 2, 2: 3, 3: 4, 4: 5, 5: 6}
         return depth_map[self.difficulty]
 
+    def _get_time_budget_from_difficulty(self) -> int:
+        # Map difficulty levels to the time allowed per move, in milliseconds
+        budget_map = {1: 200, 2: 300, 3: 500, 4: 750, 5: 1000}
+        return budget_map[self.difficulty]
+
     def evaluate_position(
         self, board: list[list[PlayerEnum]], player: PlayerEnum
     ) -> int:
-        score = 0
-        opponent = (
-            PlayerEnum.PLAYER_1
-            if player == PlayerEnum.PLAYER_2
-            else PlayerEnum.PLAYER_2
-        )
-
-        for row in range(N):
-            for col in range(M):
-                if board[row][col] == PlayerEnum.EMPTY:
-                    continue
-
-                for direction in DIRECTIONS:
-                    if not direction.condition(row, col):
-                        continue
-
-                    player_count = opponent_count = empty_count = 0
-                    line = []
-
-                    # Check sequence of 4
-                    for i in range(4):
-                        if not direction.move_condition(row, col, i):
-                            break
-                        next_row, next_col = direction.move_row_col(
-                            row, col, i
-                        )
-                        cell = board[next_row][next_col]
-                        line.append(cell)
-
-                    if len(line) != 4:
-                        continue
-
-                    # Count pieces in line
-                    for cell in line:
-                        if cell == player:
-                            player_count += 1
-                        elif cell == opponent:
-                            opponent_count += 1
-                        else:
-                            empty_count += 1
-
-                    # Score calculation
-                    if player_count == 4:
-                        score += 1000
-                    elif player_count == 3 and empty_count == 1:
-                        score += 100
-                    elif player_count == 2 and empty_count == 2:
-                        score += 10
-                    elif opponent_count == 3 and empty_count == 1:
-                        score -= 80  # Defensive move
-                    elif opponent_count == 2 and empty_count == 2:
-                        score -= 8
-
-        # Prefer center columns
-        for row in range(N):
-            for col in range(M // 2 - 1, M // 2 + 2):
-                if board[row][col] == player:
-                    score += 3
-
-        return score
+        return evaluate(board, player)
 
     def minimax(
         self,
@@ -85,19 +132,51 @@ class AIEngine:
         alpha: float,
         beta: float,
         maximizing: bool,
+        last_move: tuple[int, int] | None = None,
+        key: int | None = None,
     ) -> tuple[float, int]:
-        winner = detect_winner(board)
+        self.nodes += 1
+        if (
+            self._deadline is not None
+            and self.nodes % TIME_CHECK_INTERVAL == 0
+            and time.perf_counter() > self._deadline
+        ):
+            raise SearchTimeoutError()
+
+        if key is None:
+            # Root of a search: set up the state kept in step with the board.
+            key = zobrist_hash(board, maximizing)
+            self._evaluator = IncrementalEvaluator(board)
+        evaluator = cast(IncrementalEvaluator, self._evaluator)
+
+        # Only the lines through the last piece can hold a new win; the full
+        # scan is needed once, for the position the search starts from.
+        if last_move is None:
+            winner = detect_winner(board)
+        else:
+            winner = detect_winner_at(board, *last_move)
         if winner is not None:
-            return (1000.0 if winner == PlayerEnum.PLAYER_2 else -1000.0) * (
-                depth + 1
-            ), -1
+            return (
+                WIN_SCORE if winner == PlayerEnum.PLAYER_2 else -WIN_SCORE
+            ) * (depth + 1), -1
         if depth == 0:
-            return float(
-                self.evaluate_position(board, PlayerEnum.PLAYER_2)
-            ), -1
+            return float(evaluator.score(PlayerEnum.PLAYER_2)), -1
+
+        entry = self.tt.probe(key)
+        if entry is not None and entry.depth >= depth:
+            score = _score_from_tt(entry.score, depth)
+            if entry.bound == Bound.EXACT:
+                return score, entry.best_move
+            if entry.bound == Bound.LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score, entry.best_move
+        alpha_orig, beta_orig = alpha, beta
 
         valid_moves = []
-        for col in range(M):
+        for col in CENTER_ORDER if self.move_ordering else range(M):
             row = calculate_row_by_col(board, col)
             if row is not None:
                 valid_moves.append((row, col))
@@ -105,41 +184,253 @@ class AIEngine:
         if not valid_moves:
             return 0.0, -1
 
+        if self.move_ordering:
+            hint = self._pv_moves.get(key)
+            if hint is None and entry is not None:
+                hint = entry.best_move
+            self._order_moves(valid_moves, hint, depth, maximizing)
+
         if maximizing:
-            max_eval = float("-inf")
+            best_eval = float("-inf")
             best_move = valid_moves[0][1]
             for row, col in valid_moves:
                 board[row][col] = PlayerEnum.PLAYER_2
+                evaluator.play(row, col, PlayerEnum.PLAYER_2)
+                child_key = (
+                    key
+                    ^ ZOBRIST[row][col][PlayerEnum.PLAYER_2]
+                    ^ ZOBRIST_MAXIMIZING
+                )
                 eval_score = self.minimax(
-                    board, depth - 1, alpha, beta, False
+                    board,
+                    depth - 1,
+                    alpha,
+                    beta,
+                    False,
+                    (row, col),
+                    child_key,
                 )[0]
                 board[row][col] = PlayerEnum.EMPTY
-                if eval_score > max_eval:
-                    max_eval = eval_score
+                evaluator.undo(row, col)
+                if eval_score > best_eval:
+                    best_eval = eval_score
                     best_move = col
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
+                    self._record_cutoff(depth, maximizing, row, col)
                     break
-            return max_eval, best_move
         else:
-            min_eval = float("inf")
+            best_eval = float("inf")
             best_move = valid_moves[0][1]
             for row, col in valid_moves:
                 board[row][col] = PlayerEnum.PLAYER_1
-                eval_score = self.minimax(board, depth - 1, alpha, beta, True)[
-                    0
-                ]
+                evaluator.play(row, col, PlayerEnum.PLAYER_1)
+                child_key = (
+                    key
+                    ^ ZOBRIST[row][col][PlayerEnum.PLAYER_1]
+                    ^ ZOBRIST_MAXIMIZING
+                )
+                eval_score = self.minimax(
+                    board,
+                    depth - 1,
+                    alpha,
+                    beta,
+                    True,
+                    (row, col),
+                    child_key,
+                )[0]
                 board[row][col] = PlayerEnum.EMPTY
-                if eval_score < min_eval:
-                    min_eval = eval_score
+                evaluator.undo(row, col)
+                if eval_score < best_eval:
+                    best_eval = eval_score
                     best_move = col
                 beta = min(beta, eval_score)
                 if beta <= alpha:
+                    self._record_cutoff(depth, maximizing, row, col)
                     break
-            return min_eval, best_move
+
+        if best_eval <= alpha_orig:
+            bound = Bound.UPPER
+        elif best_eval >= beta_orig:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self.tt.store(
+            key, depth, _score_to_tt(best_eval, depth), bound, best_move
+        )
+        return best_eval, best_move
+
+    def _order_moves(
+        self,
+        valid_moves: list[tuple[int, int]],
+        hint: int | None,
+        depth: int,
+        maximizing: bool,
+    ) -> None:
+        """
+        Sort moves so the ones most likely to cause a cutoff come first: the
+        principal variation or transposition table move, then this depth's
+        killer moves, then by history score. Ties keep the center-first
+        order the moves were generated in.
+        """
+        killers = self._killers.get(depth, [])
+        history = self._history[maximizing]
+
+        def priority(move: tuple[int, int]) -> int:
+            row, col = move
+            if col == hint:
+                return 1 << 30
+            if col in killers:
+                return (1 << 29) - killers.index(col)
+            return history[row][col]
+
+        valid_moves.sort(key=priority, reverse=True)
+
+    def _record_cutoff(
+        self, depth: int, maximizing: bool, row: int, col: int
+    ) -> None:
+        if not self.move_ordering:
+            return
+        killers = self._killers.setdefault(depth, [])
+        if col in killers:
+            killers.remove(col)
+        killers.insert(0, col)
+        del killers[KILLER_SLOTS:]
+        self._history[maximizing][row][col] += depth * depth
 
     def get_best_move(self, board: list[list[PlayerEnum]]) -> int:
-        _, move = self.minimax(
-            board, self.max_depth, float("-inf"), float("inf"), True
+        """
+        Play the opening book move if there is one, and solve the position
+        exactly once few enough cells are left. Otherwise search with
+        iterative deepening until ``max_depth`` is reached or the time budget
+        runs out, and return the best move of the deepest iteration that
+        completed. The first iteration is never interrupted, so a move is
+        always available.
+        """
+        self.nodes = 0
+        self.completed_depth = 0
+        self.principal_variation = []
+        self.solver_result = None
+
+        if self.opening_book is not None:
+            book_move = self.opening_book.lookup(board)
+            if book_move is not None:
+                self.principal_variation = [book_move]
+                return book_move
+
+        if self._should_solve(board):
+            solver = Solver()
+            self.solver_result = solver.best_move(board)
+            self.nodes = solver.nodes
+            self.principal_variation = [self.solver_result.column]
+            logger.debug(f"AI endgame solved: {self.solver_result}")
+            return self.solver_result.column
+
+        self._pv_moves = {}
+        self.tt.reset_stats()
+        self.tt.new_search()
+        # Older history is less relevant to the new position.
+        for side in self._history:
+            for row in side:
+                row[:] = [score // 2 for score in row]
+
+        # An interrupted search leaves pieces behind, so search on a copy.
+        board = [row[:] for row in board]
+        start = time.perf_counter()
+        best_move = -1
+        try:
+            for depth in range(1, self.max_depth + 1):
+                self._killers = {}
+                score, best_move = self.minimax(
+                    board, depth, float("-inf"), float("inf"), True
+                )
+                self.completed_depth = depth
+                self._update_principal_variation(board, depth)
+                if best_move == -1 or score >= MATE_THRESHOLD:
+                    # Game already over, or a forced win was found.
+                    break
+                self._deadline = start + self.time_budget_ms / 1000
+        except SearchTimeoutError:
+            pass
+        finally:
+            self._deadline = None
+
+        logger.debug(
+            f"AI search: depth={self.completed_depth}/{self.max_depth}, "
+            f"nodes={self.nodes}, tt_hit_rate={self.tt.hit_rate:.2%}, "
+            f"elapsed={(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return best_move
+
+    def _should_solve(self, board: list[list[PlayerEnum]]) -> bool:
+        """Whether the endgame solver should pick the move for ``board``."""
+        if not self.endgame_solver:
+            return False
+        pieces = empty = 0
+        for row in board:
+            for cell in row:
+                if cell == PlayerEnum.EMPTY:
+                    empty += 1
+                elif cell in (PlayerEnum.PLAYER_1, PlayerEnum.PLAYER_2):
+                    pieces += 1
+                else:
+                    # The game is already won.
+                    return False
+        # The solver plays for the side to move, which must be player 2.
+        return (
+            0 < empty <= SOLVER_MAX_EMPTY_CELLS
+            and pieces % 2 == 1
+            and detect_winner(board) is None
         )
-        return move
+
+    def _update_principal_variation(
+        self, board: list[list[PlayerEnum]], depth: int
+    ) -> None:
+        """Follow the best moves stored in the table from the root."""
+        board = [row[:] for row in board]
+        maximizing = True
+        key = zobrist_hash(board, maximizing)
+        self.principal_variation = []
+        self._pv_moves = {}
+
+        for _ in range(depth):
+            entry = self.tt.get(key)
+            if entry is None or entry.best_move == -1:
+                break
+            col = entry.best_move
+            row = calculate_row_by_col(board, col)
+            if row is None:
+                break
+
+            self.principal_variation.append(col)
+            self._pv_moves[key] = col
+
+            piece = PlayerEnum.PLAYER_2 if maximizing else PlayerEnum.PLAYER_1
+            board[row][col] = piece
+            key ^= ZOBRIST[row][col][piece] ^ ZOBRIST_MAXIMIZING
+            maximizing = not maximizing
+            if detect_winner_at(board, row, col) is not None:
+                break
+
+
+# Engines kept alive between moves so each game's transposition table
+# carries over from one AI move to the next.
+MAX_CACHED_ENGINES = 64
+_engines: OrderedDict[str, AIEngine] = OrderedDict()
+
+
+def get_engine(game_id: str, difficulty: int = 3) -> AIEngine:
+    """Return the engine for a game, creating it on first use."""
+    engine = _engines.get(game_id)
+    if engine is None or engine.difficulty != min(max(difficulty, 1), 5):
+        engine = AIEngine(difficulty)
+        _engines[game_id] = engine
+    _engines.move_to_end(game_id)
+    while len(_engines) > MAX_CACHED_ENGINES:
+        _engines.popitem(last=False)
+    return engine
+
+
+def release_engine(game_id: str) -> None:
+    """Drop a finished game's engine and its transposition table."""
+    _engines.pop(game_id, None)
@@ -0,0 +1,118 @@
+"""
+Precomputed AI moves for the first moves of a game.
+
+Positions are keyed by their bitboards (see ``fourfury.bitboard``) and
+normalized for left-right mirror symmetry, so a position and its mirror
+image share one entry. The book is stored in a compact binary file::
+
+    header:  magic (4 bytes) | version (1) | search depth (1) | count (4)
+    entries: key (8 bytes) | column (1), sorted by key
+
+The packaged book is built with ``python -m fourfury.ai.build_opening_book``.
+"""
+
+import struct
+from functools import cache
+from pathlib import Path
+
+from ..bitboard import BOTTOM_MASK, HEIGHT, to_bitboard
+from ..constants import M, PlayerEnum
+from ..core import calculate_row_by_col
+
+BOOK_PATH = Path(__file__).with_name("opening_book.bin")
+
+MAGIC = b"FFOB"
+VERSION = 1
+HEADER = struct.Struct("<4sBBI")
+ENTRY = struct.Struct("<QB")
+
+COLUMN_BITS = (1 << HEIGHT) - 1
+
+
+def position_key(player_1: int, player_2: int) -> int:
+    """
+    Return a unique key for a position.
+
+    Adding the bottom row to the occupied cells sets a marker bit just above
+    the top piece of every column, and player 1's pieces fill in the bits
+    below it, so the key fits in ``M * (N + 1)`` bits without collisions.
+    """
+    return player_1 + (player_1 | player_2) + BOTTOM_MASK
+
+
+def mirror_key(key: int) -> int:
+    """Return the key of the left-right mirror image of a position."""
+    mirrored = 0
+    for col in range(M):
+        column = (key >> (col * HEIGHT)) & COLUMN_BITS
+        mirrored |= column << ((M - 1 - col) * HEIGHT)
+    return mirrored
+
+
+def canonical_key(board: list[list[PlayerEnum]]) -> tuple[int, bool]:
+    """Return the normalized key of a board and whether it was mirrored."""
+    key = position_key(*to_bitboard(board))
+    mirrored = mirror_key(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+class OpeningBook:
+    def __init__(self, entries: dict[int, int] | None = None, depth: int = 0):
+        self.entries = entries or {}
+        self.depth = depth
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, board: list[list[PlayerEnum]], column: int) -> None:
+        key, mirrored = canonical_key(board)
+        self.entries[key] = M - 1 - column if mirrored else column
+
+    def lookup(self, board: list[list[PlayerEnum]]) -> int | None:
+        """Return the book move for ``board``, if there is a legal one."""
+        if not self.entries:
+            return None
+        key, mirrored = canonical_key(board)
+        column = self.entries.get(key)
+        if column is None:
+            return None
+        if mirrored:
+            column = M - 1 - column
+        if calculate_row_by_col(board, column) is None:
+            return None
+        return column
+
+    def save(self, path: Path = BOOK_PATH) -> None:
+        with open(path, "wb") as book_file:
+            book_file.write(
+                HEADER.pack(MAGIC, VERSION, self.depth, len(self.entries))
+            )
+            for key in sorted(self.entries):
+                book_file.write(ENTRY.pack(key, self.entries[key]))
+
+    @classmethod
+    def load(cls, path: Path = BOOK_PATH) -> "OpeningBook":
+        data = path.read_bytes()
+        magic, version, depth, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} opening book: {path}")
+
+        entries = {}
+        for index in range(count):
+            key, column = ENTRY.unpack_from(
+                data, HEADER.size + index * ENTRY.size
+            )
+            if not 0 <= column < M:
+                raise ValueError(f"Invalid column {column} in {path}")
+            entries[key] = column
+        return cls(entries, depth)
+
+
+@cache
+def default_book() -> OpeningBook:
+    """The packaged opening book, or an empty one if it is missing."""
+    if not BOOK_PATH.exists():
+        return OpeningBook()
+    return OpeningBook.load(BOOK_PATH)
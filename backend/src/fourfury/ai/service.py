@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from ..constants import PlayerEnum
+from ..settings import settings
+from .engine import (
+    MAX_CACHED_ENGINES,
+    AIEngine,
+    get_engine,
+    release_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _search(
+    game_id: str,
+    board: list[list[PlayerEnum]],
+    difficulty: int,
+    released: tuple[str, ...] = (),
+) -> int:
+    """Pick a move inside a worker process.
+
+    Each worker keeps its own engines per game, so a game's transposition
+    table is reused whenever its moves land on the same worker. Engines of
+    the ``released`` games are dropped first.
+    """
+    for released_id in released:
+        release_engine(released_id)
+    return get_engine(game_id, difficulty).get_best_move(board)
+
+
+def _shallow_search(board: list[list[PlayerEnum]]) -> int:
+    """
+    Cheap search used when the pool cannot take or finish a request.
+
+    It runs in a thread of the event loop's default executor, so even this
+    fallback never blocks the loop.
+    """
+    return AIEngine(1).get_best_move([row[:] for row in board])
+
+
+class AIService:
+    """
+    Runs AI searches in a process pool so they never block the event loop.
+
+    At most ``max_workers`` searches run at once and ``queue_depth`` more may
+    wait for a worker. Requests that have to queue are searched at
+    ``fallback_difficulty`` so the backlog drains quickly; requests that
+    arrive with the queue full, or that time out, are answered with a
+    shallow search in a thread of the calling process instead. With
+    ``max_workers`` set to 0 the search runs in-process, as it did before the
+    pool existed.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        queue_depth: int,
+        timeout: float,
+        fallback_difficulty: int = 1,
+    ):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.fallback_difficulty = fallback_difficulty
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        # Games released lately, sent along with every search so whichever
+        # worker runs it drops their engines too.
+        self._released: deque[str] = deque(maxlen=MAX_CACHED_ENGINES)
+
+    @property
+    def pending(self) -> int:
+        """Searches running or waiting in the pool."""
+        return self._pending
+
+    def start(self) -> None:
+        if self.max_workers <= 0 or self._executor is not None:
+            return
+        # Forking a process that runs an event loop is unsafe, spawn instead.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending = 0
+
+    async def get_best_move(
+        self, game_id: str, board: list[list[PlayerEnum]], difficulty: int
+    ) -> int:
+        if self._executor is None:
+            return _search(game_id, board, difficulty)
+
+        loop = asyncio.get_running_loop()
+
+        if self._pending >= self.max_workers + self.queue_depth:
+            logger.warning(
+                f"AI queue full ({self._pending} pending), "
+                f"using shallow search for game {game_id}"
+            )
+            return await loop.run_in_executor(None, _shallow_search, board)
+
+        if self._pending >= self.max_workers:
+            difficulty = min(difficulty, self.fallback_difficulty)
+
+        future = self._executor.submit(
+            _search, game_id, board, difficulty, tuple(self._released)
+        )
+        self._pending += 1
+
+        # Release the slot when the worker is really done with the request,
+        # not when the caller stops waiting for it.
+        def release(_: Future[int]) -> None:
+            loop.call_soon_threadsafe(self._release)
+
+        future.add_done_callback(release)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), self.timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"AI search timed out after {self.timeout}s "
+                f"for game {game_id}, using shallow search"
+            )
+            return await loop.run_in_executor(None, _shallow_search, board)
+
+    def _release(self) -> None:
+        self._pending = max(self._pending - 1, 0)
+
+    def release(self, game_id: str) -> None:
+        """
+        Forget the engines of a finished game.
+
+        Workers cannot be reached one by one, so each drops the engines of
+        the last ``MAX_CACHED_ENGINES`` released games on its next search;
+        engines of games released before those are left to its LRU.
+        """
+        release_engine(game_id)
+        if self._executor is not None:
+            self._released.append(game_id)
+
+
+ai_service = AIService(
+    max_workers=settings.AI_POOL_SIZE,
+    queue_depth=settings.AI_QUEUE_DEPTH,
+    timeout=settings.AI_MOVE_TIMEOUT,
+    fallback_difficulty=settings.AI_FALLBACK_DIFFICULTY,
+)
@@ -0,0 +1,224 @@
+"""
+Exact Connect Four solver for positions close to the end of the game.
+
+This is a negamax search over bitboards (see ``fourfury.bitboard``) that
+only ever plays moves which do not hand the opponent an immediate win,
+caches upper bounds in a transposition table and narrows the score down with
+null-window searches.
+
+Scores follow the usual convention, from the point of view of the player to
+move: 0 is a draw, a positive score ``s`` means that player wins with ``s``
+of their stones still unplayed, and a negative score means the opponent does.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+
+from ..bitboard import BOARD_MASK, BOTTOM_MASK, HEIGHT, to_bitboard
+from ..constants import M, N, PlayerEnum
+
+CELLS = N * M
+
+# Largest number of empty cells ``Solver.best_move`` accepts. Positions up to
+# this size solve in well under a second.
+MAX_EMPTY_CELLS = 16
+
+CENTER_ORDER = sorted(range(M), key=lambda col: abs(col - M // 2))
+COLUMN_MASKS = [((1 << N) - 1) << (col * HEIGHT) for col in range(M)]
+BOTTOM_BITS = [1 << (col * HEIGHT) for col in range(M)]
+TOP_BITS = [1 << (col * HEIGHT + N - 1) for col in range(M)]
+
+
+class Outcome(str, Enum):
+    WIN = "win"
+    LOSS = "loss"
+    DRAW = "draw"
+
+
+@dataclass
+class SolverResult:
+    column: int
+    score: int
+    outcome: Outcome
+    # Plies left until the game ends with perfect play, including the last.
+    plies: int
+
+
+def _winning_positions(position: int, mask: int) -> int:
+    """Empty cells that would complete a line of four for ``position``."""
+    # Vertical
+    result = (position << 1) & (position << 2) & (position << 3)
+
+    for shift in (HEIGHT, HEIGHT + 1, HEIGHT - 1):
+        pair = (position << shift) & (position << 2 * shift)
+        result |= pair & (position << 3 * shift)
+        result |= pair & (position >> shift)
+        pair = (position >> shift) & (position >> 2 * shift)
+        result |= pair & (position << shift)
+        result |= pair & (position >> 3 * shift)
+
+    return result & (BOARD_MASK ^ mask)
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+class Solver:
+    MAX_TABLE_SIZE = 1 << 20
+
+    def __init__(self) -> None:
+        self.nodes = 0
+        # Upper bounds of positions searched so far, by position key.
+        self._table: dict[int, int] = {}
+
+    def _can_win_next(self, position: int, mask: int) -> bool:
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        return bool(_winning_positions(position, mask) & possible)
+
+    def _non_losing_moves(self, position: int, mask: int) -> int:
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        opponent_win = _winning_positions(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                # Two threats at once cannot both be blocked.
+                return 0
+            possible = forced
+        # Never play right below a cell the opponent wins on.
+        return possible & ~(opponent_win >> 1)
+
+    def negamax(
+        self, position: int, mask: int, moves: int, alpha: int, beta: int
+    ) -> int:
+        """
+        Score a position in which the player to move cannot win at once.
+
+        The result is exact when it lies strictly between ``alpha`` and
+        ``beta``, and otherwise only a bound on the same side of the window.
+        """
+        self.nodes += 1
+
+        candidates = self._non_losing_moves(position, mask)
+        if not candidates:
+            return -((CELLS - moves) // 2)
+        if moves >= CELLS - 2:
+            return 0
+
+        lowest = -((CELLS - 2 - moves) // 2)
+        if alpha < lowest:
+            alpha = lowest
+            if alpha >= beta:
+                return alpha
+
+        highest = (CELLS - 1 - moves) // 2
+        key = position + mask + BOTTOM_MASK
+        bound = self._table.get(key)
+        if bound is not None:
+            highest = bound
+        if beta > highest:
+            beta = highest
+            if alpha >= beta:
+                return beta
+
+        # Moves creating the most new threats first, center-first on ties.
+        ordered = []
+        for col in CENTER_ORDER:
+            move = candidates & COLUMN_MASKS[col]
+            if move:
+                threats = _popcount(_winning_positions(position | move, mask))
+                ordered.append((threats, move))
+        ordered.sort(key=lambda item: item[0], reverse=True)
+
+        for _, move in ordered:
+            score = -self.negamax(
+                position ^ mask, mask | move, moves + 1, -beta, -alpha
+            )
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        if len(self._table) >= self.MAX_TABLE_SIZE:
+            self._table.clear()
+        self._table[key] = alpha
+        return alpha
+
+    def solve(self, position: int, mask: int, moves: int) -> int:
+        """Exact score of a position for the player to move."""
+        if self._can_win_next(position, mask):
+            return (CELLS + 1 - moves) // 2
+
+        low = -((CELLS - moves) // 2)
+        high = (CELLS + 1 - moves) // 2
+        while low < high:
+            # Null-window searches, biased towards zero where most
+            # endgame scores are.
+            middle = low + (high - low) // 2
+            if middle <= 0 and low // 2 < middle:
+                middle = low // 2
+            elif middle >= 0 and high // 2 > middle:
+                middle = high // 2
+            score = self.negamax(position, mask, moves, middle, middle + 1)
+            if score <= middle:
+                high = score
+            else:
+                low = score
+        return low
+
+    def best_move(self, board: list[list[PlayerEnum]]) -> SolverResult:
+        """
+        Solve every legal move of ``board`` and return the best one.
+
+        Raises ``ValueError`` if no move is left, or if more than
+        ``MAX_EMPTY_CELLS`` cells are empty and no move wins at once.
+        """
+        player_1, player_2 = to_bitboard(board)
+        mask = player_1 | player_2
+        moves = _popcount(mask)
+        position = player_1 if moves % 2 == 0 else player_2
+
+        legal = [
+            (col, (mask + BOTTOM_BITS[col]) & COLUMN_MASKS[col])
+            for col in CENTER_ORDER
+            if not mask & TOP_BITS[col]
+        ]
+        if not legal:
+            raise ValueError("No legal moves left to solve")
+
+        # Nothing beats winning right away.
+        winning = _winning_positions(position, mask)
+        for col, move in legal:
+            if winning & move:
+                score = (CELLS + 1 - moves) // 2
+                return SolverResult(col, score, *describe_score(score, moves))
+
+        if CELLS - moves > MAX_EMPTY_CELLS:
+            raise ValueError(
+                f"Too many empty cells to solve: {CELLS - moves} > "
+                f"{MAX_EMPTY_CELLS}"
+            )
+
+        best_col, best_score = legal[0][0], -CELLS
+        for col, move in legal:
+            score = -self.solve(position ^ mask, mask | move, moves + 1)
+            if score > best_score:
+                best_col, best_score = col, score
+        return SolverResult(
+            best_col, best_score, *describe_score(best_score, moves)
+        )
+
+
+def describe_score(score: int, moves: int) -> tuple[Outcome, int]:
+    """
+    Turn a score for the player to move into an outcome and the number of
+    plies until the game ends, counting the winning or final move.
+    """
+    if score == 0:
+        return Outcome.DRAW, CELLS - moves
+    if score > 0:
+        # The winner plays with the same parity as the player to move.
+        last_move = CELLS + moves % 2 - 2 * score
+        return Outcome.WIN, last_move - moves + 1
+    last_move = CELLS + (moves + 1) % 2 + 2 * score
+    return Outcome.LOSS, last_move - moves + 1
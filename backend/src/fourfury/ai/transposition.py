@@ -0,0 +1,119 @@
+import random
+from dataclasses import dataclass
+from enum import IntEnum
+
+from ..constants import M, N, PlayerEnum
+
+# Fixed seed so keys are stable across processes and restarts.
+_rng = random.Random(0x4F0F)
+
+ZOBRIST = [
+    [[0] + [_rng.getrandbits(64) for _ in range(2)] for _ in range(M)]
+    for _ in range(N)
+]
+ZOBRIST_MAXIMIZING = _rng.getrandbits(64)
+
+
+def zobrist_hash(board: list[list[PlayerEnum]], maximizing: bool) -> int:
+    """Hash a board and the side to move into a 64-bit key."""
+    key = ZOBRIST_MAXIMIZING if maximizing else 0
+    for row in range(N):
+        for col in range(M):
+            cell = board[row][col]
+            if cell == PlayerEnum.PLAYER_1 or cell == PlayerEnum.PLAYER_2:
+                key ^= ZOBRIST[row][col][cell]
+    return key
+
+
+class Bound(IntEnum):
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+@dataclass(slots=True)
+class TTEntry:
+    key: int
+    depth: int
+    score: float
+    bound: Bound
+    best_move: int
+    generation: int
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of previously searched positions.
+
+    Entries are indexed by the low bits of their Zobrist key. A slot keeps
+    its entry if that entry comes from the current search and was searched
+    deeper than the new one; otherwise it is replaced. Call
+    ``new_search`` before every root search so entries left over from earlier
+    moves age out first.
+    """
+
+    DEFAULT_SIZE = 1 << 15
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        if size <= 0 or size & (size - 1):
+            raise ValueError("Transposition table size must be a power of 2")
+        self.size = size
+        self._mask = size - 1
+        self._entries: list[TTEntry | None] = [None] * size
+        self.generation = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self) -> None:
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._entries = [None] * self.size
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.probes = self.hits = self.stores = self.replacements = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def probe(self, key: int) -> TTEntry | None:
+        self.probes += 1
+        entry = self._entries[key & self._mask]
+        if entry is None or entry.key != key:
+            return None
+        self.hits += 1
+        return entry
+
+    def get(self, key: int) -> TTEntry | None:
+        """Look up an entry without counting it as a search probe."""
+        entry = self._entries[key & self._mask]
+        if entry is None or entry.key != key:
+            return None
+        return entry
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        score: float,
+        bound: Bound,
+        best_move: int,
+    ) -> None:
+        index = key & self._mask
+        entry = self._entries[index]
+        if entry is not None:
+            if entry.generation == self.generation and entry.depth > depth:
+                return
+            if entry.key != key:
+                self.replacements += 1
+
+        self.stores += 1
+        self._entries[index] = TTEntry(
+            key, depth, score, bound, best_move, self.generation
+        )
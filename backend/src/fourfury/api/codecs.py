@@ -0,0 +1,199 @@
+"""
+Codecs used to store games in the cache.
+
+``JsonGameCodec`` is the original format: the full ``model_dump`` as a JSON
+object, validated again when it is read. ``CompactGameCodec`` writes a JSON
+array with the fields in a fixed order, the board packed two bits per cell
+and every move packed into one integer. Cached games are written by this
+application, so it can rebuild them with ``model_construct`` and skip
+validation; pass ``trusted=False`` for data from anywhere else.
+
+Both codecs produce text, as the Redis client decodes responses. orjson is
+used when it is installed.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Protocol
+
+from bson import ObjectId
+
+from ..constants import M, N, PlayerEnum
+from .models import Game, GameMode, Move
+from .serializers import deserialize_game, serialize_game
+
+# orjson is an optional extra, not a declared dependency.
+try:
+    import orjson  # type: ignore[import-not-found, unused-ignore]
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None  # type: ignore[assignment, unused-ignore]
+
+
+def _dumps(data: Any) -> str:
+    if orjson is not None:
+        return str(orjson.dumps(data).decode())
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class GameCodec(Protocol):
+    def encode(self, game: Game) -> str: ...
+
+    def decode(self, data: str, trusted: bool = True) -> Game: ...
+
+
+class JsonGameCodec:
+    """The original JSON object format."""
+
+    def encode(self, game: Game) -> str:
+        return serialize_game(game)
+
+    def decode(self, data: str, trusted: bool = True) -> Game:
+        return deserialize_game(data)
+
+
+# PlayerEnum members by value, faster than calling PlayerEnum(value).
+_CELLS = tuple(PlayerEnum)
+# Bit offset of every cell, first cell in the highest bits.
+_SHIFTS = range(2 * (N * M - 1), -1, -2)
+
+
+def pack_board(board: list[list[PlayerEnum]]) -> str:
+    """Pack the 42 cells, two bits each, row by row, into a hex string."""
+    packed = 0
+    for row in board:
+        for cell in row:
+            packed = packed << 2 | cell
+    return f"{packed:x}"
+
+
+def unpack_board(packed: str) -> list[list[PlayerEnum]]:
+    value = int(packed, 16)
+    cells = [_CELLS[value >> shift & 3] for shift in _SHIFTS]
+    return [cells[row * M : (row + 1) * M] for row in range(N)]
+
+
+def pack_move(move: Move) -> int:
+    return move.row << 5 | move.column << 2 | move.value
+
+
+def unpack_move(packed: int) -> dict[str, Any]:
+    return {
+        "row": packed >> 5,
+        "column": packed >> 2 & 7,
+        "value": _CELLS[packed & 3],
+    }
+
+
+# Every possible move, by packed value. Moves are never changed once made
+# (copy_game shares them too), so trusted decodes reuse these.
+_MOVES = {
+    pack_move(move): move
+    for move in (
+        Move(row=row, column=column, value=value)
+        for row in range(N)
+        for column in range(M)
+        for value in PlayerEnum
+    )
+}
+
+
+def _timestamp(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _datetime(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+class CompactGameCodec:
+    """Fixed-order JSON array with a packed board and packed moves."""
+
+    def encode(self, game: Game) -> str:
+        return _dumps(
+            [
+                str(game.id),
+                _timestamp(game.created_at),
+                _timestamp(game.updated_at),
+                game.player_1,
+                game.player_1_username,
+                game.player_2,
+                game.player_2_username,
+                game.move_number,
+                pack_board(game.board),
+                [pack_move(move) for move in game.movees],
+                game.winner,
+                _timestamp(game.finished_at),
+                game.mode.value,
+                game.ai_difficulty,
+            ]
+        )
+
+    def decode(self, data: str, trusted: bool = True) -> Game:
+        if data.startswith("{"):
+            # Written by JsonGameCodec, e.g. before a codec change.
+            return deserialize_game(data)
+
+        (
+            game_id,
+            created_at,
+            updated_at,
+            player_1,
+            player_1_username,
+            player_2,
+            player_2_username,
+            move_number,
+            board,
+            moves,
+            winner,
+            finished_at,
+            mode,
+            ai_difficulty,
+        ) = _loads(data)
+
+        fields: dict[str, Any] = {
+            "id": game_id,
+            "created_at": _datetime(created_at),
+            "updated_at": _datetime(updated_at),
+            "player_1": player_1,
+            "player_1_username": player_1_username,
+            "player_2": player_2,
+            "player_2_username": player_2_username,
+            "move_number": move_number,
+            "board": unpack_board(board),
+            "winner": PlayerEnum(winner) if winner is not None else None,
+            "finished_at": _datetime(finished_at),
+            "mode": GameMode(mode),
+            "ai_difficulty": ai_difficulty,
+        }
+        if not trusted:
+            fields["movees"] = [unpack_move(move) for move in moves]
+            return Game(**fields)
+
+        # model_construct skips validation, which turns the id into an
+        # ObjectId, so do that here.
+        fields["id"] = ObjectId(game_id)
+        return Game.model_construct(
+            **fields, movees=[_MOVES[move] for move in moves]
+        )
+
+
+def encode_games(codec: GameCodec, games: list[Game]) -> str:
+    return _dumps([codec.encode(game) for game in games])
+
+
+def decode_games(
+    codec: GameCodec, data: str, trusted: bool = True
+) -> list[Game]:
+    return [codec.decode(item, trusted) for item in _loads(data)]
+
+
+CODECS: dict[str, GameCodec] = {
+    "json": JsonGameCodec(),
+    "compact": CompactGameCodec(),
+}
@@ -1,11 +1,25 @@
+import asyncio
 from typing import Any
 
-from ..cache import invalidate_cache, redis_cache
+from ..cache import (
+    cache_key,
+    cache_set,
+    invalidate_cache,
+    invalidate_keys,
+    local_cache,
+    redis_cache,
+)
 from ..db.client import MongoDBClient
 from ..session import generate_ai_username, session_manager
+from ..settings import settings
+from .codecs import CODECS, decode_games, encode_games
 from .fields import PyObjectId
 from .models import Game, GameMode
-from .serializers import deserialize_game, serialize_game
+from .serializers import copy_game
+
+GAME_CACHE_EXPIRE = 3600
+
+game_codec = CODECS[settings.CACHE_CODEC]
 
 
 async def start_new_game(
@@ -43,7 +57,13 @@ async def start_new_game(
 
 
 @redis_cache(
-    "game", 3600, serialize_fn=serialize_game, deserialize_fn=deserialize_game
+    "game",
+    GAME_CACHE_EXPIRE,
+    serialize_fn=game_codec.encode,
+    deserialize_fn=game_codec.decode,
+    local=True,
+    copy_fn=copy_game,
+    lock=True,
 )
 async def get_game_by_id(game_id: PyObjectId) -> Game | None:
     client = MongoDBClient()
@@ -55,7 +75,10 @@ async def get_game_by_id(game_id: PyObjectId) -> Game | None:
 
 
 @redis_cache(
-    "games", 1800, serialize_fn=serialize_game, deserialize_fn=deserialize_game
+    "games",
+    1800,
+    serialize_fn=lambda games: encode_games(game_codec, games),
+    deserialize_fn=lambda data: decode_games(game_codec, data),
 )
 async def get_all_games() -> list[Game]:
     client = MongoDBClient()
@@ -81,11 +104,46 @@ async def join_new_game(
     return await update_game(game.id, game_data)
 
 
+async def cache_game(game: Game) -> None:
+    """Write a game through to the cache and drop the stale games list."""
+    await asyncio.gather(
+        cache_set(
+            "game",
+            cache_key("game", game.id),
+            game_codec.encode(game),
+            GAME_CACHE_EXPIRE,
+        ),
+        invalidate_keys(cache_key("games")),
+    )
+    local_cache.set(cache_key("game", game.id), copy_game(game))
+
+
 async def update_game(
     game_id: PyObjectId, game_data: dict[str, Any]
 ) -> Game | None:
+    """Apply ``game_data`` and return the game as stored in the database."""
     client = MongoDBClient()
-    await client.update(Game, game_id, game_data)
-    await invalidate_cache(f"game:{game_id}")
-    await invalidate_cache("games")
-    return await get_game_by_id(game_id)
+    stored = await client.update_and_get(Game, game_id, game_data)
+    if stored is None:
+        await invalidate_keys(cache_key("game", game_id), cache_key("games"))
+        return None
+
+    game = Game(**stored)
+    await cache_game(game)
+    return game
+
+
+async def save_game(game: Game) -> Game:
+    """
+    Save a game the caller has already changed, without reading it back.
+
+    The database and the cache both get the caller's copy, so it must be the
+    latest state of the game, as it is right after a move.
+    """
+    client = MongoDBClient()
+    game_data = game.model_dump()
+    await client.update(Game, game.id, game_data)
+    # update() stamps the write time into game_data; keep the cache in step.
+    game.updated_at = game_data["updated_at"]
+    await cache_game(game)
+    return game
@@ -0,0 +1,34 @@
+from typing import Annotated, NamedTuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from ..session import session_manager
+
+
+class PlayerSession(NamedTuple):
+    session_id: str
+    username: str
+
+
+async def get_player_session(request: Request) -> PlayerSession:
+    """
+    The session from the request cookies, or 401 if it is not valid.
+
+    Validated sessions are cached in-process for a few seconds, so most
+    requests are authenticated without a Redis round trip.
+    """
+    session_id = request.cookies.get("session_id")
+    username = request.cookies.get("username")
+
+    if (
+        not session_id
+        or not username
+        or not await session_manager.validate_session(session_id, username)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session"
+        )
+    return PlayerSession(session_id, username)
+
+
+CurrentSession = Annotated[PlayerSession, Depends(get_player_session)]
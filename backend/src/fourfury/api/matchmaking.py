@@ -1,109 +1,296 @@
+import asyncio
 import logging
-from typing import Optional
+import math
+import time
+import uuid
+from collections import defaultdict
+from itertools import islice
+from typing import Awaitable, Callable, Optional
 
-from ..cache import redis_client
-from .crud import get_game_by_id, join_new_game, start_new_game
+from ..cache import RELEASE_LOCK_SCRIPT, redis_client
+from ..settings import settings
+from .crud import join_new_game, start_new_game
 from .models import Game, GameMode
 
 logger = logging.getLogger(__name__)
 
-MATCHMAKING_QUEUE_KEY = "matchmaking:queue"
-PLAYER_MATCH_STATUS_KEY = "matchmaking:status:{}"
+# Sorted set of waiting players scored by the time they joined, so
+# membership and removal do not scan the queue. It replaces the
+# "matchmaking:queue" list.
+MATCHMAKING_QUEUE_KEY = "matchmaking:waiting"
+# Sorted set of the same players scored by rating, read by the matcher.
+MATCHMAKING_RATINGS_KEY = "matchmaking:ratings"
+# Hash with the name and socket id of a waiting player.
+PLAYER_ENTRY_KEY = "matchmaking:player:{}"
+MATCHER_LOCK_KEY = "matchmaking:matcher:lock"
+QUEUE_ENTRY_TTL = 3600  # seconds a player may wait
+# Players have no rating yet, so they all share one bucket for now.
+DEFAULT_RATING = 1000
 
+CLAIM_BATCH_SIZE = 250  # pairs per script call
 
-class MatchMaker:
-    def __init__(self):
-        self.redis = redis_client
+# Extend the matcher lock only if it still holds our token.
+EXTEND_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
 
-    async def add_to_queue(
-        self, player_username: str, player_name: str, session_id: str
-    ) -> Optional[Game]:
-        # Check if player is already in queue
-        if await self.is_player_in_queue(player_username):
+# Removes each pair from the queue if both players are still waiting, so a
+# player who cancelled or was matched by another worker is not matched
+# again. ARGV holds the pairs flattened; returns the claimed ones the same
+# way.
+CLAIM_SCRIPT = """
+local claimed = {}
+for i = 1, #ARGV, 2 do
+    local a, b = ARGV[i], ARGV[i + 1]
+    if redis.call("ZSCORE", KEYS[1], a) and redis.call("ZSCORE", KEYS[1], b)
+    then
+        redis.call("ZREM", KEYS[1], a, b)
+        redis.call("ZREM", KEYS[2], a, b)
+        table.insert(claimed, a)
+        table.insert(claimed, b)
+    end
+end
+return claimed
+"""
+
+
+def pair_players(
+    waiting: list[tuple[str, float, float]],
+    now: float,
+    bucket_size: float,
+    widen_after: float,
+) -> list[tuple[str, str]]:
+    """
+    Pair waiting players by rating bucket.
+
+    ``waiting`` holds ``(username, joined_at, rating)`` with the longest
+    waiting first. A player accepts opponents up to one bucket further away
+    for every ``widen_after`` seconds they have waited, and two players are
+    paired only when both accept each other. Players are served in the
+    order they joined, each with the nearest acceptable opponent.
+    """
+    buckets: dict[int, list[int]] = defaultdict(list)
+    bucket_of = []
+    reach = []
+    for index, (_, joined_at, rating) in enumerate(waiting):
+        bucket = int(rating // bucket_size)
+        buckets[bucket].append(index)
+        bucket_of.append(bucket)
+        reach.append(int(max(now - joined_at, 0) // widen_after))
+    if not buckets:
+        return []
+    lowest, highest = min(buckets), max(buckets)
+    # Matched players are skipped once, by moving each bucket's start.
+    starts = dict.fromkeys(buckets, 0)
+    matched = [False] * len(waiting)
+
+    def oldest_in(bucket: int, player: int) -> Optional[int]:
+        members = buckets.get(bucket)
+        if members is None:
             return None
+        start = starts[bucket]
+        while start < len(members) and matched[members[start]]:
+            start += 1
+        starts[bucket] = start
+        for candidate in islice(members, start, None):
+            if candidate != player and not matched[candidate]:
+                # The oldest player in a bucket has the widest reach, so if
+                # they do not accept the distance nobody behind them does.
+                distance = abs(bucket - bucket_of[player])
+                return candidate if reach[candidate] >= distance else None
+        return None
 
-        # Try to find an existing player in queue
-        waiting_player = await self.get_waiting_player()
-        waiting_game_id = (
-            await self.get_player_game_id(waiting_player)
-            if waiting_player
-            else None
+    pairs = []
+    for player in range(len(waiting)):
+        if matched[player]:
+            continue
+        bucket = bucket_of[player]
+        max_distance = min(
+            reach[player], max(bucket - lowest, highest - bucket)
         )
+        for distance in range(max_distance + 1):
+            candidates = [
+                candidate
+                for candidate in {
+                    oldest_in(bucket - distance, player),
+                    oldest_in(bucket + distance, player),
+                }
+                if candidate is not None
+            ]
+            if candidates:
+                opponent = min(candidates)
+                matched[player] = matched[opponent] = True
+                pairs.append((waiting[player][0], waiting[opponent][0]))
+                break
+    return pairs
 
-        if (
-            waiting_player
-            and waiting_player != player_username
-            and waiting_game_id
-        ):
-            # Found a match! Remove waiting player from queue
-            await self.redis.lrem(MATCHMAKING_QUEUE_KEY, 0, waiting_player)
-
-            # Join second player to existing game
-            game = await get_game_by_id(waiting_game_id)
-            if game:
-                game = await join_new_game(game, player_username, player_name)
-
-            # Clear both players' status
-            await self.clear_player_status(waiting_player)
-            await self.clear_player_status(player_username)
-
-            return game
-        else:
-            # Create new game for first player
-            game = await start_new_game(
-                player_username,
-                player_name,
-                mode=GameMode.ONLINE,
-                session_id=session_id,
-            )
-            if game:
-                # Add player to queue and store game ID
-                await self.redis.lpush(MATCHMAKING_QUEUE_KEY, player_username)
-                await self.set_player_status(player_username, "waiting")
-                await self.set_player_game_id(player_username, str(game.id))
-                return game
-            return None
 
-    async def set_player_game_id(
-        self, player_username: str, game_id: str
-    ) -> None:
-        key = f"matchmaking:game:{player_username}"
-        await self.redis.setex(key, 3600, game_id)
+class MatchMaker:
+    def __init__(self):
+        self.redis = redis_client
 
-    async def get_player_game_id(self, player_username: str) -> Optional[str]:
-        if not player_username:
-            return None
-        key = f"matchmaking:game:{player_username}"
-        return await self.redis.get(key)
+    async def enqueue(
+        self,
+        player_username: str,
+        player_name: str,
+        sid: str,
+        rating: float = DEFAULT_RATING,
+    ) -> bool:
+        """
+        Put a player in the queue; the matcher pairs them later. A player
+        who is already waiting keeps their place and gets notified on the
+        new socket. Returns whether the player was added.
+        """
+        entry_key = PLAYER_ENTRY_KEY.format(player_username)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(entry_key, mapping={"name": player_name, "sid": sid})
+            pipe.expire(entry_key, QUEUE_ENTRY_TTL)
+            pipe.zadd(MATCHMAKING_RATINGS_KEY, {player_username: rating})
+            pipe.zadd(
+                MATCHMAKING_QUEUE_KEY, {player_username: time.time()}, nx=True
+            )
+            *_, added = await pipe.execute()
+        return bool(added)
 
     async def cancel_matching(self, player_username: str) -> bool:
-        removed = await self.redis.lrem(
-            MATCHMAKING_QUEUE_KEY, 0, player_username
-        )
-        await self.clear_player_status(player_username)
-        return removed > 0
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(MATCHMAKING_QUEUE_KEY, player_username)
+            pipe.zrem(MATCHMAKING_RATINGS_KEY, player_username)
+            pipe.delete(PLAYER_ENTRY_KEY.format(player_username))
+            removed, *_ = await pipe.execute()
+        return bool(removed)
 
     async def is_player_in_queue(self, player_username: str) -> bool:
-        queue = await self.redis.lrange(MATCHMAKING_QUEUE_KEY, 0, -1)
-        return player_username in queue
+        score = await self.redis.zscore(MATCHMAKING_QUEUE_KEY, player_username)
+        return score is not None
 
-    async def get_waiting_player(self) -> Optional[str]:
-        player = await self.redis.lindex(MATCHMAKING_QUEUE_KEY, -1)
-        return player
+    async def get_player_status(self, player_username: str) -> Optional[str]:
+        if await self.is_player_in_queue(player_username):
+            return "waiting"
+        return None
 
-    async def set_player_status(
-        self, player_username: str, status: str
-    ) -> None:
-        key = PLAYER_MATCH_STATUS_KEY.format(player_username)
-        await self.redis.setex(key, 3600, status)  # Expire after 1 hour
+    async def queue_length(self) -> int:
+        return await self.redis.zcard(MATCHMAKING_QUEUE_KEY)
 
-    async def clear_player_status(self, player_username: str) -> None:
-        key = PLAYER_MATCH_STATUS_KEY.format(player_username)
-        await self.redis.delete(key)
+    async def wait_time_percentiles(
+        self, percentiles: tuple[int, ...] = (50, 90, 99)
+    ) -> dict[int, float]:
+        """
+        How long players have been waiting so far, in seconds, by
+        percentile (nearest rank). Each one is a single ``ZRANGE`` by rank.
+        """
+        length = await self.queue_length()
+        if not length:
+            return {}
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for percentile in percentiles:
+                # The queue is ordered by join time, so longest wait first.
+                rank = max(math.ceil(percentile / 100 * length), 1)
+                index = length - rank
+                pipe.zrange(
+                    MATCHMAKING_QUEUE_KEY, index, index, withscores=True
+                )
+            results = await pipe.execute()
+        return {
+            percentile: now - result[0][1]
+            for percentile, result in zip(percentiles, results)
+            if result
+        }
 
-    async def get_player_status(self, player_username: str) -> Optional[str]:
-        key = PLAYER_MATCH_STATUS_KEY.format(player_username)
-        return await self.redis.get(key)
+    async def reap_stale(self, max_age: float = QUEUE_ENTRY_TTL) -> list[str]:
+        """Remove players who joined more than ``max_age`` seconds ago."""
+        cutoff = time.time() - max_age
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrangebyscore(MATCHMAKING_QUEUE_KEY, "-inf", cutoff)
+            pipe.zremrangebyscore(MATCHMAKING_QUEUE_KEY, "-inf", cutoff)
+            stale, _ = await pipe.execute()
+        if stale:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zrem(MATCHMAKING_RATINGS_KEY, *stale)
+                pipe.delete(
+                    *(PLAYER_ENTRY_KEY.format(player) for player in stale)
+                )
+                await pipe.execute()
+            logger.info(f"Reaped {len(stale)} stale matchmaking entries")
+        return list(stale)
+
+    async def waiting_players(self) -> list[tuple[str, float, float]]:
+        """
+        ``(username, joined_at, rating)`` of everyone waiting, oldest first.
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrange(MATCHMAKING_QUEUE_KEY, 0, -1, withscores=True)
+            pipe.zrange(MATCHMAKING_RATINGS_KEY, 0, -1, withscores=True)
+            queue, ratings = await pipe.execute()
+        rating_of = dict(ratings)
+        return [
+            (username, joined_at, rating_of.get(username, DEFAULT_RATING))
+            for username, joined_at in queue
+        ]
+
+    async def claim_pairs(
+        self, pairs: list[tuple[str, str]]
+    ) -> list[tuple[str, str]]:
+        """Take the pairs whose players are both still waiting."""
+        if not pairs:
+            return []
+        # Each script blocks Redis while it runs, so claim in batches.
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for start in range(0, len(pairs), CLAIM_BATCH_SIZE):
+                batch = pairs[start : start + CLAIM_BATCH_SIZE]
+                pipe.eval(
+                    CLAIM_SCRIPT,
+                    2,
+                    MATCHMAKING_QUEUE_KEY,
+                    MATCHMAKING_RATINGS_KEY,
+                    *(player for pair in batch for player in pair),
+                )
+            results = await pipe.execute()
+        return [
+            (claimed[i], claimed[i + 1])
+            for claimed in results
+            for i in range(0, len(claimed), 2)
+        ]
+
+    async def player_entries(self, players: list[str]) -> list[dict[str, str]]:
+        """Name and socket id of each player, empty if their entry expired."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for player in players:
+                pipe.hgetall(PLAYER_ENTRY_KEY.format(player))
+            return list(await pipe.execute())
+
+    async def remove_entries(self, players: list[str]) -> None:
+        if players:
+            await self.redis.delete(
+                *(PLAYER_ENTRY_KEY.format(player) for player in players)
+            )
+
+    async def requeue(self, players: list[tuple[str, float, float]]) -> None:
+        """Put claimed ``(username, joined_at, rating)`` back in the queue."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for username, joined_at, rating in players:
+                pipe.zadd(MATCHMAKING_QUEUE_KEY, {username: joined_at})
+                pipe.zadd(MATCHMAKING_RATINGS_KEY, {username: rating})
+            await pipe.execute()
+
+    async def create_match(
+        self,
+        player_1: str,
+        entry_1: dict[str, str],
+        player_2: str,
+        entry_2: dict[str, str],
+    ) -> Optional[Game]:
+        """Create the game of a claimed pair."""
+        game = await start_new_game(
+            player_1, entry_1["name"], mode=GameMode.ONLINE
+        )
+        if game:
+            game = await join_new_game(game, player_2, entry_2["name"])
+        return game
 
     async def create_rematch(self, original_game: Game) -> Optional[Game]:
         """Creates a new game with the same players for a rematch."""
@@ -131,3 +318,178 @@ class MatchMaker:
         except Exception as e:
             logger.error(f"Error creating rematch: {e}")
             return None
+
+
+class Matcher:
+    """
+    Pairs waiting players in the background, off the request path.
+
+    Every ``MATCHMAKING_INTERVAL`` seconds one worker, the one holding the
+    matcher lock, reads the queue, pairs players with ``pair_players``,
+    claims the pairs atomically, creates their games and calls
+    ``on_match`` with each game and the sockets of its players.
+
+    Games are created ``MAX_CONCURRENT_MATCHES`` at a time and the lock is
+    extended before each batch, so a long tick keeps it. Claimed players
+    whose game was not made, for whatever reason, are put back in the
+    queue.
+    """
+
+    RETRY_DELAY = 1.0  # seconds
+    LOCK_TIMEOUT = 30.0  # seconds, longer than a batch of matches takes
+    MAX_CONCURRENT_MATCHES = 32
+
+    def __init__(
+        self,
+        matchmaker: MatchMaker,
+        on_match: Callable[[Game, list[str]], Awaitable[None]],
+    ) -> None:
+        self._matchmaker = matchmaker
+        self._on_match = on_match
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def tick(self) -> int:
+        """Run one round of matching; return the number of games made."""
+        matchmaker = self._matchmaker
+        token = uuid.uuid4().hex
+        if not await matchmaker.redis.set(
+            MATCHER_LOCK_KEY,
+            token,
+            nx=True,
+            px=int(self.LOCK_TIMEOUT * 1000),
+        ):
+            return 0
+        waiting: list[tuple[str, float, float]] = []
+        claimed: list[tuple[str, str]] = []
+        entries: dict[str, dict[str, str]] = {}
+        matched: list[tuple[str, str]] = []
+        try:
+            await matchmaker.reap_stale()
+            waiting = await matchmaker.waiting_players()
+            pairs = pair_players(
+                waiting,
+                time.time(),
+                settings.MATCHMAKING_BUCKET_SIZE,
+                settings.MATCHMAKING_WIDEN_AFTER,
+            )
+            claimed = await matchmaker.claim_pairs(pairs)
+            if not claimed:
+                return 0
+            players = [player for pair in claimed for player in pair]
+            entries = dict(
+                zip(players, await matchmaker.player_entries(players))
+            )
+            # Batches limit the games being created, and the connections
+            # they use.
+            for start in range(0, len(claimed), self.MAX_CONCURRENT_MATCHES):
+                if start:
+                    await self._extend_lock(token)
+                batch = claimed[start : start + self.MAX_CONCURRENT_MATCHES]
+                results = await asyncio.gather(
+                    *(self._match(pair, entries) for pair in batch)
+                )
+                matched.extend(
+                    pair for pair, made in zip(batch, results) if made
+                )
+        finally:
+            try:
+                await self._settle(waiting, claimed, entries, matched)
+            finally:
+                await matchmaker.redis.eval(
+                    RELEASE_LOCK_SCRIPT, 1, MATCHER_LOCK_KEY, token
+                )
+        return len(matched)
+
+    async def _extend_lock(self, token: str) -> None:
+        if not await self._matchmaker.redis.eval(
+            EXTEND_LOCK_SCRIPT,
+            1,
+            MATCHER_LOCK_KEY,
+            token,
+            int(self.LOCK_TIMEOUT * 1000),
+        ):
+            # Claims are atomic, so the pairs taken are still ours alone.
+            logger.warning("Matcher lock expired during a tick")
+
+    async def _settle(
+        self,
+        waiting: list[tuple[str, float, float]],
+        claimed: list[tuple[str, str]],
+        entries: dict[str, dict[str, str]],
+        matched: list[tuple[str, str]],
+    ) -> None:
+        """
+        Requeue the claimed players left without a game and drop the
+        entries of the others.
+
+        Players whose entry expired are not requeued. If the tick failed
+        before reading the entries, every unmatched player is.
+        """
+        seated = {player for pair in matched for player in pair}
+        unmatched = {
+            player
+            for pair in claimed
+            for player in pair
+            if player not in seated
+            and (player not in entries or entries[player])
+        }
+        await self._matchmaker.requeue(
+            [entry for entry in waiting if entry[0] in unmatched]
+        )
+        await self._matchmaker.remove_entries(
+            [
+                player
+                for pair in claimed
+                for player in pair
+                if player not in unmatched
+            ]
+        )
+
+    async def _match(
+        self, pair: tuple[str, str], entries: dict[str, dict[str, str]]
+    ) -> bool:
+        player_1, player_2 = pair
+        entry_1, entry_2 = entries[player_1], entries[player_2]
+        if not entry_1 or not entry_2:
+            # An entry expired; the other player is put back in the queue.
+            return False
+        try:
+            game = await self._matchmaker.create_match(
+                player_1, entry_1, player_2, entry_2
+            )
+        except Exception as e:
+            logger.error(f"Error matching {player_1} and {player_2}: {e}")
+            return False
+        if game is None:
+            return False
+        try:
+            await self._on_match(game, [entry_1["sid"], entry_2["sid"]])
+        except Exception as e:
+            # The game exists, so the players are not queued again.
+            logger.error(f"Error notifying match {game.id}: {e}")
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+                await asyncio.sleep(settings.MATCHMAKING_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Matcher error: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from typing import Any
 
 from ..constants import PlayerEnum
 from .fields import PyObjectId
@@ -22,6 +23,19 @@ def serialize_game(game: Game) -> str:
     return json.dumps(game.model_dump(), cls=GameEncoder)
 
 
+def copy_game(game: Game) -> Game:
+    """
+    Copy a game cheaply: only the board and the move list are ever changed
+    in place, so they are copied and everything else is shared.
+    """
+    return game.model_copy(
+        update={
+            "board": [row[:] for row in game.board],
+            "movees": list(game.movees),
+        }
+    )
+
+
 def deserialize_game(game_str: str) -> Game:
     game_dict = json.loads(game_str)
     # Convert board values back to PlayerEnum
@@ -32,3 +46,40 @@ def deserialize_game(game_str: str) -> Game:
     if "winner" in game_dict and game_dict["winner"] is not None:
         game_dict["winner"] = PlayerEnum(game_dict["winner"])
     return Game(**game_dict)
+
+
+def move_delta(game: Game) -> dict[str, Any]:
+    """
+    The change made by the last move, sent as a ``move_applied`` event.
+
+    ``move_number`` is the version of the game after the move, so a client
+    whose version is not one behind missed an update and asks for a
+    snapshot. ``cells`` holds every cell that changed: the new piece and,
+    when the move won, the cells marked as the winning line.
+    """
+    move = game.movees[-1]
+    cells = {(move.row, move.column)}
+    if game.winner is not None:
+        cells.update(
+            (row, col)
+            for row, values in enumerate(game.board)
+            for col, value in enumerate(values)
+            if value == PlayerEnum.WINNER
+        )
+    return {
+        "game_id": str(game.id),
+        "move_number": game.move_number,
+        "move": {
+            "row": move.row,
+            "column": move.column,
+            "value": int(move.value),
+        },
+        "cells": [
+            [row, col, int(game.board[row][col])] for row, col in sorted(cells)
+        ],
+        "winner": int(game.winner) if game.winner is not None else None,
+        "finished_at": (
+            game.finished_at.isoformat() if game.finished_at else None
+        ),
+        "next_player_to_move_username": game.next_player_to_move_username,
+    }
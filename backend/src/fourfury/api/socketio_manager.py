@@ -1,22 +1,29 @@
 import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Any, cast
+from typing import Any, Awaitable, Callable, cast
 
 import socketio  # type: ignore
 
-from ..ai.engine import AIEngine
-from ..cache import presence_manager, redis_client
+from ..ai.service import ai_service
+from ..cache import presence_manager, redis_client, redis_url
 from ..core import calculate_row_by_col
 from ..session import session_manager
 from ..settings import settings
-from .crud import get_game_by_id, start_new_game, update_game
-from .matchmaking import MatchMaker
+from .crud import get_game_by_id, save_game, start_new_game
+from .matchmaking import Matcher, MatchMaker
 from .models import Game, GameMode, MoveInput, PlayerEnum, get_model_safe
+from .serializers import move_delta
 from .utils import make_move, validate
 
+# Emits go through Redis, so rooms span every worker and every container.
+client_manager = socketio.AsyncRedisManager(
+    redis_url(), channel=settings.SOCKETIO_CHANNEL
+)
 sio = socketio.AsyncServer(
-    async_mode="asgi", cors_allowed_origins=settings.ALLOWED_ORIGINS
+    async_mode="asgi",
+    cors_allowed_origins=settings.ALLOWED_ORIGINS,
+    client_manager=client_manager,
 )
 socket_app = socketio.ASGIApp(sio)
 
@@ -42,9 +49,20 @@ class GameManager:
         return players
 
     async def broadcast_game(self, game: Game) -> None:
+        """Send the full game to everyone in the room."""
         game_data = game.model_dump_json()
         await sio.emit("game_update", game_data, room=str(game.id))
 
+    async def send_snapshot(self, sid: str, game_id: str) -> None:
+        """Send the full game to one client, e.g. on join or resync."""
+        game = await get_game_by_id(game_id)
+        if game is not None:
+            await sio.emit("game_update", game.model_dump_json(), room=sid)
+
+    async def broadcast_move(self, game: Game) -> None:
+        """Send only what the last move changed to everyone in the room."""
+        await sio.emit("move_applied", move_delta(game), room=str(game.id))
+
     async def handle_forfeit(self, game_id: str, username: str) -> None:
         """Handle player forfeit when timeout expires"""
         game = await get_game_by_id(game_id)
@@ -55,7 +73,7 @@ class GameManager:
                 else PlayerEnum.PLAYER_1
             )
             game.finished_at = datetime.now(timezone.utc)
-            await update_game(game.id, game.model_dump())
+            await save_game(game)
             await self.broadcast_game(game)
 
             # Force player status to offline after forfeit
@@ -86,29 +104,94 @@ class GameManager:
 game_manager = GameManager()
 
 
-async def listen_for_timeouts():
-    """Listen for Redis key expiration events related to player timeouts"""
-    pubsub = redis_client.pubsub()
-    await pubsub.psubscribe("__keyevent@0__:expired")
+class CountdownScheduler:
+    """
+    Forfeits players whose disconnect countdown expired.
+
+    Every ``INTERVAL`` seconds each worker claims the countdowns past their
+    deadline from the presence sorted set. A claim leases them, so only
+    one worker calls ``on_timeout`` for each, and they are removed once it
+    returns. If it raises, or the worker dies first, the lease runs out and
+    the countdown is claimed again. Countdowns that expire while no worker
+    is running are handled once one starts.
+    """
+
+    INTERVAL = 1.0  # seconds
+    BATCH_SIZE = 100  # countdowns claimed at a time
+    RETRY_DELAY = 1.0  # seconds
+
+    def __init__(
+        self, on_timeout: Callable[[str, str], Awaitable[None]]
+    ) -> None:
+        self._on_timeout = on_timeout
+        self._task: asyncio.Task[None] | None = None
 
-    while True:
-        message = await pubsub.get_message(ignore_subscribe_messages=True)
-        if message:
-            key = message["data"]
-            print(f"Timeout expired for key: {key}")
-            if key.startswith(presence_manager.COUNTDOWN_PREFIX):
-                _, game_id, username = key.rsplit(":", 2)
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def tick(self) -> int:
+        """Handle the expired countdowns; return how many were claimed."""
+        handled = 0
+        while True:
+            claim = await presence_manager.claim_expired_countdowns(
+                self.BATCH_SIZE
+            )
+            lease_until, expired = claim
+            completed = []
+            for game_id, username in expired:
                 logger.info(
                     f"Timeout expired for player {username} in game {game_id}"
                 )
-                print(
-                    f"Timeout expired for player {username} in game {game_id}"
-                )
-                await game_manager.handle_forfeit(game_id, username)
+                try:
+                    await self._on_timeout(game_id, username)
+                except Exception as e:
+                    # Left leased, so it is retried once the lease runs out.
+                    logger.error(f"Timeout handling error: {e}")
+                else:
+                    completed.append((game_id, username))
+            await presence_manager.complete_countdowns(lease_until, completed)
+            handled += len(expired)
+            if len(expired) < self.BATCH_SIZE:
+                return handled
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+                await asyncio.sleep(self.INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Countdown scheduler error: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
+
+
+countdown_scheduler = CountdownScheduler(game_manager.handle_forfeit)
+
+
+async def notify_match(game: Game, sids: list[str]) -> None:
+    """Tell both players of a new game where to go."""
+    game_data = game.model_dump_json()
+    for sid in sids:
+        await sio.emit(
+            "match_found",
+            {"game": game_data, "message": "Match found! Game starting..."},
+            room=sid,
+        )
 
 
-# Start timeout listener when app initializes
-asyncio.create_task(listen_for_timeouts())
+matcher = Matcher(matchmaker, notify_match)
 
 
 @sio.event
@@ -180,6 +263,8 @@ async def disconnect(sid: str) -> None:
 async def join_game_room(sid: str, game_id: str, player_status: str) -> None:
     await sio.enter_room(sid, game_id)
     await game_manager.add_player(sid, game_id)
+    # Moves are sent as deltas from now on, so start from the latest state.
+    await game_manager.send_snapshot(sid, game_id)
 
     # Track player presence immediately when joining
     session = await sio.get_session(sid)
@@ -215,6 +300,12 @@ async def join_game_room(sid: str, game_id: str, player_status: str) -> None:
         await sio.save_session(sid, {**session, "game_id": game_id})
 
 
+@sio.event
+async def resync(sid: str, game_id: str) -> None:
+    """A client missed a move_applied event and needs the full game."""
+    await game_manager.send_snapshot(sid, game_id)
+
+
 @sio.event
 async def leave_game(sid: str, game_id: str) -> None:
     await sio.leave_room(sid, game_id)
@@ -262,8 +353,8 @@ async def move(sid: str, payload: dict[str, Any]) -> None:
     make_move(game, move.column)
 
     # Broadcast the player's move immediately
-    updated_game = cast(Game, await update_game(game.id, game.model_dump()))
-    await game_manager.broadcast_game(updated_game)
+    await save_game(game)
+    await game_manager.broadcast_move(game)
 
     # Handle AI move if in AI mode
     if game.mode == GameMode.AI and not game.finished_at:
@@ -271,15 +362,14 @@ async def move(sid: str, payload: dict[str, Any]) -> None:
             # Add delay before AI move
             await asyncio.sleep(0.5)
 
-            ai = AIEngine(game.ai_difficulty or 3)
-            ai_move = ai.get_best_move(game.board)
+            ai_move = await ai_service.get_best_move(
+                str(game.id), game.board, game.ai_difficulty or 3
+            )
             make_move(game, ai_move)
 
             # Update and broadcast AI move
-            updated_game = cast(
-                Game, await update_game(game.id, game.model_dump())
-            )
-            await game_manager.broadcast_game(updated_game)
+            await save_game(game)
+            await game_manager.broadcast_move(game)
         except Exception as e:
             logger.error(f"AI move error: {e}")
             # Fallback to random valid move
@@ -292,10 +382,11 @@ async def move(sid: str, payload: dict[str, Any]) -> None:
             ]
             if valid_cols:
                 make_move(game, random.choice(valid_cols))
-                updated_game = cast(
-                    Game, await update_game(game.id, game.model_dump())
-                )
-                await game_manager.broadcast_game(updated_game)
+                await save_game(game)
+                await game_manager.broadcast_move(game)
+
+    if game.mode == GameMode.AI and game.finished_at:
+        ai_service.release(str(game.id))
 
 
 @sio.event
@@ -303,44 +394,26 @@ async def start_matching(
     sid: str, player_username: str, player_name: str, session_id: str
 ) -> None:
     try:
-        # Try to find a match
-        game = await matchmaker.add_to_queue(
-            player_username, player_name, session_id
-        )
-        if not game:
-            logger.error("Failed to create or join game")
-            return None
-
-        game_data = game.model_dump_json()
-
-        # Join the socket room for this game
-        await join_game_room(sid, str(game.id), "online")
-
-        if game.player_2_username:
-            # Match found - notify both players
+        if not await session_manager.validate_session(
+            session_id, player_username
+        ):
             await sio.emit(
-                "match_found",
-                {
-                    "game": game_data,
-                    "message": "Match found! Game starting...",
-                },
-                room=str(game.id),
-            )
-        else:
-            # First player waiting - notify status
-            await sio.emit(
-                "matching_status",
-                {
-                    "game": game_data,
-                    "status": "waiting",
-                    "message": "Searching for opponent...",
-                },
-                room=sid,
+                "matching_error", {"message": "Invalid session"}, room=sid
             )
+            return None
+
+        # The matcher pairs players in the background and sends match_found
+        await matchmaker.enqueue(player_username, player_name, sid)
+        await sio.emit(
+            "matching_status",
+            {"status": "waiting", "message": "Searching for opponent..."},
+            room=sid,
+        )
 
-        # Store the game ID with the socket for cleanup
+        # Remember the player so the queue entry can be cleaned up
+        session = await sio.get_session(sid)
         await sio.save_session(
-            sid, {"matching_player": player_username, "game_id": str(game.id)}
+            sid, {**session, "matching_player": player_username}
         )
 
     except Exception as e:
@@ -511,24 +584,10 @@ async def presence_update(sid: str, data: dict[str, Any]) -> None:
             return
 
         game_id = str(game_id)
-        # Update current player's status
-        previous_status = await presence_manager.get_player_status(
-            game_id, username
+        # Update current player's status and countdown
+        current_countdown = await presence_manager.update_player_presence(
+            game_id, username, status
         )
-        await presence_manager.set_player_status(game_id, username, status)
-
-        # Get current player's countdown
-        current_countdown = None
-        if status == "offline" and previous_status != "offline":
-            await presence_manager.start_countdown(game_id, username)
-            current_countdown = presence_manager.PLAYER_TIMEOUT
-        elif status == "online" and previous_status == "offline":
-            await presence_manager.stop_countdown(game_id, username)
-            current_countdown = None
-        else:
-            current_countdown = await presence_manager.get_countdown_ttl(
-                game_id, username
-            )
 
         # Get opponent's status and countdown
         (
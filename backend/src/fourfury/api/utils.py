@@ -1,12 +1,8 @@
 from datetime import datetime, timezone
 
+from .. import bitboard
 from ..constants import M, N, PlayerEnum
-from ..core import (
-    calculate_row_by_col,
-    detect_winner,
-    is_valid_move,
-    mark_winner,
-)
+from ..core import calculate_row_by_col, detect_winner_at, is_valid_move
 from ..session import session_manager
 from .exceptions import (
     CustomError,
@@ -29,9 +25,10 @@ def make_move(game: Game, column: int) -> None:
     game.board[row][column] = move_value
     game.move_number += 1
 
-    winner = detect_winner(game.board)
+    winner = detect_winner_at(game.board, row, column)
     if winner:
-        mark_winner(game.board, winner)
+        player_1, player_2 = bitboard.to_bitboard(game.board)
+        bitboard.mark_winner(game.board, player_1, player_2, winner)
         game.winner = PlayerEnum(winner)
         game.finished_at = datetime.now(timezone.utc)
     elif game.move_number == N * M + 1:
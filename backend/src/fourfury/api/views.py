@@ -17,6 +17,7 @@ from .crud import (
     join_new_game,
     start_new_game,
 )
+from .dependencies import CurrentSession
 from .fields import PyObjectId
 from .models import Game, GameMode, StartGame
 from .socketio_manager import game_manager
@@ -87,20 +88,10 @@ async def create_session(
     },
 )
 async def start_game(
-    request: Request,
+    session: CurrentSession,
     start_game: StartGame,
 ) -> Game | None:
-    session_id = request.cookies.get("session_id")
-    username = request.cookies.get("username")
-
-    if (
-        not session_id
-        or not username
-        or not await session_manager.validate_session(session_id, username)
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session"
-        )
+    username = session.username
 
     if start_game.mode == GameMode.ONLINE:
         raise HTTPException(
@@ -108,12 +99,12 @@ async def start_game(
             detail="Online mode is not available through this endpoint",
         )
 
+    # CurrentSession validated the session, start_new_game need not again
     game = await start_new_game(
         username,  # Use username from cookie
         start_game.player_name,
         start_game.mode,
         start_game.ai_difficulty if start_game.mode == GameMode.AI else None,
-        session_id,
     )
     if game is None:
         raise HTTPException(
@@ -138,18 +129,7 @@ async def start_game(
         401: {"description": "Invalid session"},
     },
 )
-async def get_games(request: Request) -> list[Game]:
-    session_id = request.cookies.get("session_id")
-    username = request.cookies.get("username")
-
-    if (
-        not session_id
-        or not username
-        or not await session_manager.validate_session(session_id, username)
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session"
-        )
+async def get_games(session: CurrentSession) -> list[Game]:
     return await get_all_games()
 
 
@@ -169,20 +149,10 @@ async def get_games(request: Request) -> list[Game]:
     },
 )
 async def get_game(
-    request: Request,
+    session: CurrentSession,
     game_id: PyObjectId,
 ) -> Game:
-    session_id = request.cookies.get("session_id")
-    username = request.cookies.get("username")
-
-    if (
-        not session_id
-        or not username
-        or not await session_manager.validate_session(session_id, username)
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session"
-        )
+    username = session.username
     game = await get_game_by_id(game_id)
     if game is None:
         raise HTTPException(
@@ -238,7 +208,7 @@ async def delete_games() -> dict[str, int]:
     },
 )
 async def join_game(
-    request: Request,
+    session: CurrentSession,
     game_id: PyObjectId,
     player_name: str = Body(
         ...,
@@ -247,17 +217,7 @@ async def join_game(
         example="Player 2",
     ),
 ) -> Game:
-    session_id = request.cookies.get("session_id")
-    username = request.cookies.get("username")
-
-    if (
-        not session_id
-        or not username
-        or not await session_manager.validate_session(session_id, username)
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session"
-        )
+    username = session.username
 
     game = await get_game_by_id(game_id)
     if game is None:
@@ -0,0 +1,186 @@
+"""
+Bitboard representation of a Connect Four position.
+
+Each player's pieces are stored in a single integer. The board is laid out
+column by column, with ``N + 1`` bits per column (``N`` playable cells plus
+one always-empty sentinel bit on top that stops shifts from wrapping into the
+next column)::
+
+     6 13 20 27 34 41 48   <- sentinel row
+     5 12 19 26 33 40 47   <- row 0 (top)
+     4 11 18 25 32 39 46
+     3 10 17 24 31 38 45
+     2  9 16 23 30 37 44
+     1  8 15 22 29 36 43
+     0  7 14 21 28 35 42   <- row N - 1 (bottom)
+
+Four-in-a-row is then detected with a handful of shift-and-mask operations
+instead of scanning every cell of the nested-list board.
+"""
+
+from .constants import TARGET, M, N, PlayerEnum
+
+HEIGHT = N + 1
+BOTTOM_MASK = sum(1 << (col * HEIGHT) for col in range(M))
+BOARD_MASK = BOTTOM_MASK * ((1 << N) - 1)
+
+# Bit offsets between neighbouring cells of a line, one per
+# ``core.DIRECTIONS`` entry.
+VERTICAL = 1
+HORIZONTAL = HEIGHT
+DIAGONAL_LEFT_DOWN = HEIGHT + 1
+DIAGONAL_RIGHT_DOWN = HEIGHT - 1
+SHIFTS = (VERTICAL, HORIZONTAL, DIAGONAL_LEFT_DOWN, DIAGONAL_RIGHT_DOWN)
+
+
+def cell_bit(row: int, column: int) -> int:
+    """Return the single-bit mask of a ``(row, column)`` board cell."""
+    return 1 << (column * HEIGHT + N - 1 - row)
+
+
+def bit_cell(index: int) -> tuple[int, int]:
+    """Return the ``(row, column)`` of a bit index."""
+    column, offset = divmod(index, HEIGHT)
+    return N - 1 - offset, column
+
+
+def to_bitboard(board: list[list[PlayerEnum]]) -> tuple[int, int]:
+    """Convert a nested-list board into ``(player_1, player_2)`` bitboards.
+
+    Cells marked as ``PlayerEnum.WINNER`` are not owned by either player and
+    are left out of both bitboards.
+    """
+    player_1 = player_2 = 0
+    for row in range(N):
+        for column in range(M):
+            cell = board[row][column]
+            if cell == PlayerEnum.PLAYER_1:
+                player_1 |= cell_bit(row, column)
+            elif cell == PlayerEnum.PLAYER_2:
+                player_2 |= cell_bit(row, column)
+    return player_1, player_2
+
+
+def from_bitboard(player_1: int, player_2: int) -> list[list[PlayerEnum]]:
+    """Convert ``(player_1, player_2)`` bitboards into a nested-list board."""
+    board = []
+    for row in range(N):
+        cells = []
+        for column in range(M):
+            bit = cell_bit(row, column)
+            if player_1 & bit:
+                cells.append(PlayerEnum.PLAYER_1)
+            elif player_2 & bit:
+                cells.append(PlayerEnum.PLAYER_2)
+            else:
+                cells.append(PlayerEnum.EMPTY)
+        board.append(cells)
+    return board
+
+
+def is_valid_move(
+    player_1: int, player_2: int, row: int | None, column: int | None
+) -> bool:
+    if row is None or column is None:
+        return False
+    if row < 0 or row >= N or column < 0 or column >= M:
+        return False
+
+    mask = player_1 | player_2
+    bit = cell_bit(row, column)
+    if mask & bit:
+        return False
+
+    return row == N - 1 or bool(mask & (bit >> 1))
+
+
+def calculate_row_by_col(
+    player_1: int, player_2: int, column: int
+) -> int | None:
+    if column < 0 or column >= M:
+        return None
+
+    # The lowest empty cell of a column is its lowest zero bit.
+    column_bits = (player_1 | player_2) >> (column * HEIGHT)
+    height = ((column_bits + 1) & ~column_bits).bit_length() - 1
+    if height >= N:
+        return None
+    return N - 1 - height
+
+
+def _line_ends(bits: int, shift: int) -> int:
+    """Return the lowest bit of every run of ``TARGET`` pieces."""
+    pairs = bits & (bits >> shift)
+    return pairs & (pairs >> (2 * shift))
+
+
+def has_won(bits: int) -> bool:
+    """Whether a single player's bitboard contains four in a row."""
+    for shift in SHIFTS:
+        if _line_ends(bits, shift):
+            return True
+    return False
+
+
+def winning_cells(bits: int) -> int:
+    """Return a mask of every cell belonging to a line of four or more."""
+    cells = 0
+    for shift in SHIFTS:
+        ends = _line_ends(bits, shift)
+        for i in range(TARGET):
+            cells |= ends << (i * shift)
+    return cells
+
+
+def _first_line_start(bits: int) -> int:
+    """Return the row-major index of the first cell that starts a line.
+
+    ``core.detect_winner`` scans the board row by row and reports the first
+    cell that starts a line in one of the ``core.DIRECTIONS``; this mirrors
+    that ordering so both implementations agree even on boards where both
+    players have four in a row.
+    """
+    starts = (
+        (_line_ends(bits, VERTICAL) << (VERTICAL * (TARGET - 1)))
+        | _line_ends(bits, HORIZONTAL)
+        | (
+            _line_ends(bits, DIAGONAL_LEFT_DOWN)
+            << (DIAGONAL_LEFT_DOWN * (TARGET - 1))
+        )
+        | _line_ends(bits, DIAGONAL_RIGHT_DOWN)
+    )
+    first = N * M
+    while starts:
+        low = starts & -starts
+        row, column = bit_cell(low.bit_length() - 1)
+        first = min(first, row * M + column)
+        starts ^= low
+    return first
+
+
+def detect_winner(player_1: int, player_2: int) -> int | None:
+    player_1_won = has_won(player_1)
+    player_2_won = has_won(player_2)
+    if player_1_won and player_2_won:
+        if _first_line_start(player_2) < _first_line_start(player_1):
+            return PlayerEnum.PLAYER_2
+        return PlayerEnum.PLAYER_1
+    if player_1_won:
+        return PlayerEnum.PLAYER_1
+    if player_2_won:
+        return PlayerEnum.PLAYER_2
+    return None
+
+
+def mark_winner(
+    board: list[list[PlayerEnum]], player_1: int, player_2: int, winner: int
+) -> None:
+    """Mark the winner's lines on ``board`` as ``PlayerEnum.WINNER``."""
+    cells = winning_cells(
+        player_1 if winner == PlayerEnum.PLAYER_1 else player_2
+    )
+    while cells:
+        low = cells & -cells
+        row, column = bit_cell(low.bit_length() - 1)
+        board[row][column] = PlayerEnum.WINNER
+        cells ^= low
@@ -1,10 +1,17 @@
+import asyncio
+import copy
 import json
 import logging
+import math
+import time
+import uuid
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Callable, Optional
+from typing import Any, Awaitable, Callable, Optional
 
 import redis.asyncio as redis
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 
 from .settings import settings
 
@@ -18,6 +25,14 @@ redis_client = redis.Redis(
 )
 
 
+def redis_url() -> str:
+    """URL of the Redis database set by the REDIS_* settings."""
+    return (
+        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}"
+        f"/{settings.REDIS_DB}"
+    )
+
+
 def cache_key(prefix: str, *args: Any, **kwargs: Any) -> str:
     """Generate a cache key from the function arguments"""
     key_parts = [str(arg) for arg in args]
@@ -25,43 +40,469 @@ def cache_key(prefix: str, *args: Any, **kwargs: Any) -> str:
     return f"{prefix}:{':'.join(key_parts)}"
 
 
+# Keys cached under each prefix are tracked in a sorted set scored by when
+# they expire, so a whole prefix can be invalidated without scanning the
+# keyspace. Every write prunes the keys that have expired since.
+TAGS_PREFIX = "cache:tags"
+
+# Local caches of other processes drop the keys announced on this channel.
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Identifies this process on the invalidation channel.
+INSTANCE_ID = uuid.uuid4().hex
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL.
+
+    It sits in front of Redis for hot keys. Entries are dropped when they
+    expire, when the cache is full (least recently used first) and when any
+    process invalidates their key, see ``CacheInvalidationListener``.
+    A ``max_size`` of 0 disables the cache.
+
+    Values read from a slower tier are cached with ``start_fill`` and
+    ``end_fill``, so a read that raced with a write of the same key cannot
+    replace the written value with the older one it read.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # Token of the fill in progress per key, dropped by any write.
+        self._fills: dict[str, object] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or ``_MISSING``"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        self._fills.pop(key, None)
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._fills.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._entries if k.startswith(f"{prefix}:")]:
+            del self._entries[key]
+        for key in [k for k in self._fills if k.startswith(f"{prefix}:")]:
+            del self._fills[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._fills.clear()
+
+    def start_fill(self, key: str) -> object:
+        """Start reading ``key`` from a slower tier, see ``end_fill``"""
+        token = object()
+        self._fills[key] = token
+        return token
+
+    def is_filling(self, key: str, token: object) -> bool:
+        """Whether ``key`` was not written since ``start_fill``"""
+        return self._fills.get(key) is token
+
+    def end_fill(self, key: str, token: object, value: Any = _MISSING) -> None:
+        """
+        Cache ``value`` read for ``key`` since ``start_fill`` returned
+        ``token``, unless the key was written or invalidated meanwhile: the
+        value may then be older than what was written.
+        """
+        if not self.is_filling(key, token):
+            return
+        del self._fills[key]
+        if value is not _MISSING:
+            self.set(key, value)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+local_cache = LocalCache(settings.CACHE_LOCAL_SIZE, settings.CACHE_LOCAL_TTL)
+
+
+def tag_key(prefix: str) -> str:
+    """Key of the sorted set tracking the cache keys stored under ``prefix``"""
+    return f"{TAGS_PREFIX}:{prefix}"
+
+
+# Loads in progress in this process, by cache key.
+_in_flight: dict[str, asyncio.Task[Any]] = {}
+
+# Cross-process lock taken while one worker loads a missing key.
+LOCK_PREFIX = "cache:lock"
+LOCK_TIMEOUT = 5.0  # seconds
+LOCK_POLL_INTERVAL = 0.05  # seconds
+
+# Release a lock only if it still holds our token.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+async def single_flight(
+    key: str,
+    load: Callable[[], Awaitable[Any]],
+    copy_fn: Callable[[Any], Any] = copy.deepcopy,
+) -> Any:
+    """
+    Run ``load`` once for all concurrent callers asking for ``key``.
+
+    The first caller starts the load and gets its result; callers that
+    arrive while it runs wait for the same load and get copies made with
+    ``copy_fn``. The load runs as its own task, so a caller that is
+    cancelled does not cancel it for the others.
+    """
+    task = _in_flight.get(key)
+    if task is not None:
+        result = await asyncio.shield(task)
+        return copy_fn(result) if result is not None else None
+
+    task = asyncio.ensure_future(load())
+    _in_flight[key] = task
+
+    def done(task: asyncio.Task[Any]) -> None:
+        _in_flight.pop(key, None)
+        # Mark a failure as seen even if every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    task.add_done_callback(done)
+    return await asyncio.shield(task)
+
+
+async def _load_with_lock(
+    key: str,
+    load: Callable[[], Awaitable[Any]],
+    deserialize_fn: Callable[[str], Any],
+) -> Any:
+    """
+    Let one process load a missing key while the others wait for it.
+
+    Processes that do not get the lock poll the cache until the value
+    shows up. The lock holder writes its value back with ``cache_fill``, so
+    it never overwrites a newer one written while it was loading. They load it themselves if the lock is released without a
+    value or is held for longer than ``LOCK_TIMEOUT``.
+    """
+    lock_key = f"{LOCK_PREFIX}:{key}"
+    token = uuid.uuid4().hex
+    if await redis_client.set(
+        lock_key, token, nx=True, px=int(LOCK_TIMEOUT * 1000)
+    ):
+        try:
+            return await load()
+        finally:
+            await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.exists(lock_key)
+            cached, locked = await pipe.execute()
+        if cached:
+            return deserialize_fn(cached)
+        if not locked:
+            break
+    return await load()
+
+
 def redis_cache(
     prefix: str,
     expire: int = 3600,
     serialize_fn: Callable = json.dumps,
     deserialize_fn: Callable = json.loads,
+    local: bool = False,
+    copy_fn: Callable[[Any], Any] = copy.deepcopy,
+    lock: bool = False,
 ):
-    """Decorator to cache function results in Redis"""
+    """
+    Decorator to cache function results in Redis
+
+    With ``local`` set, results are also kept in ``local_cache``. Callers
+    may change what they get back, so the local tier stores and returns
+    copies made with ``copy_fn``.
+
+    Concurrent misses for the same key in one process share a single
+    load, see ``single_flight``. With ``lock`` set, a Redis lock extends
+    this across processes so only one of them runs the function. A load
+    that raced with a write of its key in this process caches nothing, as
+    what it read may be older than what was written.
+    """
 
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any):
             key = cache_key(prefix, *args, **kwargs)
 
-            # Try to get from cache first
-            cached = await redis_client.get(key)
-            if cached:
-                return deserialize_fn(cached)
+            use_local = local and local_cache.enabled
+            if use_local:
+                value = local_cache.get(key)
+                if value is not _MISSING:
+                    return copy_fn(value)
+
+            async def run(token: object) -> Any:
+                # If not in cache, execute function
+                result = await func(*args, **kwargs)
+
+                # Cache the result
+                if result is not None and local_cache.is_filling(key, token):
+                    await cache_fill(prefix, key, serialize_fn(result), expire)
+                return result
+
+            async def fetch() -> Any:
+                token = local_cache.start_fill(key)
+                result = None
+                try:
+                    # Try to get from cache first
+                    cached = await redis_client.get(key)
+                    if cached:
+                        result = deserialize_fn(cached)
+                    elif lock:
+                        result = await _load_with_lock(
+                            key, lambda: run(token), deserialize_fn
+                        )
+                    else:
+                        result = await run(token)
+                finally:
+                    if use_local and result is not None:
+                        local_cache.end_fill(key, token, copy_fn(result))
+                    else:
+                        local_cache.end_fill(key, token)
+                return result
+
+            return await single_flight(key, fetch, copy_fn)
 
-            # If not in cache, execute function
-            result = await func(*args, **kwargs)
+        return wrapper
 
-            # Cache the result
-            if result is not None:
-                await redis_client.setex(key, expire, serialize_fn(result))
+    return decorator
 
-            return result
 
-        return wrapper
+def invalidation_message(
+    keys: tuple[str, ...] = (), prefix: str | None = None
+) -> str:
+    return json.dumps({"origin": INSTANCE_ID, "keys": keys, "prefix": prefix})
 
-    return decorator
+
+def _track(pipe: Pipeline, prefix: str, key: str, expire: int) -> None:
+    """Track ``key`` in the prefix's tag set and prune the expired ones"""
+    tags = tag_key(prefix)
+    now = time.time()
+    pipe.zadd(tags, {key: now + expire})
+    pipe.zremrangebyscore(tags, "-inf", now)
+    pipe.expire(tags, expire)
 
 
-async def invalidate_cache(pattern: str) -> None:
-    """Invalidate all cache keys matching the pattern"""
-    keys = await redis_client.keys(f"{pattern}*")
-    if keys:
-        await redis_client.delete(*keys)
+async def cache_set(prefix: str, key: str, value: str, expire: int) -> None:
+    """Cache ``value`` under ``key`` and track it in the prefix's tag set"""
+    local_cache.delete(key)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.setex(key, expire, value)
+        _track(pipe, prefix, key, expire)
+        if local_cache.enabled:
+            pipe.publish(INVALIDATION_CHANNEL, invalidation_message((key,)))
+        await pipe.execute()
+
+
+async def cache_fill(prefix: str, key: str, value: str, expire: int) -> None:
+    """
+    Cache ``value`` just loaded for ``key``, unless the key is cached
+    already.
+
+    Whatever is cached was written since the load started or loaded after
+    it, so it is at least as new. Unlike ``cache_set`` this leaves local
+    caches alone: the loader fills its own, and the others hold nothing
+    newer than what was loaded.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.set(key, value, ex=expire, nx=True)
+        _track(pipe, prefix, key, expire)
+        await pipe.execute()
+
+
+async def invalidate_keys(*keys: str) -> None:
+    """
+    Invalidate exact cache keys in one round trip.
+
+    Keys must come from ``cache_key``, whose first part names the prefix
+    they are tracked under.
+    """
+    if not keys:
+        return
+    local_cache.delete(*keys)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(*keys)
+        for key in keys:
+            pipe.zrem(tag_key(key.split(":", 1)[0]), key)
+        if local_cache.enabled:
+            pipe.publish(INVALIDATION_CHANNEL, invalidation_message(keys))
+        await pipe.execute()
+
+
+async def invalidate_cache(prefix: str) -> None:
+    """Invalidate all cache keys stored under the prefix"""
+    tags = tag_key(prefix)
+    local_cache.delete_prefix(prefix)
+    keys = await redis_client.zrangebyscore(tags, time.time(), "+inf")
+    await redis_client.delete(*keys, tags)
+    if local_cache.enabled:
+        await redis_client.publish(
+            INVALIDATION_CHANNEL, invalidation_message(prefix=prefix)
+        )
+
+
+class CacheInvalidationListener:
+    """
+    Keeps a local cache coherent with the other processes.
+
+    Every process announces the keys it changes on the cache's channel,
+    ``INVALIDATION_CHANNEL`` for ``local_cache``; this listener drops them
+    from the local cache. Messages missed while
+    the connection was down cannot be replayed, so the whole local cache is
+    cleared whenever the listener (re)subscribes.
+    """
+
+    RETRY_DELAY = 1.0  # seconds
+
+    def __init__(self, cache: LocalCache, channel: str = INVALIDATION_CHANNEL):
+        self._cache = cache
+        self.channel = channel
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._cache.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def handle(self, data: str) -> None:
+        message = json.loads(data)
+        if message["origin"] == INSTANCE_ID:
+            return
+        if message["prefix"] is not None:
+            self._cache.delete_prefix(message["prefix"])
+        self._cache.delete(*message["keys"])
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self._cache.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.handle(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logg.error(f"Cache invalidation listener error: {e}")
+                self._cache.clear()
+                await asyncio.sleep(self.RETRY_DELAY)
+
+
+cache_invalidation_listener = CacheInvalidationListener(local_cache)
+
+
+# Presence is stored per game: one hash with every player's status and the
+# time it was last reported, and one sorted set of the countdown deadlines
+# of all games. KEYS[1] is the game's hash, KEYS[2] the countdowns;
+# ARGV[1] is the username, ARGV[2] the countdown member, ARGV[3] the time.
+
+# Set a player's status and start their countdown when they go offline, or
+# stop it when they come back online. Returns the countdown's remaining
+# seconds, 0 if there is none, or nil if it was stopped.
+UPDATE_PRESENCE_SCRIPT = """
+local status_field = "status:" .. ARGV[1]
+local previous = redis.call("HGET", KEYS[1], status_field)
+redis.call("HSET", KEYS[1], status_field, ARGV[4], "seen:" .. ARGV[1], ARGV[3])
+redis.call("EXPIRE", KEYS[1], ARGV[5])
+if ARGV[4] == "offline" and previous ~= "offline" then
+    redis.call("ZADD", KEYS[2], ARGV[3] + ARGV[6], ARGV[2])
+    return tonumber(ARGV[6])
+end
+if ARGV[4] == "online" and previous == "offline" then
+    redis.call("ZREM", KEYS[2], ARGV[2])
+    return false
+end
+local deadline = redis.call("ZSCORE", KEYS[2], ARGV[2])
+if not deadline then
+    return 0
+end
+return math.max(math.ceil(deadline - ARGV[3]), 0)
+"""
+
+# Lease up to ARGV[2] countdowns whose deadline is at or before ARGV[1] by
+# moving their deadline to ARGV[3], so each one is handled by a single
+# worker, and by another one if it is not completed by then.
+CLAIM_COUNTDOWNS_SCRIPT = """
+local due = redis.call(
+    "ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2]
+)
+for _, member in ipairs(due) do
+    redis.call("ZADD", KEYS[1], ARGV[3], member)
+end
+return due
+"""
+
+# Remove the countdowns in ARGV[2..] still leased until ARGV[1]; one that
+# was stopped or restarted since it was claimed is left alone.
+COMPLETE_COUNTDOWNS_SCRIPT = """
+local removed = 0
+for i = 2, #ARGV do
+    local deadline = redis.call("ZSCORE", KEYS[1], ARGV[i])
+    if deadline and tonumber(deadline) == tonumber(ARGV[1]) then
+        removed = removed + redis.call("ZREM", KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
 
 
 # Initialize presence manager
@@ -69,12 +510,19 @@ class PresenceManager:
     """
     Manages player presence and disconnection tracking for multiplayer games
     using Redis as a distributed state management system.
+
+    Each game has one hash holding the status of its players and when they
+    last reported it, which expires once nobody has reported anything for
+    ``PRESENCE_EXPIRY`` seconds. Disconnect countdowns are deadlines in one
+    sorted set, see ``claim_expired_countdowns``.
     """
 
     # Configuration constants
     PLAYER_TIMEOUT = 35  # seconds
+    CLAIM_LEASE = 30  # seconds a claimed countdown has to be completed
+    PRESENCE_EXPIRY = 300  # seconds
     PRESENCE_PREFIX = "game:presence"
-    COUNTDOWN_PREFIX = "game:countdown"
+    COUNTDOWNS_KEY = "game:countdowns"
 
     def __init__(
         self, redis_client: Redis, logger: Optional[logging.Logger] = None
@@ -89,19 +537,30 @@ class PresenceManager:
         self._redis = redis_client
         self._logger = logger or logging.getLogger(__name__)
 
-    def _generate_key(self, prefix: str, game_id: str, username: str) -> str:
+    def _presence_key(self, game_id: str) -> str:
         """
-        Generate a consistent Redis key with standardized format.
+        Key of the hash holding the presence of a game's players.
 
         Args:
-            prefix (str): Key prefix (presence or countdown)
             game_id (str): Unique game session identifier
-            username (str): Player username
 
         Returns:
             str: Formatted Redis key
         """
-        return f"{prefix}:{game_id}:{username}"
+        return f"{self.PRESENCE_PREFIX}:{game_id}"
+
+    def _countdown_member(self, game_id: str, username: str) -> str:
+        """
+        Member of a player's countdown in ``COUNTDOWNS_KEY``.
+
+        Args:
+            game_id (str): Unique game session identifier
+            username (str): Player username
+
+        Returns:
+            str: ``{game_id}:{username}``, game ids never contain ":"
+        """
+        return f"{game_id}:{username}"
 
     async def set_player_status(
         self, game_id: str, username: str, status: str
@@ -118,8 +577,17 @@ class PresenceManager:
             bool: Whether status was successfully set
         """
         try:
-            key = self._generate_key(self.PRESENCE_PREFIX, game_id, username)
-            await self._redis.set(key, status, ex=300)
+            key = self._presence_key(game_id)
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    key,
+                    mapping={
+                        f"status:{username}": status,
+                        f"seen:{username}": time.time(),
+                    },
+                )
+                pipe.expire(key, self.PRESENCE_EXPIRY)
+                await pipe.execute()
             return True
         except Exception as e:
             self._logger.error(
@@ -142,8 +610,9 @@ class PresenceManager:
             Optional[str]: Player status or None if not found
         """
         try:
-            key = self._generate_key(self.PRESENCE_PREFIX, game_id, username)
-            return await self._redis.get(key)
+            return await self._redis.hget(  # type: ignore
+                self._presence_key(game_id), f"status:{username}"
+            )
         except Exception as e:
             self._logger.warning(
                 f"Error retrieving player status: game={game_id}, "
@@ -151,6 +620,31 @@ class PresenceManager:
             )
             return None
 
+    async def get_last_seen(
+        self, game_id: str, username: str
+    ) -> Optional[float]:
+        """
+        Retrieve when the player last reported their status.
+
+        Args:
+            game_id (str): Unique game session identifier
+            username (str): Player username
+
+        Returns:
+            Optional[float]: Unix timestamp or None if not found
+        """
+        try:
+            seen = await self._redis.hget(
+                self._presence_key(game_id), f"seen:{username}"
+            )
+            return float(seen) if seen is not None else None
+        except Exception as e:
+            self._logger.warning(
+                f"Error retrieving last seen: game={game_id}, "
+                f"username={username}, error={e}"
+            )
+            return None
+
     async def del_player_status(self, game_id: str, username: str) -> bool:
         """
         Delete player status from Redis.
@@ -163,8 +657,11 @@ class PresenceManager:
             bool: Whether status was successfully deleted
         """
         try:
-            key = self._generate_key(self.PRESENCE_PREFIX, game_id, username)
-            deleted_count = await self._redis.delete(key)
+            deleted_count = await self._redis.hdel(
+                self._presence_key(game_id),
+                f"status:{username}",
+                f"seen:{username}",
+            )
             return deleted_count > 0
         except Exception as e:
             self._logger.error(
@@ -185,8 +682,13 @@ class PresenceManager:
             bool: Whether countdown was successfully started
         """
         try:
-            key = self._generate_key(self.COUNTDOWN_PREFIX, game_id, username)
-            await self._redis.setex(key, self.PLAYER_TIMEOUT, "disconnected")
+            await self._redis.zadd(
+                self.COUNTDOWNS_KEY,
+                {
+                    self._countdown_member(game_id, username): time.time()
+                    + self.PLAYER_TIMEOUT
+                },
+            )
             return True
         except Exception as e:
             self._logger.error(
@@ -207,8 +709,9 @@ class PresenceManager:
             bool: Whether countdown was successfully stopped
         """
         try:
-            key = self._generate_key(self.COUNTDOWN_PREFIX, game_id, username)
-            deleted_count = await self._redis.delete(key)
+            deleted_count = await self._redis.zrem(
+                self.COUNTDOWNS_KEY, self._countdown_member(game_id, username)
+            )
             return deleted_count > 0
         except Exception as e:
             self._logger.error(
@@ -221,6 +724,9 @@ class PresenceManager:
         """
         Check if disconnection countdown is currently active.
 
+        A countdown past its deadline stays active until it is handled,
+        see ``claim_expired_countdowns``.
+
         Args:
             game_id (str): Unique game session identifier
             username (str): Player username
@@ -229,8 +735,10 @@ class PresenceManager:
             bool: Whether countdown is active
         """
         try:
-            key = self._generate_key(self.COUNTDOWN_PREFIX, game_id, username)
-            return await self._redis.exists(key) == 1
+            deadline = await self._redis.zscore(
+                self.COUNTDOWNS_KEY, self._countdown_member(game_id, username)
+            )
+            return deadline is not None
         except Exception as e:
             self._logger.warning(
                 f"Error checking countdown status: game={game_id}, "
@@ -238,6 +746,12 @@ class PresenceManager:
             )
             return False
 
+    @staticmethod
+    def _remaining(deadline: Optional[float], now: float) -> int:
+        if deadline is None:
+            return 0
+        return max(math.ceil(deadline - now), 0)  # Ensure non-negative
+
     async def get_countdown_ttl(self, game_id: str, username: str) -> int:
         """
         Retrieve remaining time for disconnection countdown.
@@ -250,9 +764,10 @@ class PresenceManager:
             int: Remaining countdown time in seconds
         """
         try:
-            key = self._generate_key(self.COUNTDOWN_PREFIX, game_id, username)
-            ttl = await self._redis.ttl(key)
-            return max(ttl, 0)  # Ensure non-negative duration
+            deadline = await self._redis.zscore(
+                self.COUNTDOWNS_KEY, self._countdown_member(game_id, username)
+            )
+            return self._remaining(deadline, time.time())
         except Exception as e:
             self._logger.warning(
                 f"Error retrieving countdown TTL: game={game_id}, "
@@ -260,12 +775,89 @@ class PresenceManager:
             )
             return 0
 
+    async def update_player_presence(
+        self, game_id: str, username: str, status: str
+    ) -> Optional[int]:
+        """
+        Set player's status and manage their countdown in one atomic call.
+
+        Going offline starts the countdown, coming back online stops it.
+
+        Args:
+            game_id (str): Unique game session identifier
+            username (str): Player username
+            status (str): Current player status
+
+        Returns:
+            Optional[int]: Remaining countdown time in seconds, None if the
+            countdown was stopped or the update failed
+        """
+        try:
+            return await self._redis.eval(  # type: ignore
+                UPDATE_PRESENCE_SCRIPT,
+                2,
+                self._presence_key(game_id),
+                self.COUNTDOWNS_KEY,
+                username,
+                self._countdown_member(game_id, username),
+                time.time(),
+                status,
+                self.PRESENCE_EXPIRY,
+                self.PLAYER_TIMEOUT,
+            )
+        except Exception as e:
+            self._logger.error(
+                f"Failed to update player presence: game={game_id}, "
+                f"username={username}, error={e}"
+            )
+            return None
+
+    async def get_game_presence_snapshot(
+        self, game_id: str, *usernames: str
+    ) -> dict[str, tuple[Optional[str], int]]:
+        """
+        Retrieve status and countdown of several players in one round trip.
+
+        Args:
+            game_id (str): Unique game session identifier
+            usernames (str): Player usernames
+
+        Returns:
+            dict[str, tuple[Optional[str], int]]: Status and remaining
+            countdown time in seconds of each player
+        """
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(
+                    self._presence_key(game_id),
+                    [f"status:{username}" for username in usernames],
+                )
+                for username in usernames:
+                    pipe.zscore(
+                        self.COUNTDOWNS_KEY,
+                        self._countdown_member(game_id, username),
+                    )
+                statuses, *deadlines = await pipe.execute()
+        except Exception as e:
+            self._logger.warning(
+                f"Error retrieving presence snapshot: game={game_id}, "
+                f"error={e}"
+            )
+            return {username: (None, 0) for username in usernames}
+        now = time.time()
+        return {
+            username: (status, self._remaining(deadline, now))
+            for username, status, deadline in zip(
+                usernames, statuses, deadlines
+            )
+        }
+
     async def get_opponent_status(
         self, game_id: str, username: str, game: Any = None
     ) -> tuple[Any, str | None, int | None]:
         """
         Get opponent's status and countdown.
-        Returns (status, countdown_ttl)
+        Returns (opponent_username, status, countdown_ttl)
         """
         try:
             if game:
@@ -274,18 +866,78 @@ class PresenceManager:
                     if username == game.player_1_username
                     else game.player_1_username
                 )
-                status = await self.get_player_status(
-                    game_id, opponent_username
-                )
-                countdown = await self.get_countdown_ttl(
+                snapshot = await self.get_game_presence_snapshot(
                     game_id, opponent_username
                 )
+                status, countdown = snapshot[opponent_username]
                 return opponent_username, status, countdown
             return None, None, None
         except Exception as e:
             self._logger.error(f"Error getting opponent status: {e}")
             return None, None, None
 
+    async def claim_expired_countdowns(
+        self, limit: int = 100
+    ) -> tuple[float, list[tuple[str, str]]]:
+        """
+        Lease countdowns past their deadline for ``CLAIM_LEASE`` seconds.
+
+        Each countdown is returned to exactly one caller, however many
+        workers call this at once. It stays in the sorted set until passed
+        to ``complete_countdowns``, and is claimed again once the lease
+        runs out, so a worker that fails or dies does not lose it.
+
+        Args:
+            limit (int): Most countdowns to claim
+
+        Returns:
+            tuple[float, list[tuple[str, str]]]: When the lease runs out,
+            and the game id and username of each countdown
+        """
+        now = time.time()
+        lease_until = now + self.CLAIM_LEASE
+        due = await self._redis.eval(
+            CLAIM_COUNTDOWNS_SCRIPT,
+            1,
+            self.COUNTDOWNS_KEY,
+            now,
+            limit,
+            lease_until,
+        )
+        claimed = []
+        for member in due:
+            game_id, username = member.split(":", 1)
+            claimed.append((game_id, username))
+        return lease_until, claimed
+
+    async def complete_countdowns(
+        self, lease_until: float, countdowns: list[tuple[str, str]]
+    ) -> int:
+        """
+        Remove claimed countdowns once they have been handled.
+
+        Args:
+            lease_until (float): Lease returned by the claim
+            countdowns (list[tuple[str, str]]): Game id and username of
+                each countdown
+
+        Returns:
+            int: Number of countdowns removed
+        """
+        if not countdowns:
+            return 0
+        removed = await self._redis.eval(
+            COMPLETE_COUNTDOWNS_SCRIPT,
+            1,
+            self.COUNTDOWNS_KEY,
+            lease_until,
+            *(
+                self._countdown_member(game_id, username)
+                for game_id, username in countdowns
+            ),
+        )
+        return int(removed)
+
     @classmethod
     def configure_timeout(cls, timeout: int) -> None:
         """
@@ -44,6 +44,10 @@ DIRECTIONS = [
     ),
 ]
 
+# (row, column) steps of the four lines a piece can be part of, matching
+# the ``DIRECTIONS`` above.
+LINES = ((1, 0), (0, 1), (1, -1), (1, 1))
+
 
 def init_board() -> list[list[PlayerEnum]]:
     return [[PlayerEnum.EMPTY for _ in range(M)] for _ in range(N)]
@@ -82,6 +86,33 @@ def detect_winner(board: list[list[PlayerEnum]]) -> int | None:
     return None
 
 
+def detect_winner_at(
+    board: list[list[PlayerEnum]], row: int, column: int
+) -> int | None:
+    """
+    Detect a win created by the piece at ``(row, column)``.
+
+    Only the four lines through that cell are checked, so this gives the same
+    result as ``detect_winner`` as long as the board had no winner before the
+    piece was dropped.
+    """
+    value = board[row][column]
+    if value == PlayerEnum.EMPTY:
+        return None
+
+    for row_step, col_step in LINES:
+        count = 1
+        for sign in (1, -1):
+            r, c = row + sign * row_step, column + sign * col_step
+            while 0 <= r < N and 0 <= c < M and board[r][c] == value:
+                count += 1
+                r += sign * row_step
+                c += sign * col_step
+        if count >= TARGET:
+            return value
+    return None
+
+
 def mark_winner(board: list[list[PlayerEnum]], winner: int) -> None:
     def find_winner_cells(row: int, col: int) -> None:
         for direction in DIRECTIONS:
@@ -4,6 +4,7 @@ from typing import Any, cast
 
 from fastapi import FastAPI
 from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
 
 from ..api.fields import PyObjectId
@@ -70,6 +71,26 @@ class MongoDBClient:
         data |= {"updated_at": datetime.now(timezone.utc)}
         return await collection.update_one({"_id": id}, {"$set": data})
 
+    async def update_and_get(
+        self,
+        model_cls: type[MongoDBModel],
+        id: PyObjectId,
+        data: dict[str, Any],
+    ) -> dict[str, Any] | None:
+        """Update a document and return it as stored, in one round trip."""
+        collection = await self.get_collection(model_cls)
+        data |= {"updated_at": datetime.now(timezone.utc)}
+        result = await collection.find_one_and_update(
+            {"_id": id},
+            {"$set": data},
+            return_document=ReturnDocument.AFTER,
+        )
+        if result is None:
+            return None
+
+        result = cast(dict[str, Any], result)
+        return result | {"id": result.pop("_id")}
+
     async def init_indexes(self, model_cls: type[MongoDBModel]) -> None:
         """Initialize indexes for the given model."""
         indexes = model_cls.get_indexes()
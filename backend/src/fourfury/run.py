@@ -4,11 +4,14 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .ai.service import ai_service
 from .api.models import Game
-from .api.socketio_manager import socket_app
+from .api.socketio_manager import countdown_scheduler, matcher, socket_app
 from .api.views import router as api_router
+from .cache import cache_invalidation_listener
 from .db.client import MongoDBClient
 from .db.utils import get_db_client
+from .session import session_invalidation_listener
 from .settings import settings
 
 
@@ -24,8 +27,27 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         mongodb_client = MongoDBClient()
         await mongodb_client.init_indexes(Game)
 
+        # Start the AI worker processes
+        ai_service.start()
+
+        # Keep the in-process cache coherent with the other workers
+        cache_invalidation_listener.start()
+        session_invalidation_listener.start()
+
+        # Forfeit players whose disconnect countdown expired
+        countdown_scheduler.start()
+
+        # Pair players waiting for an online game
+        matcher.start()
+
         yield
     finally:
+        await matcher.stop()
+        await countdown_scheduler.stop()
+        await session_invalidation_listener.stop()
+        await cache_invalidation_listener.stop()
+        ai_service.shutdown()
+
         # Close MongoDB connection
         app.state.mongo_db.client.close()
 
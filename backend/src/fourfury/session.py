@@ -3,12 +3,29 @@ import string
 import uuid
 from typing import Optional
 
-from .cache import redis_client
+from .cache import (
+    CacheInvalidationListener,
+    LocalCache,
+    invalidation_message,
+    redis_client,
+)
+from .settings import settings
 
 SESSION_KEY_PREFIX = "session:"
 USERNAME_KEY_PREFIX = "username:"
 SESSION_EXPIRY = 24 * 60 * 60  # 24 hours
 
+# Other processes drop the sessions announced on this channel from their
+# session cache.
+SESSION_INVALIDATION_CHANNEL = "session:invalidate"
+
+# Validated sessions, session key to username. Entries live for at most
+# SESSION_CACHE_TTL seconds, so a session that expires in Redis is still
+# accepted here for that long; deleted sessions are dropped at once.
+session_cache = LocalCache(
+    settings.SESSION_CACHE_SIZE, settings.SESSION_CACHE_TTL
+)
+
 
 def generate_session_id() -> str:
     return str(uuid.uuid4())
@@ -27,21 +44,88 @@ def generate_ai_username() -> str:
     return f"{random.choice(ai_names)}{number}"
 
 
+# Every multi-key session operation is a single round trip: a MULTI
+# pipeline when the keys are known up front, a script when the username
+# key has to be read from the session first. ARGV[1] is always the
+# username key prefix.
+
+# Refresh both keys of a session, if it exists and has less than ARGV[3]
+# seconds left. Returns 1 if it was refreshed, 0 if that was not needed.
+REFRESH_SCRIPT = """
+local username = redis.call("GET", KEYS[1])
+if not username then
+    return false
+end
+if redis.call("TTL", KEYS[1]) > tonumber(ARGV[3]) then
+    return 0
+end
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+redis.call("EXPIRE", ARGV[1] .. username, ARGV[2])
+return 1
+"""
+
+# Delete both keys of a session, if it exists, and publish ARGV[3] on
+# channel ARGV[2] unless it is empty.
+DELETE_SCRIPT = """
+local username = redis.call("GET", KEYS[1])
+if username then
+    redis.call("DEL", KEYS[1], ARGV[1] .. username)
+    if ARGV[3] ~= "" then
+        redis.call("PUBLISH", ARGV[2], ARGV[3])
+    end
+end
+return username
+"""
+
+# Refresh the session in KEYS[1] like REFRESH_SCRIPT (threshold ARGV[8]) if
+# it belongs to ARGV[2]. Otherwise delete it, publishing ARGV[7] on channel
+# ARGV[6] like DELETE_SCRIPT, and create the new session in KEYS[2]
+# (ARGV[3], the new session id, for username ARGV[4]). Returns 2 if the
+# session was valid and refreshed, 1 if valid, 0 if it was replaced.
+CREATE_OR_VALIDATE_SCRIPT = """
+local stored = redis.call("GET", KEYS[1])
+if stored and stored == ARGV[2] then
+    if redis.call("TTL", KEYS[1]) > tonumber(ARGV[8]) then
+        return 1
+    end
+    redis.call("EXPIRE", KEYS[1], ARGV[5])
+    redis.call("EXPIRE", ARGV[1] .. stored, ARGV[5])
+    return 2
+end
+if stored then
+    redis.call("DEL", KEYS[1], ARGV[1] .. stored)
+    if ARGV[7] ~= "" then
+        redis.call("PUBLISH", ARGV[6], ARGV[7])
+    end
+end
+redis.call("SET", KEYS[2], ARGV[4], "EX", ARGV[5])
+redis.call("SET", ARGV[1] .. ARGV[4], ARGV[3], "EX", ARGV[5])
+return 0
+"""
+
+
 class SessionManager:
     def __init__(self):
         self.redis = redis_client
+        self.cache = session_cache
+        # EXPIRE commands sent, and not sent because the session had enough
+        # time left
+        self.refresh_writes = 0
+        self.refresh_writes_avoided = 0
 
     async def create_session(self) -> tuple[str, str]:
         session_id = generate_session_id()
         username = generate_username()
 
         # Store session-username mapping
-        await self.redis.setex(
-            f"{SESSION_KEY_PREFIX}{session_id}", SESSION_EXPIRY, username
-        )
-        await self.redis.setex(
-            f"{USERNAME_KEY_PREFIX}{username}", SESSION_EXPIRY, session_id
-        )
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.setex(
+                f"{SESSION_KEY_PREFIX}{session_id}", SESSION_EXPIRY, username
+            )
+            pipe.setex(
+                f"{USERNAME_KEY_PREFIX}{username}", SESSION_EXPIRY, session_id
+            )
+            await pipe.execute()
 
         return session_id, username
 
@@ -52,41 +136,90 @@ class SessionManager:
         return await self.redis.get(f"{USERNAME_KEY_PREFIX}{username}")
 
     async def validate_session(self, session_id: str, username: str) -> bool:
+        key = f"{SESSION_KEY_PREFIX}{session_id}"
+        if self.cache.get(key) == username:
+            return True
         stored_username = await self.get_username(session_id)
-        return stored_username == username
+        if stored_username != username:
+            return False
+        self.cache.set(key, username)
+        return True
+
+    def _count_refresh(self, refreshed: bool) -> None:
+        # Each refresh extends both keys of the session
+        if refreshed:
+            self.refresh_writes += 2
+        else:
+            self.refresh_writes_avoided += 2
+
+    def refresh_stats(self) -> dict[str, int]:
+        return {
+            "refresh_writes": self.refresh_writes,
+            "refresh_writes_avoided": self.refresh_writes_avoided,
+        }
 
     async def refresh_session(self, session_id: str) -> None:
-        username = await self.get_username(session_id)
-        if username:
-            await self.redis.expire(
-                f"{SESSION_KEY_PREFIX}{session_id}", SESSION_EXPIRY
-            )
-            await self.redis.expire(
-                f"{USERNAME_KEY_PREFIX}{username}", SESSION_EXPIRY
-            )
+        refreshed = await self.redis.eval(
+            REFRESH_SCRIPT,
+            1,
+            f"{SESSION_KEY_PREFIX}{session_id}",
+            USERNAME_KEY_PREFIX,
+            SESSION_EXPIRY,
+            settings.SESSION_REFRESH_THRESHOLD,
+        )
+        if refreshed is not None:
+            self._count_refresh(refreshed == 1)
+
+    def _invalidation(self, key: str) -> str:
+        """
+        Drop the session from this process's cache and return the message
+        dropping it from the others', published by the scripts.
+        """
+        self.cache.delete(key)
+        return invalidation_message((key,)) if self.cache.enabled else ""
 
     async def delete_session(self, session_id: str) -> None:
-        username = await self.get_username(session_id)
-        if username:
-            await self.redis.delete(f"{SESSION_KEY_PREFIX}{session_id}")
-            await self.redis.delete(f"{USERNAME_KEY_PREFIX}{username}")
+        key = f"{SESSION_KEY_PREFIX}{session_id}"
+        await self.redis.eval(
+            DELETE_SCRIPT,
+            1,
+            key,
+            USERNAME_KEY_PREFIX,
+            SESSION_INVALIDATION_CHANNEL,
+            self._invalidation(key),
+        )
 
     async def create_or_validate_session(
         self, session_id: str | None = None, username: str | None = None
     ) -> tuple[str, str]:
-        # If no session provided or invalid session, create new one
-        if (
-            not session_id
-            or not username
-            or not await self.validate_session(session_id, username)
-        ):
-            if session_id:
-                await self.delete_session(session_id)
+        if not session_id:
             return await self.create_session()
 
-        # Valid session, refresh it
-        await self.refresh_session(session_id)
-        return session_id, username
+        # Refresh the session if it is valid, or replace it with a new one
+        key = f"{SESSION_KEY_PREFIX}{session_id}"
+        new_session_id = generate_session_id()
+        new_username = generate_username()
+        valid = await self.redis.eval(
+            CREATE_OR_VALIDATE_SCRIPT,
+            2,
+            key,
+            f"{SESSION_KEY_PREFIX}{new_session_id}",
+            USERNAME_KEY_PREFIX,
+            username or "",
+            new_session_id,
+            new_username,
+            SESSION_EXPIRY,
+            SESSION_INVALIDATION_CHANNEL,
+            self._invalidation(key),
+            settings.SESSION_REFRESH_THRESHOLD,
+        )
+        if valid:
+            self._count_refresh(valid == 2)
+            return session_id, username or ""
+        return new_session_id, new_username
 
 
 session_manager = SessionManager()
+session_invalidation_listener = CacheInvalidationListener(
+    session_cache, SESSION_INVALIDATION_CHANNEL
+)
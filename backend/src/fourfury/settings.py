@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -16,8 +18,30 @@ class AppSettings(BaseSettings):
     REDIS_PORT: int
     REDIS_DB: int
 
+    # Socket.IO workers relay emits to each other on this Redis channel
+    SOCKETIO_CHANNEL: str = "socketio"
+
     # Cache settings
     CACHE_TTL: int = 3600  # 1 hour
+    CACHE_LOCAL_SIZE: int = 1024  # in-process entries, 0 disables the tier
+    CACHE_LOCAL_TTL: float = 10.0  # seconds
+    CACHE_CODEC: Literal["compact", "json"] = "compact"  # cached games
+    SESSION_CACHE_SIZE: int = 4096  # validated sessions, 0 disables
+    SESSION_CACHE_TTL: float = 5.0  # seconds
+    # Sessions are only extended once they have less than this many seconds
+    # left, out of 24 hours
+    SESSION_REFRESH_THRESHOLD: int = 20 * 60 * 60
+
+    # Matchmaking settings
+    MATCHMAKING_INTERVAL: float = 0.5  # seconds between matcher rounds
+    MATCHMAKING_BUCKET_SIZE: float = 100  # rating points per bucket
+    MATCHMAKING_WIDEN_AFTER: float = 5.0  # seconds waited per extra bucket
+
+    # AI settings
+    AI_POOL_SIZE: int = 2  # worker processes, 0 searches in-process
+    AI_QUEUE_DEPTH: int = 8  # searches allowed to wait for a worker
+    AI_MOVE_TIMEOUT: float = 5.0  # seconds
+    AI_FALLBACK_DIFFICULTY: int = 1  # used while the pool is saturated
 
 
 settings = AppSettings()
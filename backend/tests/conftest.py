@@ -0,0 +1,41 @@
+import os
+
+import pytest
+import redis
+import redis.asyncio
+
+# Settings are read when ``fourfury.settings`` is imported; give the required
+# ones test values so modules that use them can be imported without a .env.
+os.environ.setdefault("app_ALLOWED_ORIGINS", '["http://localhost:3000"]')
+os.environ.setdefault("app_MONGODB_URL", "mongodb://localhost:27017/")
+os.environ.setdefault("app_MONGODB_DB_NAME", "fourfury_test")
+os.environ.setdefault("app_REDIS_HOST", "localhost")
+os.environ.setdefault("app_REDIS_PORT", "6379")
+os.environ.setdefault("app_REDIS_DB", "0")
+
+# Tests that need Redis use this database, which they flush, and are skipped
+# when it cannot be reached.
+TEST_REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+@pytest.fixture
+def redis_url():
+    client = redis.Redis.from_url(TEST_REDIS_URL)
+    try:
+        client.ping()
+    except redis.ConnectionError:
+        pytest.skip(f"Redis is not available at {TEST_REDIS_URL}")
+    client.flushdb()
+    yield TEST_REDIS_URL
+    client.flushdb()
+    client.close()
+
+
+@pytest.fixture
+def redis_client(redis_url, monkeypatch):
+    """An async client for the test database, used by ``fourfury.cache``."""
+    from fourfury import cache
+
+    client = redis.asyncio.Redis.from_url(redis_url, decode_responses=True)
+    monkeypatch.setattr(cache, "redis_client", client)
+    return client
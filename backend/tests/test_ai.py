@@ -0,0 +1,175 @@
+import pytest
+
+from fourfury.ai.engine import (
+    MATE_THRESHOLD,
+    WIN_SCORE,
+    AIEngine,
+    _score_from_tt,
+    _score_to_tt,
+    get_engine,
+    release_engine,
+)
+from fourfury.ai.evaluation import MAX_EVALUATION
+from fourfury.ai.transposition import (
+    Bound,
+    TranspositionTable,
+    zobrist_hash,
+)
+from fourfury.core import init_board
+
+WIN_BOARD = [
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 1, 1, 0, 0, 0, 0],
+    [1, 2, 2, 2, 0, 1, 0],
+]
+
+BLOCK_BOARD = [
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 2, 0, 0, 0],
+    [0, 0, 1, 1, 1, 2, 0],
+]
+
+
+@pytest.mark.parametrize("difficulty", range(1, 6))
+def test_takes_win(difficulty):
+    board = [row[:] for row in WIN_BOARD]
+    assert AIEngine(difficulty).get_best_move(board) == 4
+    assert board == WIN_BOARD
+
+
+@pytest.mark.parametrize("difficulty", range(2, 6))
+def test_blocks_win(difficulty):
+    board = [row[:] for row in BLOCK_BOARD]
+    assert AIEngine(difficulty).get_best_move(board) == 1
+
+
+def test_transposition_table_is_used():
+    ai = AIEngine(5)
+    ai.get_best_move(init_board())
+    assert ai.nodes > 0
+    assert ai.tt.hits > 0
+    assert 0 < ai.tt.hit_rate < 1
+
+
+def test_transposition_table_store_and_probe():
+    tt = TranspositionTable(size=4)
+    tt.store(1, 3, 10.0, Bound.EXACT, 2)
+    entry = tt.probe(1)
+    assert entry is not None
+    assert (entry.depth, entry.score, entry.bound, entry.best_move) == (
+        3,
+        10.0,
+        Bound.EXACT,
+        2,
+    )
+    assert tt.probe(2) is None
+    assert tt.hits == 1 and tt.probes == 2
+
+
+def test_transposition_table_replacement():
+    tt = TranspositionTable(size=4)
+    tt.store(1, 5, 1.0, Bound.EXACT, 0)
+    # Same slot, shallower, same search: the deeper entry is kept.
+    tt.store(5, 2, 2.0, Bound.EXACT, 1)
+    assert tt.probe(1) is not None
+    assert tt.probe(5) is None
+
+    # Entries from an earlier search are always replaced.
+    tt.new_search()
+    tt.store(5, 2, 2.0, Bound.EXACT, 1)
+    assert tt.probe(1) is None
+    assert tt.probe(5) is not None
+    assert tt.replacements == 1
+
+
+def test_transposition_table_size_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        TranspositionTable(size=3)
+
+
+def test_zobrist_hash_depends_on_side_to_move():
+    board = [row[:] for row in WIN_BOARD]
+    assert zobrist_hash(board, True) != zobrist_hash(board, False)
+    assert zobrist_hash(board, True) != zobrist_hash(init_board(), True)
+
+
+def test_win_scores_are_stored_relative_to_the_node():
+    # A win two plies below a node with three plies left, read back at a
+    # node with five plies left, is still two plies away.
+    win = 2 * WIN_SCORE
+    assert _score_from_tt(_score_to_tt(win, 3), 5) == 4 * WIN_SCORE
+    assert _score_from_tt(_score_to_tt(-win, 3), 3) == -win
+    assert _score_from_tt(_score_to_tt(win, 3), 1) == WIN_SCORE
+    assert _score_from_tt(_score_to_tt(42.0, 3), 5) == 42.0
+
+
+def test_heuristic_scores_are_stored_unchanged():
+    # Crowded positions can score past a single window's win score.
+    for score in (1500.0, -MAX_EVALUATION, MAX_EVALUATION):
+        assert _score_to_tt(score, 3) == score
+        assert _score_from_tt(score, 5) == score
+    assert MAX_EVALUATION < MATE_THRESHOLD < WIN_SCORE
+
+
+def test_reused_win_score_is_not_inflated():
+    board = [row[:] for row in WIN_BOARD]
+    ai = AIEngine(5)
+    ai.minimax(board, 5, float("-inf"), float("inf"), True)
+    reused, _ = ai.minimax(board, 1, float("-inf"), float("inf"), True)
+    fresh, _ = AIEngine(5).minimax(board, 1, float("-inf"), float("inf"), True)
+    assert reused == fresh
+
+
+def test_engine_persists_per_game():
+    engine = get_engine("game-1", 4)
+    assert get_engine("game-1", 4) is engine
+    assert get_engine("game-1", 5) is not engine
+    release_engine("game-1")
+    assert get_engine("game-1", 5) is not engine
+    release_engine("game-1")
+
+
+def test_iterative_deepening_reaches_max_depth():
+    ai = AIEngine(4, time_budget_ms=60_000)
+    move = ai.get_best_move(init_board())
+    assert ai.completed_depth == ai.max_depth
+    assert ai.principal_variation[0] == move
+
+
+def test_time_budget_returns_completed_iteration():
+    ai = AIEngine(5, time_budget_ms=0)
+    move = ai.get_best_move(init_board())
+    assert 1 <= ai.completed_depth < ai.max_depth
+    assert 0 <= move < 7
+
+
+def test_interrupted_search_leaves_board_untouched():
+    board = init_board()
+    AIEngine(5, time_budget_ms=0).get_best_move(board)
+    assert board == init_board()
+
+
+def test_forced_win_stops_deepening():
+    ai = AIEngine(5)
+    assert ai.get_best_move([row[:] for row in WIN_BOARD]) == 4
+    assert ai.completed_depth < ai.max_depth
+
+
+@pytest.mark.parametrize("board", (WIN_BOARD, BLOCK_BOARD, init_board()))
+def test_move_ordering_keeps_scores(board):
+    plain = AIEngine(4, move_ordering=False)
+    ordered = AIEngine(4)
+    plain_score, _ = plain.minimax(
+        [row[:] for row in board], 5, float("-inf"), float("inf"), True
+    )
+    ordered_score, _ = ordered.minimax(
+        [row[:] for row in board], 5, float("-inf"), float("inf"), True
+    )
+    assert plain_score == ordered_score
+    assert ordered.nodes <= plain.nodes
@@ -0,0 +1,142 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+from fourfury.ai import service as service_module
+from fourfury.ai.engine import get_engine, release_engine
+from fourfury.ai.service import AIService
+
+from .test_ai import WIN_BOARD
+
+
+class StubExecutor:
+    """Stands in for the process pool; tests finish its futures by hand."""
+
+    def __init__(self):
+        self.calls = []
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        # As in a busy pool, the search has started and cannot be cancelled.
+        future.set_running_or_notify_cancel()
+        self.calls.append(args)
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def shallow_calls(monkeypatch):
+    calls = []
+
+    def shallow_search(board):
+        calls.append(board)
+        return 6
+
+    monkeypatch.setattr(service_module, "_shallow_search", shallow_search)
+    return calls
+
+
+def stub_service(max_workers=1, queue_depth=1, timeout=1.0, pending=0):
+    service = AIService(max_workers, queue_depth, timeout)
+    service._executor = StubExecutor()
+    service._pending = pending
+    return service
+
+
+def test_in_process_without_workers():
+    service = AIService(max_workers=0, queue_depth=0, timeout=1.0)
+    service.start()
+    assert service._executor is None
+    board = [row[:] for row in WIN_BOARD]
+    assert asyncio.run(service.get_best_move("game", board, 3)) == 4
+
+
+def test_searches_in_pool():
+    async def run(service):
+        task = asyncio.create_task(service.get_best_move("game", WIN_BOARD, 5))
+        await asyncio.sleep(0)
+        assert service.pending == 1
+        service._executor.futures[0].set_result(4)
+        move = await task
+        await asyncio.sleep(0)
+        return move
+
+    service = stub_service()
+    assert asyncio.run(run(service)) == 4
+    assert service._executor.calls == [("game", WIN_BOARD, 5, ())]
+    assert service.pending == 0
+
+
+def test_saturated_pool_lowers_difficulty():
+    async def run(service):
+        task = asyncio.create_task(service.get_best_move("game", WIN_BOARD, 5))
+        await asyncio.sleep(0)
+        service._executor.futures[0].set_result(4)
+        return await task
+
+    service = stub_service(pending=1)
+    assert asyncio.run(run(service)) == 4
+    assert service._executor.calls == [
+        ("game", WIN_BOARD, service.fallback_difficulty, ())
+    ]
+
+
+def test_released_games_are_sent_to_workers():
+    async def run(service):
+        task = asyncio.create_task(service.get_best_move("game", WIN_BOARD, 5))
+        await asyncio.sleep(0)
+        service._executor.futures[0].set_result(4)
+        return await task
+
+    service = stub_service()
+    service.release("old")
+    assert asyncio.run(run(service)) == 4
+    assert service._executor.calls == [("game", WIN_BOARD, 5, ("old",))]
+
+
+def test_search_drops_released_engines():
+    engine = get_engine("old", 1)
+    board = [row[:] for row in WIN_BOARD]
+    assert service_module._search("game", board, 1, ("old",)) == 4
+    assert get_engine("old", 1) is not engine
+    release_engine("old")
+    release_engine("game")
+
+
+def test_full_queue_uses_shallow_search(shallow_calls):
+    service = stub_service(pending=2)
+    assert asyncio.run(service.get_best_move("game", WIN_BOARD, 5)) == 6
+    assert shallow_calls == [WIN_BOARD]
+    assert service._executor.calls == []
+    assert service.pending == 2
+
+
+def test_timeout_uses_shallow_search(shallow_calls):
+    async def run(service):
+        move = await service.get_best_move("game", WIN_BOARD, 5)
+        # The slot stays taken until the worker really finishes.
+        assert service.pending == 1
+        service._executor.futures[0].set_result(4)
+        await asyncio.sleep(0)
+        return move
+
+    service = stub_service(timeout=0.01)
+    assert asyncio.run(run(service)) == 6
+    assert shallow_calls == [WIN_BOARD]
+    assert service.pending == 0
+
+
+def test_process_pool_search():
+    service = AIService(max_workers=1, queue_depth=0, timeout=30.0)
+    service.start()
+    try:
+        board = [row[:] for row in WIN_BOARD]
+        assert asyncio.run(service.get_best_move("game", board, 1)) == 4
+    finally:
+        service.shutdown()
+    assert service.pending == 0
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from fourfury import bitboard
+from fourfury.constants import M, N, PlayerEnum
+from fourfury.core import (
+    calculate_row_by_col,
+    detect_winner,
+    init_board,
+    is_valid_move,
+    mark_winner,
+)
+
+
+def random_board(seed: int) -> list[list[PlayerEnum]]:
+    """Drop a random number of pieces, ignoring wins along the way."""
+    rng = random.Random(seed)
+    board = init_board()
+    player = PlayerEnum.PLAYER_1
+    for _ in range(rng.randint(0, N * M)):
+        columns = [
+            col
+            for col in range(M)
+            if calculate_row_by_col(board, col) is not None
+        ]
+        column = rng.choice(columns)
+        board[calculate_row_by_col(board, column)][column] = player
+        player = (
+            PlayerEnum.PLAYER_2
+            if player == PlayerEnum.PLAYER_1
+            else PlayerEnum.PLAYER_1
+        )
+    return board
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_round_trip(seed):
+    board = random_board(seed)
+    assert bitboard.from_bitboard(*bitboard.to_bitboard(board)) == board
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_core(seed):
+    board = random_board(seed)
+    player_1, player_2 = bitboard.to_bitboard(board)
+
+    assert bitboard.detect_winner(player_1, player_2) == detect_winner(board)
+    for col in range(M):
+        assert bitboard.calculate_row_by_col(
+            player_1, player_2, col
+        ) == calculate_row_by_col(board, col)
+        for row in range(N):
+            assert bitboard.is_valid_move(
+                player_1, player_2, row, col
+            ) == is_valid_move(board, row, col)
+
+    winner = detect_winner(board)
+    if winner is not None:
+        expected = [row[:] for row in board]
+        mark_winner(expected, winner)
+        bitboard.mark_winner(board, player_1, player_2, winner)
+        assert board == expected
+
+
+@pytest.mark.parametrize(
+    "row, col, expected",
+    ((None, 0, False), (0, None, False), (6, 0, False), (5, 7, False)),
+)
+def test_is_valid_move_out_of_range(row, col, expected):
+    assert bitboard.is_valid_move(0, 0, row, col) == expected
+
+
+def test_calculate_row_by_col_out_of_range():
+    assert bitboard.calculate_row_by_col(0, 0, -1) is None
+    assert bitboard.calculate_row_by_col(0, 0, M) is None
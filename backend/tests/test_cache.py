@@ -0,0 +1,322 @@
+import asyncio
+import json
+
+from fourfury import cache
+from fourfury.cache import (
+    INSTANCE_ID,
+    INVALIDATION_CHANNEL,
+    CacheInvalidationListener,
+    LocalCache,
+    cache_key,
+    invalidate_cache,
+    invalidate_keys,
+    redis_cache,
+    tag_key,
+)
+
+
+def cached_loader(calls):
+    @redis_cache("item", 60)
+    async def load(item_id):
+        calls.append(item_id)
+        return {"id": item_id}
+
+    return load
+
+
+def test_cache_key():
+    assert cache_key("game", "abc") == "game:abc"
+    assert cache_key("games") == "games:"
+    assert cache_key("game", 1, page=2) == "game:1:page:2"
+
+
+def test_redis_cache_tracks_keys(redis_client):
+    async def main():
+        calls = []
+        load = cached_loader(calls)
+        assert await load("a") == {"id": "a"}
+        assert await load("a") == {"id": "a"}
+        assert calls == ["a"]
+        assert await redis_client.zrange(tag_key("item"), 0, -1) == ["item:a"]
+        assert await redis_client.ttl(tag_key("item")) > 0
+
+    asyncio.run(main())
+
+
+def test_invalidate_keys_deletes_exact_keys(redis_client):
+    async def main():
+        calls = []
+        load = cached_loader(calls)
+        await load("a")
+        await load("ab")
+        await redis_client.set("item:a:players", "kept")
+
+        await invalidate_keys(cache_key("item", "a"))
+        assert await redis_client.get("item:a") is None
+        assert await redis_client.get("item:ab") is not None
+        assert await redis_client.get("item:a:players") == "kept"
+        assert await redis_client.zrange(tag_key("item"), 0, -1) == ["item:ab"]
+
+        await load("a")
+        assert calls == ["a", "ab", "a"]
+
+    asyncio.run(main())
+
+
+def test_invalidate_cache_only_touches_tracked_keys(redis_client):
+    async def main():
+        load = cached_loader([])
+        await load("a")
+        await load("b")
+        await redis_client.set("item:presence:a:player", "online")
+
+        await invalidate_cache("item")
+        assert await redis_client.keys("item:*") == ["item:presence:a:player"]
+        assert not await redis_client.exists(tag_key("item"))
+
+    asyncio.run(main())
+
+
+def test_expired_keys_are_pruned_from_tags(redis_client, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+
+    async def main():
+        load = cached_loader([])
+        await load("a")
+        now[0] += 30
+        await load("b")
+        assert await redis_client.zrange(
+            tag_key("item"), 0, -1, withscores=True
+        ) == [("item:a", 1060.0), ("item:b", 1090.0)]
+
+        # "item:a" expired before this write.
+        now[0] += 31
+        await load("c")
+        assert await redis_client.zrange(tag_key("item"), 0, -1) == [
+            "item:b",
+            "item:c",
+        ]
+
+    asyncio.run(main())
+
+
+def test_local_cache_lru_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    local = LocalCache(max_size=2, ttl=5)
+    local.set("a", 1)
+    local.set("b", 2)
+    assert local.get("a") == 1
+    local.set("c", 3)  # "b" is the least recently used
+    assert local.get("b") is cache._MISSING
+    assert local.get("c") == 3
+
+    now[0] += 6
+    assert local.get("a") is cache._MISSING
+    assert local.stats() == {"size": 1, "hits": 2, "misses": 2, "evictions": 1}
+
+
+def test_local_cache_delete_prefix():
+    local = LocalCache(max_size=10, ttl=5)
+    local.set("game:1", 1)
+    local.set("games:", 2)
+    local.delete_prefix("game")
+    assert local.get("game:1") is cache._MISSING
+    assert local.get("games:") == 2
+
+
+def test_local_cache_fill_skipped_after_write():
+    local = LocalCache(max_size=10, ttl=5)
+    token = local.start_fill("game:1")
+    local.end_fill("game:1", token, "read")
+    assert local.get("game:1") == "read"
+
+    for write in (
+        lambda: local.set("game:1", "written"),
+        lambda: local.delete("game:1"),
+        lambda: local.delete_prefix("game"),
+        local.clear,
+    ):
+        local.clear()
+        token = local.start_fill("game:1")
+        write()
+        local.end_fill("game:1", token, "read")
+        assert local.get("game:1") != "read"
+    assert local._fills == {}
+
+
+def test_local_cache_disabled():
+    local = LocalCache(max_size=0, ttl=5)
+    local.set("a", 1)
+    assert not local.enabled
+    assert len(local) == 0
+
+
+def test_redis_cache_local_tier(redis_client, monkeypatch):
+    local = LocalCache(max_size=10, ttl=60)
+    monkeypatch.setattr(cache, "local_cache", local)
+
+    calls = []
+
+    @redis_cache("item", 60, local=True)
+    async def load(item_id):
+        calls.append(item_id)
+        return {"id": item_id, "tags": []}
+
+    async def main():
+        first = await load("a")
+        first["tags"].append("changed")
+        await redis_client.delete("item:a")
+        # Served from the local tier, and not affected by the change above.
+        assert await load("a") == {"id": "a", "tags": []}
+        assert local.hits == 1
+
+        await invalidate_keys(cache_key("item", "a"))
+        assert await load("a") == {"id": "a", "tags": []}
+        assert calls == ["a", "a"]
+
+    asyncio.run(main())
+
+
+def test_invalidation_listener_drops_remote_keys(redis_client):
+    local = LocalCache(max_size=10, ttl=60)
+    listener = CacheInvalidationListener(local)
+
+    def message(origin, keys=(), prefix=None):
+        return json.dumps({"origin": origin, "keys": keys, "prefix": prefix})
+
+    async def main():
+        listener.start()
+        # Subscribing clears the cache, so fill it only once subscribed.
+        while (await redis_client.pubsub_numsub(INVALIDATION_CHANNEL))[0][
+            1
+        ] == 0:
+            await asyncio.sleep(0.01)
+        for key in ("item:a", "item:b", "item:c", "other:d"):
+            local.set(key, key)
+
+        publish = redis_client.publish
+        await publish(INVALIDATION_CHANNEL, message("other", ["item:a"]))
+        await publish(INVALIDATION_CHANNEL, message("other", prefix="other"))
+        # Messages this process sent itself were already applied locally.
+        await publish(INVALIDATION_CHANNEL, message(INSTANCE_ID, ["item:b"]))
+        for _ in range(100):
+            if len(local) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await listener.stop()
+
+    asyncio.run(main())
+    assert sorted(local._entries) == ["item:b", "item:c"]
+
+
+def slow_loader(calls, delay=0.05, error=None):
+    @redis_cache("item", 60)
+    async def load(item_id):
+        calls.append(item_id)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return {"id": item_id}
+
+    return load
+
+
+def test_load_does_not_overwrite_a_newer_write(redis_client):
+    async def main():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        @redis_cache("item", 60, lock=True)
+        async def load(item_id):
+            started.set()
+            await release.wait()
+            return {"id": item_id, "version": 1}
+
+        task = asyncio.create_task(load("a"))
+        await started.wait()
+        # Another process writes the key while this one is loading.
+        newer = json.dumps({"id": "a", "version": 2})
+        await redis_client.set("item:a", newer)
+        release.set()
+        assert await task == {"id": "a", "version": 1}
+        assert await redis_client.get("item:a") == newer
+
+    asyncio.run(main())
+
+
+def test_concurrent_misses_share_one_load(redis_client):
+    calls = []
+    load = slow_loader(calls)
+
+    async def main():
+        return await asyncio.gather(*(load("a") for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert calls == ["a"]
+    assert all(result == {"id": "a"} for result in results)
+    # Every caller gets its own copy.
+    assert len({id(result) for result in results}) == 10
+
+
+def test_failed_load_reaches_every_waiter_and_is_retried(redis_client):
+    calls = []
+    load = slow_loader(calls, error=ValueError("boom"))
+
+    async def main():
+        results = await asyncio.gather(
+            *(load("a") for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+        await asyncio.gather(load("a"), return_exceptions=True)
+
+    asyncio.run(main())
+    assert calls == ["a", "a"]
+
+
+def test_cancelled_caller_does_not_cancel_shared_load(redis_client):
+    calls = []
+    load = slow_loader(calls)
+
+    async def main():
+        first = asyncio.create_task(load("a"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(load("a"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == {"id": "a"}
+    assert calls == ["a"]
+
+
+def test_redis_lock_waits_for_other_process(redis_client, monkeypatch):
+    monkeypatch.setattr(cache, "LOCK_POLL_INTERVAL", 0.01)
+    calls = []
+
+    @redis_cache("item", 60, lock=True)
+    async def load(item_id):
+        calls.append(item_id)
+        return {"id": item_id, "loaded_by": "this process"}
+
+    async def main():
+        # Another process holds the lock and is loading the key.
+        await redis_client.set("cache:lock:item:a", "other", px=5000)
+        waiting = asyncio.create_task(load("a"))
+        await asyncio.sleep(0.05)
+        await redis_client.set("item:a", json.dumps({"id": "a"}))
+        assert await waiting == {"id": "a"}
+
+        # The other process gave up without caching anything.
+        await redis_client.set("cache:lock:item:b", "other", px=5000)
+        waiting = asyncio.create_task(load("b"))
+        await asyncio.sleep(0.05)
+        await redis_client.delete("cache:lock:item:b")
+        assert await waiting == {"id": "b", "loaded_by": "this process"}
+
+        # Nobody else is loading: take the lock, load and release it.
+        assert await load("c") == {"id": "c", "loaded_by": "this process"}
+        assert not await redis_client.exists("cache:lock:item:c")
+
+    asyncio.run(main())
+    assert calls == ["b", "c"]
@@ -0,0 +1,90 @@
+import pytest
+from bson import ObjectId
+
+from fourfury.api import codecs
+from fourfury.api.codecs import (
+    CODECS,
+    CompactGameCodec,
+    JsonGameCodec,
+    decode_games,
+    encode_games,
+    pack_board,
+    unpack_board,
+)
+from fourfury.api.models import Game, GameMode
+from fourfury.api.utils import make_move
+from fourfury.constants import M, N, PlayerEnum
+
+
+def finished_game():
+    game = Game(
+        id=ObjectId(),
+        player_1="Alice",
+        player_1_username="alice",
+        player_2="AI",
+        player_2_username="bot",
+        mode=GameMode.AI,
+        ai_difficulty=4,
+    )
+    for column in (3, 3, 4, 4, 5, 5, 6):
+        make_move(game, column)
+    assert game.winner == PlayerEnum.PLAYER_1
+    return game
+
+
+@pytest.mark.parametrize("name", CODECS)
+@pytest.mark.parametrize("trusted", (True, False))
+def test_round_trip(name, trusted):
+    codec = CODECS[name]
+    for game in (
+        finished_game(),
+        Game(id=ObjectId(), player_1="Bob", player_1_username="bob"),
+    ):
+        decoded = codec.decode(codec.encode(game), trusted)
+        assert decoded == game
+        assert decoded.model_dump_json() == game.model_dump_json()
+        assert isinstance(decoded.id, ObjectId)
+        assert isinstance(decoded.board[5][3], PlayerEnum)
+
+
+def test_compact_is_smaller():
+    game = finished_game()
+    compact = CompactGameCodec().encode(game)
+    assert len(compact) < len(JsonGameCodec().encode(game)) / 2
+
+
+def test_compact_reads_json_entries():
+    game = finished_game()
+    assert CompactGameCodec().decode(JsonGameCodec().encode(game)) == game
+
+
+def test_untrusted_data_is_validated():
+    data = CompactGameCodec().encode(finished_game())
+    broken = data.replace('"Alice"', '"' + "x" * 200 + '"')
+    CompactGameCodec().decode(broken)
+    with pytest.raises(ValueError):
+        CompactGameCodec().decode(broken, trusted=False)
+
+
+def test_pack_board():
+    for value in PlayerEnum:
+        board = [[value] * M for _ in range(N)]
+        assert unpack_board(pack_board(board)) == board
+    board = [
+        [PlayerEnum((row + col) % 4) for col in range(M)] for row in range(N)
+    ]
+    assert unpack_board(pack_board(board)) == board
+
+
+def test_games_list():
+    games = [finished_game(), finished_game()]
+    codec = CODECS["compact"]
+    assert decode_games(codec, encode_games(codec, games)) == games
+    assert decode_games(codec, encode_games(codec, [])) == []
+
+
+def test_without_orjson(monkeypatch):
+    monkeypatch.setattr(codecs, "orjson", None)
+    game = finished_game()
+    codec = CompactGameCodec()
+    assert codec.decode(codec.encode(game)) == game
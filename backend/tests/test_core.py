@@ -1,8 +1,13 @@
+import random
+
 import pytest
 
+from fourfury.constants import M, N, PlayerEnum
 from fourfury.core import (
     calculate_row_by_col,
     detect_winner,
+    detect_winner_at,
+    init_board,
     is_valid_move,
     mark_winner,
 )
@@ -339,3 +344,26 @@ def test_calculate_row_by_col(col, expected):
         [0, 1, 1, 0, 1, 1, 1],
     ]
     assert calculate_row_by_col(board, col) == expected
+
+
+@pytest.mark.parametrize("seed", range(500))
+def test_detect_winner_at_matches_full_scan(seed):
+    rng = random.Random(seed)
+    board = init_board()
+    player = PlayerEnum.PLAYER_1
+    for _ in range(N * M):
+        col = rng.choice(
+            [c for c in range(M) if calculate_row_by_col(board, c) is not None]
+        )
+        row = calculate_row_by_col(board, col)
+        board[row][col] = player
+
+        winner = detect_winner_at(board, row, col)
+        assert winner == detect_winner(board)
+        if winner is not None:
+            break
+        player = (
+            PlayerEnum.PLAYER_2
+            if player == PlayerEnum.PLAYER_1
+            else PlayerEnum.PLAYER_1
+        )
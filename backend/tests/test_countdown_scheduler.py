@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from fourfury import cache
+from fourfury.api import socketio_manager
+from fourfury.api.socketio_manager import CountdownScheduler
+from fourfury.cache import PresenceManager
+
+
+@pytest.fixture
+def presence(redis_client, monkeypatch):
+    presence = PresenceManager(redis_client)
+    monkeypatch.setattr(socketio_manager, "presence_manager", presence)
+    return presence
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+def recorder(calls, name=None):
+    async def on_timeout(game_id, username):
+        calls.append((name, game_id, username))
+
+    return on_timeout
+
+
+def test_only_one_worker_forfeits(presence, clock):
+    calls = []
+    workers = [
+        CountdownScheduler(recorder(calls, "a")),
+        CountdownScheduler(recorder(calls, "b")),
+    ]
+
+    async def main():
+        await presence.start_countdown("g1", "alice")
+        await presence.start_countdown("g2", "bob")
+        assert await workers[0].tick() == 0
+
+        clock[0] += PresenceManager.PLAYER_TIMEOUT
+        handled = await asyncio.gather(*(worker.tick() for worker in workers))
+        assert sum(handled) == 2
+        assert await workers[0].tick() == 0
+
+    asyncio.run(main())
+    assert sorted(call[1:] for call in calls) == [
+        ("g1", "alice"),
+        ("g2", "bob"),
+    ]
+
+
+def test_stopped_countdown_is_not_forfeited(presence, clock):
+    calls = []
+    scheduler = CountdownScheduler(recorder(calls))
+
+    async def main():
+        await presence.update_player_presence("g1", "alice", "offline")
+        await presence.update_player_presence("g1", "alice", "online")
+        clock[0] += PresenceManager.PLAYER_TIMEOUT
+        assert await scheduler.tick() == 0
+
+    asyncio.run(main())
+    assert calls == []
+
+
+def test_tick_drains_every_expired_countdown(presence, clock, monkeypatch):
+    monkeypatch.setattr(CountdownScheduler, "BATCH_SIZE", 2)
+    calls = []
+
+    async def on_timeout(game_id, username):
+        if username == "p1":
+            raise RuntimeError("database down")
+        calls.append((game_id, username))
+
+    scheduler = CountdownScheduler(on_timeout)
+
+    async def main():
+        for i in range(5):
+            await presence.start_countdown(f"g{i}", f"p{i}")
+        clock[0] += PresenceManager.PLAYER_TIMEOUT
+        # A failed forfeit does not hold up the others.
+        assert await scheduler.tick() == 5
+        assert sorted(calls) == [(f"g{i}", f"p{i}") for i in (0, 2, 3, 4)]
+        assert await presence.is_countdown_active("g1", "p1")
+        assert await scheduler.tick() == 0
+
+    asyncio.run(main())
+
+
+def test_unfinished_forfeits_are_retried(presence, clock):
+    calls = []
+    scheduler = CountdownScheduler(recorder(calls))
+
+    async def main():
+        await presence.start_countdown("g1", "alice")
+        await presence.start_countdown("g2", "bob")
+        clock[0] += PresenceManager.PLAYER_TIMEOUT
+        # A worker claims both and dies before handling them.
+        assert len((await presence.claim_expired_countdowns())[1]) == 2
+        assert await scheduler.tick() == 0
+
+        clock[0] += PresenceManager.CLAIM_LEASE
+        assert await scheduler.tick() == 2
+        assert not await presence.is_countdown_active("g1", "alice")
+        assert not await presence.is_countdown_active("g2", "bob")
+
+    asyncio.run(main())
+    assert sorted(call[1:] for call in calls) == [
+        ("g1", "alice"),
+        ("g2", "bob"),
+    ]
+
+
+def test_scheduler_runs_in_the_background(presence, monkeypatch):
+    monkeypatch.setattr(CountdownScheduler, "INTERVAL", 0.01)
+    monkeypatch.setattr(PresenceManager, "PLAYER_TIMEOUT", 0)
+    calls = []
+    scheduler = CountdownScheduler(recorder(calls))
+
+    async def main():
+        scheduler.start()
+        await presence.start_countdown("g1", "alice")
+        for _ in range(100):
+            if calls:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    asyncio.run(main())
+    assert calls == [(None, "g1", "alice")]
@@ -0,0 +1,72 @@
+import asyncio
+
+from bson import ObjectId
+
+from fourfury import cache
+from fourfury.api import crud
+from fourfury.api.models import Game
+from fourfury.cache import LocalCache, cache_key
+
+
+class FailingClient:
+    """Any database access fails the test."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"Unexpected database call: {name}")
+
+
+def test_cached_game_is_read_without_database(redis_client, monkeypatch):
+    monkeypatch.setattr(crud, "MongoDBClient", FailingClient)
+    game = Game(id=ObjectId(), player_1="Alice", player_1_username="alice")
+
+    async def main():
+        await redis_client.set(cache_key("games"), "[]")
+        await crud.cache_game(game)
+        assert await redis_client.get(cache_key("games")) is None
+        return await crud.get_game_by_id(game.id)
+
+    assert asyncio.run(main()) == game
+
+
+class SlowClient:
+    """Returns ``stored`` once ``release`` is set."""
+
+    def __init__(self, stored, started, release):
+        self.stored = stored
+        self.started = started
+        self.release = release
+
+    async def get(self, model, game_id):
+        self.started.set()
+        await self.release.wait()
+        return self.stored.model_dump()
+
+
+def test_load_racing_a_write_does_not_cache_the_older_game(
+    redis_client, monkeypatch
+):
+    local = LocalCache(max_size=10, ttl=60)
+    monkeypatch.setattr(cache, "local_cache", local)
+    monkeypatch.setattr(crud, "local_cache", local)
+    game = Game(id=ObjectId(), player_1="Alice", player_1_username="alice")
+    moved = game.model_copy(update={"player_2": "Bob"})
+
+    async def main():
+        started, release = asyncio.Event(), asyncio.Event()
+        monkeypatch.setattr(
+            crud, "MongoDBClient", lambda: SlowClient(game, started, release)
+        )
+        load = asyncio.create_task(crud.get_game_by_id(game.id))
+        await started.wait()
+        # A move is written through while the load still reads the
+        # game as it was.
+        await crud.cache_game(moved)
+        release.set()
+        assert await load == game
+
+        monkeypatch.setattr(crud, "MongoDBClient", FailingClient)
+        assert await crud.get_game_by_id(game.id) == moved
+        local.clear()
+        assert await crud.get_game_by_id(game.id) == moved
+
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from fourfury.api.dependencies import PlayerSession, get_player_session
+from fourfury.cache import LocalCache
+from fourfury.session import session_manager
+
+
+def request_with_cookies(cookies):
+    cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+    return Request({"type": "http", "headers": [(b"cookie", cookie.encode())]})
+
+
+@pytest.fixture
+def sessions(redis_client, monkeypatch):
+    monkeypatch.setattr(session_manager, "redis", redis_client)
+    monkeypatch.setattr(session_manager, "cache", LocalCache(10, 60))
+    return session_manager
+
+
+def test_get_player_session(sessions):
+    async def main():
+        session_id, username = await sessions.create_session()
+        request = request_with_cookies(
+            {"session_id": session_id, "username": username}
+        )
+        assert await get_player_session(request) == PlayerSession(
+            session_id, username
+        )
+        # The second request is served by the session cache.
+        assert await get_player_session(request) == (session_id, username)
+        assert sessions.cache.hits == 1
+
+        for cookies in (
+            {},
+            {"session_id": session_id},
+            {"session_id": session_id, "username": "someone"},
+            {"session_id": "missing", "username": username},
+        ):
+            with pytest.raises(HTTPException) as error:
+                await get_player_session(request_with_cookies(cookies))
+            assert error.value.status_code == 401
+
+    asyncio.run(main())
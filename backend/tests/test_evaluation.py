@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from fourfury.ai.evaluation import (
+    MAX_EVALUATION,
+    WINDOWS,
+    IncrementalEvaluator,
+    evaluate,
+    evaluate_batch,
+)
+from fourfury.constants import M, N, PlayerEnum
+from fourfury.core import (
+    DIRECTIONS,
+    calculate_row_by_col,
+    detect_winner_at,
+    init_board,
+)
+
+
+def reference_evaluate(board, player):
+    """The original cell-by-cell heuristic the tables must reproduce."""
+    score = 0
+    opponent = (
+        PlayerEnum.PLAYER_1
+        if player == PlayerEnum.PLAYER_2
+        else PlayerEnum.PLAYER_2
+    )
+    for row in range(N):
+        for col in range(M):
+            if board[row][col] == PlayerEnum.EMPTY:
+                continue
+            for direction in DIRECTIONS:
+                if not direction.condition(row, col):
+                    continue
+                line = [
+                    board[r][c]
+                    for r, c in (
+                        direction.move_row_col(row, col, i) for i in range(4)
+                    )
+                ]
+                player_count = line.count(player)
+                opponent_count = line.count(opponent)
+                empty_count = 4 - player_count - opponent_count
+                if player_count == 4:
+                    score += 1000
+                elif player_count == 3 and empty_count == 1:
+                    score += 100
+                elif player_count == 2 and empty_count == 2:
+                    score += 10
+                elif opponent_count == 3 and empty_count == 1:
+                    score -= 80
+                elif opponent_count == 2 and empty_count == 2:
+                    score -= 8
+    for row in range(N):
+        for col in range(M // 2 - 1, M // 2 + 2):
+            if board[row][col] == player:
+                score += 3
+    return score
+
+
+def random_moves(seed):
+    rng = random.Random(seed)
+    board = init_board()
+    moves = []
+    for ply in range(rng.randint(0, N * M)):
+        col = rng.choice(
+            [c for c in range(M) if calculate_row_by_col(board, c) is not None]
+        )
+        row = calculate_row_by_col(board, col)
+        piece = PlayerEnum.PLAYER_1 if ply % 2 == 0 else PlayerEnum.PLAYER_2
+        board[row][col] = piece
+        moves.append((row, col, piece))
+    return moves
+
+
+def test_window_count():
+    assert len(WINDOWS) == 69
+
+
+@pytest.mark.parametrize("seed", range(200))
+@pytest.mark.parametrize("player", (PlayerEnum.PLAYER_1, PlayerEnum.PLAYER_2))
+def test_evaluate_matches_reference(seed, player):
+    board = init_board()
+    for row, col, piece in random_moves(seed):
+        board[row][col] = piece
+    assert evaluate(board, player) == reference_evaluate(board, player)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_evaluation_stays_below_max_evaluation(seed):
+    # Play until someone wins: the search never evaluates a won position.
+    board = init_board()
+    for row, col, piece in random_moves(seed):
+        board[row][col] = piece
+        if detect_winner_at(board, row, col) is not None:
+            break
+        for player in (PlayerEnum.PLAYER_1, PlayerEnum.PLAYER_2):
+            assert abs(evaluate(board, player)) <= MAX_EVALUATION
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_incremental_matches_reference(seed):
+    board = init_board()
+    evaluator = IncrementalEvaluator(board)
+    moves = random_moves(seed)
+    for row, col, piece in moves:
+        board[row][col] = piece
+        evaluator.play(row, col, piece)
+        for player in (PlayerEnum.PLAYER_1, PlayerEnum.PLAYER_2):
+            assert evaluator.score(player) == reference_evaluate(board, player)
+
+    for row, col, _ in reversed(moves):
+        board[row][col] = PlayerEnum.EMPTY
+        evaluator.undo(row, col)
+        for player in (PlayerEnum.PLAYER_1, PlayerEnum.PLAYER_2):
+            assert evaluator.score(player) == reference_evaluate(board, player)
+
+
+def test_evaluate_batch_matches_reference():
+    boards = []
+    for seed in range(100):
+        board = init_board()
+        for row, col, piece in random_moves(seed):
+            board[row][col] = piece
+        boards.append(board)
+
+    assert evaluate_batch(boards, PlayerEnum.PLAYER_2) == [
+        reference_evaluate(board, PlayerEnum.PLAYER_2) for board in boards
+    ]
+    assert evaluate_batch([], PlayerEnum.PLAYER_2) == []
@@ -0,0 +1,346 @@
+import asyncio
+import itertools
+import random
+
+import pytest
+import redis.asyncio
+
+from fourfury.api import matchmaking
+from fourfury.api.matchmaking import (
+    MATCHER_LOCK_KEY,
+    MATCHMAKING_QUEUE_KEY,
+    MATCHMAKING_RATINGS_KEY,
+    PLAYER_ENTRY_KEY,
+    Matcher,
+    MatchMaker,
+    pair_players,
+)
+from fourfury.api.models import Game
+from fourfury.settings import settings
+
+
+class FakeGames:
+    """Games kept in memory instead of MongoDB, recording every join."""
+
+    def __init__(self):
+        self.games = {}
+        self.joins = []
+        self._ids = itertools.count()
+
+    async def start_new_game(self, username, name, mode, session_id=None):
+        await asyncio.sleep(0)
+        game_id = f"{next(self._ids):024x}"
+        self.games[game_id] = Game(
+            id=game_id, player_1=name, player_1_username=username, mode=mode
+        )
+        return self.games[game_id]
+
+    async def join_new_game(self, game, username, name):
+        await asyncio.sleep(0)
+        self.joins.append(str(game.id))
+        game.player_2 = name
+        game.player_2_username = username
+        return game
+
+    def seats(self):
+        return [
+            username
+            for game in self.games.values()
+            for username in (game.player_1_username, game.player_2_username)
+            if username is not None
+        ]
+
+
+@pytest.fixture
+def games(redis_client, monkeypatch):
+    fake = FakeGames()
+    monkeypatch.setattr(matchmaking, "redis_client", redis_client)
+    for name in ("start_new_game", "join_new_game"):
+        monkeypatch.setattr(matchmaking, name, getattr(fake, name))
+    return fake
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(matchmaking.time, "time", lambda: now[0])
+    return now
+
+
+class Notifications:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, game, sids):
+        self.sent.append((game, sids))
+
+
+def test_pair_players_same_bucket_first_come_first_served():
+    waiting = [("a", 0, 1000), ("b", 1, 1090), ("c", 2, 1050), ("d", 3, 990)]
+    # "d" is one bucket below and nobody has waited long enough for that.
+    assert pair_players(waiting, 3, 100, 5) == [("a", "b")]
+    waiting[3] = ("d", 3, 1010)
+    assert pair_players(waiting, 3, 100, 5) == [("a", "b"), ("c", "d")]
+
+
+def test_pair_players_widens_with_waiting_time():
+    waiting = [("a", 0, 1000), ("b", 0, 1250)]
+    # Two buckets apart: both need to have waited 10 seconds.
+    assert pair_players(waiting, 9, 100, 5) == []
+    assert pair_players(waiting, 10, 100, 5) == [("a", "b")]
+    # Both players have to accept the distance.
+    waiting = [("a", 0, 1000), ("b", 9, 1250)]
+    assert pair_players(waiting, 10, 100, 5) == []
+
+
+def test_pair_players_prefers_the_nearest_bucket():
+    waiting = [("a", 0, 1000), ("far", 0, 1300), ("near", 0, 1100)]
+    assert pair_players(waiting, 100, 100, 5) == [("a", "near")]
+
+
+def test_enqueue_and_cancel(games):
+    async def main():
+        matchmaker = MatchMaker()
+        assert await matchmaker.enqueue("alice", "Alice", "sid-1")
+        assert await matchmaker.is_player_in_queue("alice")
+        assert await matchmaker.get_player_status("alice") == "waiting"
+        assert not await matchmaker.is_player_in_queue("bob")
+        # Already waiting: keeps the place, but is notified on the new socket.
+        assert not await matchmaker.enqueue("alice", "Alice", "sid-2")
+        assert await matchmaker.queue_length() == 1
+        assert await matchmaker.player_entries(["alice"]) == [
+            {"name": "Alice", "sid": "sid-2"}
+        ]
+
+        assert await matchmaker.cancel_matching("alice")
+        assert not await matchmaker.is_player_in_queue("alice")
+        assert await matchmaker.player_entries(["alice"]) == [{}]
+        assert not await matchmaker.cancel_matching("alice")
+
+    asyncio.run(main())
+
+
+def test_wait_time_percentiles_and_reaping(games, redis_client, clock):
+    async def main():
+        matchmaker = MatchMaker()
+        assert await matchmaker.wait_time_percentiles() == {}
+        # Ten players, one joining every 10 seconds.
+        for i in range(10):
+            await matchmaker.enqueue(f"p{i}", f"P{i}", f"sid-{i}")
+            clock[0] += 10
+        assert await matchmaker.wait_time_percentiles((50, 90, 100)) == {
+            50: 50.0,
+            90: 90.0,
+            100: 100.0,
+        }
+
+        reaped = await matchmaker.reap_stale(max_age=75)
+        assert reaped == ["p0", "p1", "p2"]
+        assert await matchmaker.queue_length() == 7
+        assert await redis_client.zcard(MATCHMAKING_RATINGS_KEY) == 7
+        assert not await redis_client.exists(PLAYER_ENTRY_KEY.format("p0"))
+
+    asyncio.run(main())
+
+
+def test_claim_skips_players_who_left(games):
+    async def main():
+        matchmaker = MatchMaker()
+        for player in ("a", "b", "c", "d"):
+            await matchmaker.enqueue(player, player.upper(), f"sid-{player}")
+        await matchmaker.cancel_matching("c")
+        claimed = await matchmaker.claim_pairs([("a", "b"), ("c", "d")])
+        assert claimed == [("a", "b")]
+        # Claimed once only.
+        assert await matchmaker.claim_pairs([("a", "b")]) == []
+        assert await matchmaker.is_player_in_queue("d")
+
+    asyncio.run(main())
+
+
+def test_matcher_creates_games_and_notifies(games, redis_client, clock):
+    notify = Notifications()
+
+    async def main():
+        matchmaker = MatchMaker()
+        matcher = Matcher(matchmaker, notify)
+        await matchmaker.enqueue("alice", "Alice", "sid-a")
+        await matchmaker.enqueue("bob", "Bob", "sid-b", rating=1500)
+        await matchmaker.enqueue("carol", "Carol", "sid-c")
+
+        assert await matcher.tick() == 1
+        (game, sids), *_ = notify.sent
+        assert (game.player_1_username, game.player_2_username) == (
+            "alice",
+            "carol",
+        )
+        assert sids == ["sid-a", "sid-c"]
+        assert await matchmaker.player_entries(["alice"]) == [{}]
+        assert await matchmaker.queue_length() == 1
+
+        # Another worker is matching right now.
+        await redis_client.set(MATCHER_LOCK_KEY, "other")
+        assert await matcher.tick() == 0
+        await redis_client.delete(MATCHER_LOCK_KEY)
+        assert not await redis_client.exists(MATCHER_LOCK_KEY)
+
+    asyncio.run(main())
+    assert len(notify.sent) == 1
+
+
+def test_matcher_requeues_players_when_game_creation_fails(games, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database down")
+
+    async def main():
+        matchmaker = MatchMaker()
+        matcher = Matcher(matchmaker, Notifications())
+        await matchmaker.enqueue("alice", "Alice", "sid-a")
+        await matchmaker.enqueue("bob", "Bob", "sid-b")
+        monkeypatch.setattr(matchmaking, "start_new_game", fail)
+        assert await matcher.tick() == 0
+        assert await matchmaker.queue_length() == 2
+        assert await matchmaker.player_entries(["alice"]) == [
+            {"name": "Alice", "sid": "sid-a"}
+        ]
+
+        monkeypatch.setattr(
+            matchmaking, "start_new_game", games.start_new_game
+        )
+        assert await matcher.tick() == 1
+
+    asyncio.run(main())
+
+
+def test_matcher_requeues_claimed_players_when_tick_fails(games, redis_client):
+    async def fail(players):
+        raise RuntimeError("connection lost")
+
+    async def main():
+        matchmaker = MatchMaker()
+        matcher = Matcher(matchmaker, Notifications())
+        await matchmaker.enqueue("alice", "Alice", "sid-a")
+        await matchmaker.enqueue("bob", "Bob", "sid-b")
+        matchmaker.player_entries = fail
+        with pytest.raises(RuntimeError):
+            await matcher.tick()
+        assert await matchmaker.queue_length() == 2
+        assert not await redis_client.exists(MATCHER_LOCK_KEY)
+
+        del matchmaker.player_entries
+        assert await matcher.tick() == 1
+
+    asyncio.run(main())
+
+
+def test_matcher_extends_its_lock_per_batch(games, redis_client):
+    ttls = []
+
+    async def notify(game, sids):
+        ttls.append(await redis_client.pttl(MATCHER_LOCK_KEY))
+        # As if the batch took most of the lock's lifetime.
+        await redis_client.pexpire(MATCHER_LOCK_KEY, 100)
+
+    async def main():
+        matchmaker = MatchMaker()
+        matcher = Matcher(matchmaker, notify)
+        matcher.MAX_CONCURRENT_MATCHES = 1
+        for i in range(6):
+            await matchmaker.enqueue(f"p{i}", f"P{i}", f"sid-{i}")
+        assert await matcher.tick() == 3
+
+    asyncio.run(main())
+    assert all(ttl > 1000 for ttl in ttls)
+
+
+def bounded_client(redis_url, monkeypatch):
+    # Callers wait for one of a bounded set of connections, as they would
+    # under load in production.
+    pool = redis.asyncio.BlockingConnectionPool.from_url(
+        redis_url, max_connections=10, decode_responses=True
+    )
+    client = redis.asyncio.Redis(connection_pool=pool)
+    monkeypatch.setattr(matchmaking, "redis_client", client)
+    return client
+
+
+def test_concurrent_matchers_never_double_match(games, redis_url, monkeypatch):
+    bounded_client(redis_url, monkeypatch)
+    players = 2000
+    notify = Notifications()
+
+    async def main():
+        matchmaker = MatchMaker()
+        # One matcher per worker, all running at once while players join.
+        matchers = [Matcher(MatchMaker(), notify) for _ in range(3)]
+        joins = asyncio.gather(
+            *(
+                matchmaker.enqueue(f"p{i}", f"P{i}", f"sid-{i}")
+                for i in range(players)
+            )
+        )
+        while not joins.done() or await matchmaker.queue_length() > 1:
+            await asyncio.gather(*(matcher.tick() for matcher in matchers))
+            await asyncio.sleep(0)
+        await joins
+
+    asyncio.run(main())
+    assert len(games.joins) == len(set(games.joins))
+    assert len(games.seats()) == len(set(games.seats())) == players
+    assert len(notify.sent) == players // 2
+
+
+def test_simulation_of_10k_queued_players(
+    games, redis_url, monkeypatch, clock
+):
+    """
+    10k players with normally distributed ratings queue at once; the
+    matcher runs every interval until the queue is empty.
+    """
+    client = bounded_client(redis_url, monkeypatch)
+    players = 10_000
+    rng = random.Random(0)
+    ratings = {f"p{i}": rng.gauss(1000, 300) for i in range(players)}
+    notify = Notifications()
+
+    async def main():
+        # Seeded directly: enqueueing 10k players one by one is not what is
+        # being measured here.
+        async with client.pipeline(transaction=False) as pipe:
+            for player, rating in ratings.items():
+                pipe.hset(
+                    PLAYER_ENTRY_KEY.format(player),
+                    mapping={"name": player.upper(), "sid": f"sid-{player}"},
+                )
+                pipe.zadd(MATCHMAKING_RATINGS_KEY, {player: rating})
+                pipe.zadd(MATCHMAKING_QUEUE_KEY, {player: clock[0]})
+            await pipe.execute()
+
+        matchmaker = MatchMaker()
+        matcher = Matcher(matchmaker, notify)
+        start = clock[0]
+        matched_at = {}
+        while await matchmaker.queue_length() > 1:
+            made = await matcher.tick()
+            for game, _ in notify.sent[len(notify.sent) - made :]:
+                matched_at[str(game.id)] = clock[0] - start
+            clock[0] += settings.MATCHMAKING_INTERVAL
+            assert clock[0] - start < 600, "Players are still waiting"
+        return matched_at
+
+    matched_at = asyncio.run(main())
+
+    assert len(games.joins) == len(set(games.joins)) == players // 2
+    assert len(games.seats()) == len(set(games.seats())) == players
+    bucket = settings.MATCHMAKING_BUCKET_SIZE
+    for game in games.games.values():
+        waited = matched_at[str(game.id)]
+        distance = abs(
+            ratings[game.player_1_username] // bucket
+            - ratings[game.player_2_username] // bucket
+        )
+        # Nobody is matched further away than their wait allows.
+        assert distance <= waited // settings.MATCHMAKING_WIDEN_AFTER
+    # Most players find an opponent in their own bucket straight away.
+    immediate = sum(1 for waited in matched_at.values() if waited == 0)
+    assert immediate > 0.9 * players // 2
@@ -0,0 +1,86 @@
+import pytest
+
+from fourfury.ai.engine import AIEngine
+from fourfury.ai.opening_book import (
+    OpeningBook,
+    canonical_key,
+    default_book,
+    mirror_key,
+    position_key,
+)
+from fourfury.bitboard import to_bitboard
+from fourfury.constants import PlayerEnum
+from fourfury.core import init_board
+
+
+def board_with(*moves):
+    board = init_board()
+    for ply, (row, col) in enumerate(moves):
+        board[row][col] = (
+            PlayerEnum.PLAYER_1 if ply % 2 == 0 else PlayerEnum.PLAYER_2
+        )
+    return board
+
+
+def mirror(board):
+    return [row[::-1] for row in board]
+
+
+def test_position_key_is_unique():
+    keys = {
+        position_key(*to_bitboard(board_with((5, col)))) for col in range(7)
+    }
+    keys.add(position_key(*to_bitboard(init_board())))
+    assert len(keys) == 8
+
+
+def test_mirrored_positions_share_a_key():
+    board = board_with((5, 1), (5, 3), (4, 1))
+    assert canonical_key(board)[0] == canonical_key(mirror(board))[0]
+    key = position_key(*to_bitboard(board))
+    assert mirror_key(mirror_key(key)) == key
+
+
+def test_lookup_mirrors_the_move():
+    board = board_with((5, 1))
+    book = OpeningBook()
+    book.add(board, 2)
+    assert book.lookup(board) == 2
+    assert book.lookup(mirror(board)) == 4
+    assert book.lookup(board_with((5, 0))) is None
+
+
+def test_save_and_load(tmp_path):
+    book = OpeningBook(depth=8)
+    book.add(board_with((5, 3)), 3)
+    book.add(board_with((5, 0)), 1)
+    path = tmp_path / "book.bin"
+    book.save(path)
+
+    loaded = OpeningBook.load(path)
+    assert loaded.entries == book.entries
+    assert loaded.depth == 8
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"not a book at all")
+    with pytest.raises(ValueError):
+        OpeningBook.load(path)
+
+
+def test_packaged_book_covers_first_ai_move():
+    book = default_book()
+    for col in range(7):
+        assert book.lookup(board_with((5, col))) is not None
+
+
+def test_engine_plays_from_book():
+    board = board_with((5, 3))
+    ai = AIEngine(5)
+    assert ai.get_best_move(board) == default_book().lookup(board)
+    assert ai.nodes == 0
+
+    ai = AIEngine(1)
+    ai.get_best_move(board)
+    assert ai.nodes > 0
@@ -0,0 +1,151 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from fourfury import cache
+from fourfury.cache import PresenceManager
+
+
+@pytest.fixture
+def presence(redis_client):
+    return PresenceManager(redis_client)
+
+
+def test_update_player_presence_manages_the_countdown(presence):
+    async def main():
+        # Going offline starts the countdown.
+        assert await presence.update_player_presence("g", "alice", "offline")
+        assert await presence.get_player_status("g", "alice") == "offline"
+        assert await presence.is_countdown_active("g", "alice")
+
+        # Staying offline keeps it running.
+        ttl = await presence.update_player_presence("g", "alice", "offline")
+        assert 0 < ttl <= PresenceManager.PLAYER_TIMEOUT
+
+        # Coming back online stops it.
+        assert (
+            await presence.update_player_presence("g", "alice", "online")
+            is None
+        )
+        assert not await presence.is_countdown_active("g", "alice")
+        assert await presence.get_player_status("g", "alice") == "online"
+        assert (
+            await presence.update_player_presence("g", "alice", "online") == 0
+        )
+
+    asyncio.run(main())
+
+
+def test_game_presence_snapshot(presence):
+    async def main():
+        await presence.update_player_presence("g", "alice", "online")
+        await presence.update_player_presence("g", "bob", "offline")
+        snapshot = await presence.get_game_presence_snapshot(
+            "g", "alice", "bob", "carol"
+        )
+        assert snapshot["alice"] == ("online", 0)
+        assert snapshot["bob"][0] == "offline"
+        assert 0 < snapshot["bob"][1] <= PresenceManager.PLAYER_TIMEOUT
+        assert snapshot["carol"] == (None, 0)
+
+        game = SimpleNamespace(
+            player_1_username="alice", player_2_username="bob"
+        )
+        opponent, status, countdown = await presence.get_opponent_status(
+            "g", "alice", game
+        )
+        assert (opponent, status) == ("bob", "offline")
+        assert countdown == snapshot["bob"][1]
+
+    asyncio.run(main())
+
+
+def test_presence_is_one_hash_per_game(presence, redis_client, monkeypatch):
+    monkeypatch.setattr(cache.time, "time", lambda: 1000.0)
+
+    async def main():
+        for game_id in ("g1", "g2"):
+            await presence.set_player_status(game_id, "alice", "online")
+            await presence.update_player_presence(game_id, "bob", "offline")
+        assert sorted(await redis_client.keys("*")) == [
+            PresenceManager.COUNTDOWNS_KEY,
+            "game:presence:g1",
+            "game:presence:g2",
+        ]
+        assert await redis_client.hgetall("game:presence:g1") == {
+            "status:alice": "online",
+            "seen:alice": "1000.0",
+            "status:bob": "offline",
+            "seen:bob": "1000.0",
+        }
+        assert await presence.get_last_seen("g1", "alice") == 1000.0
+        assert await presence.get_last_seen("g1", "carol") is None
+        ttl = await redis_client.ttl("game:presence:g1")
+        assert 0 < ttl <= PresenceManager.PRESENCE_EXPIRY
+
+        assert await presence.del_player_status("g1", "alice")
+        assert await presence.get_player_status("g1", "alice") is None
+        assert await presence.get_player_status("g1", "bob") == "offline"
+
+    asyncio.run(main())
+
+
+def test_claim_expired_countdowns(presence, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+
+    async def main():
+        await presence.start_countdown("g1", "alice")
+        now[0] += 10
+        await presence.start_countdown("g2", "bob")
+        assert await presence.get_countdown_ttl("g1", "alice") == 25
+        assert await presence.claim_expired_countdowns() == (
+            now[0] + PresenceManager.CLAIM_LEASE,
+            [],
+        )
+
+        now[0] += 25
+        lease_until, claimed = await presence.claim_expired_countdowns()
+        assert claimed == [("g1", "alice")]
+        # Leased: nobody else claims it, and it is active until completed.
+        assert (await presence.claim_expired_countdowns())[1] == []
+        assert await presence.is_countdown_active("g1", "alice")
+        assert await presence.complete_countdowns(lease_until, claimed) == 1
+        assert not await presence.is_countdown_active("g1", "alice")
+
+        # Past its deadline but not claimed yet: still active.
+        now[0] += 100
+        assert await presence.is_countdown_active("g2", "bob")
+        assert await presence.get_countdown_ttl("g2", "bob") == 0
+        lease_until, claimed = await presence.claim_expired_countdowns()
+        assert claimed == [("g2", "bob")]
+
+        # Never completed: claimed again once the lease runs out, and the
+        # first claim can no longer complete it.
+        now[0] += PresenceManager.CLAIM_LEASE
+        later, reclaimed = await presence.claim_expired_countdowns()
+        assert reclaimed == [("g2", "bob")]
+        assert await presence.complete_countdowns(lease_until, claimed) == 0
+        assert await presence.complete_countdowns(later, reclaimed) == 1
+
+    asyncio.run(main())
+
+
+def test_restarted_countdown_survives_completion(presence, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+
+    async def main():
+        await presence.update_player_presence("g1", "alice", "offline")
+        now[0] += PresenceManager.PLAYER_TIMEOUT
+        lease_until, claimed = await presence.claim_expired_countdowns()
+        # The player comes back and drops again while the claim is handled.
+        await presence.update_player_presence("g1", "alice", "online")
+        await presence.update_player_presence("g1", "alice", "offline")
+        assert await presence.complete_countdowns(lease_until, claimed) == 0
+        assert await presence.get_countdown_ttl("g1", "alice") == (
+            PresenceManager.PLAYER_TIMEOUT
+        )
+
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+import json
+
+from bson import ObjectId
+
+from fourfury.api.models import Game
+from fourfury.api.serializers import move_delta
+from fourfury.api.utils import make_move
+from fourfury.constants import PlayerEnum
+
+
+def new_game():
+    return Game(
+        id=ObjectId(),
+        player_1="Alice",
+        player_1_username="alice",
+        player_2="Bob",
+        player_2_username="bob",
+    )
+
+
+def test_move_delta():
+    game = new_game()
+    make_move(game, 3)
+    make_move(game, 4)
+    delta = move_delta(game)
+    assert delta == {
+        "game_id": str(game.id),
+        "move_number": 3,
+        "move": {"row": 5, "column": 4, "value": 2},
+        "cells": [[5, 4, 2]],
+        "winner": None,
+        "finished_at": None,
+        "next_player_to_move_username": "alice",
+    }
+    # Socket.IO sends it as JSON.
+    json.dumps(delta)
+
+
+def test_move_delta_of_winning_move():
+    game = new_game()
+    for column in (0, 6, 1, 6, 2, 6, 3):
+        make_move(game, column)
+    delta = move_delta(game)
+    assert delta["winner"] == PlayerEnum.PLAYER_1
+    assert delta["finished_at"] == game.finished_at.isoformat()
+    assert delta["cells"] == [[5, col, 3] for col in range(4)]
+
+
+def test_deltas_rebuild_the_game():
+    game = new_game()
+    board = [row[:] for row in game.board]
+    for column in (3, 3, 4, 4, 5, 5, 6):
+        make_move(game, column)
+        for row, col, value in move_delta(game)["cells"]:
+            board[row][col] = value
+    assert board == game.board
@@ -0,0 +1,230 @@
+import asyncio
+import json
+
+import pytest
+
+from fourfury.cache import INSTANCE_ID, CacheInvalidationListener, LocalCache
+from fourfury.session import (
+    SESSION_EXPIRY,
+    SESSION_INVALIDATION_CHANNEL,
+    SESSION_KEY_PREFIX,
+    USERNAME_KEY_PREFIX,
+    SessionManager,
+)
+from fourfury.settings import settings
+
+
+@pytest.fixture
+def manager(redis_client):
+    manager = SessionManager()
+    manager.redis = redis_client
+    manager.cache = LocalCache(max_size=10, ttl=60)
+    return manager
+
+
+async def session_keys(redis_client):
+    return sorted(await redis_client.keys("*"))
+
+
+def test_create_session_stores_both_keys(manager, redis_client):
+    async def main():
+        session_id, username = await manager.create_session()
+        assert await manager.get_username(session_id) == username
+        assert await manager.get_session_id(username) == session_id
+        assert await manager.validate_session(session_id, username)
+        assert not await manager.validate_session(session_id, "someone")
+        for key in (
+            f"{SESSION_KEY_PREFIX}{session_id}",
+            f"{USERNAME_KEY_PREFIX}{username}",
+        ):
+            assert 0 < await redis_client.ttl(key) <= SESSION_EXPIRY
+
+    asyncio.run(main())
+
+
+async def expire_session(redis_client, session_id, username, ttl):
+    await redis_client.expire(f"{SESSION_KEY_PREFIX}{session_id}", ttl)
+    await redis_client.expire(f"{USERNAME_KEY_PREFIX}{username}", ttl)
+
+
+async def session_ttls(redis_client, session_id, username):
+    return (
+        await redis_client.ttl(f"{SESSION_KEY_PREFIX}{session_id}"),
+        await redis_client.ttl(f"{USERNAME_KEY_PREFIX}{username}"),
+    )
+
+
+def test_refresh_session(manager, redis_client):
+    async def main():
+        session_id, username = await manager.create_session()
+        await expire_session(redis_client, session_id, username, 10)
+        await manager.refresh_session(session_id)
+        ttls = await session_ttls(redis_client, session_id, username)
+        assert all(ttl > 10 for ttl in ttls)
+
+        # Unknown sessions are left alone.
+        await manager.refresh_session("missing")
+        assert await redis_client.keys(f"{SESSION_KEY_PREFIX}missing") == []
+
+    asyncio.run(main())
+
+
+def test_refresh_only_once_below_threshold(manager, redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_REFRESH_THRESHOLD", 1000)
+
+    async def main():
+        session_id, username = await manager.create_session()
+        # Plenty of time left: nothing is written.
+        await expire_session(redis_client, session_id, username, 1500)
+        await manager.refresh_session(session_id)
+        await manager.create_or_validate_session(session_id, username)
+        ttls = await session_ttls(redis_client, session_id, username)
+        assert all(1400 < ttl <= 1500 for ttl in ttls)
+        assert manager.refresh_stats() == {
+            "refresh_writes": 0,
+            "refresh_writes_avoided": 4,
+        }
+
+        await expire_session(redis_client, session_id, username, 900)
+        await manager.create_or_validate_session(session_id, username)
+        ttls = await session_ttls(redis_client, session_id, username)
+        assert all(ttl > 1500 for ttl in ttls)
+        await manager.refresh_session(session_id)
+        assert manager.refresh_stats() == {
+            "refresh_writes": 2,
+            "refresh_writes_avoided": 6,
+        }
+
+    asyncio.run(main())
+
+
+def test_delete_session(manager, redis_client):
+    async def main():
+        session_id, _ = await manager.create_session()
+        kept = await manager.create_session()
+        await manager.delete_session(session_id)
+        await manager.delete_session("missing")
+        assert await session_keys(redis_client) == sorted(
+            [
+                f"{SESSION_KEY_PREFIX}{kept[0]}",
+                f"{USERNAME_KEY_PREFIX}{kept[1]}",
+            ]
+        )
+
+    asyncio.run(main())
+
+
+def test_create_or_validate_session(manager, redis_client):
+    async def main():
+        session_id, username = await manager.create_or_validate_session()
+        assert await manager.validate_session(session_id, username)
+
+        # A valid session is kept and refreshed.
+        await expire_session(redis_client, session_id, username, 10)
+        assert await manager.create_or_validate_session(
+            session_id, username
+        ) == (session_id, username)
+        ttls = await session_ttls(redis_client, session_id, username)
+        assert all(ttl > 10 for ttl in ttls)
+
+        # A session claimed by the wrong user is replaced.
+        new_id, new_username = await manager.create_or_validate_session(
+            session_id, "someone"
+        )
+        assert new_id != session_id
+        assert await manager.validate_session(new_id, new_username)
+        assert await session_keys(redis_client) == sorted(
+            [
+                f"{SESSION_KEY_PREFIX}{new_id}",
+                f"{USERNAME_KEY_PREFIX}{new_username}",
+            ]
+        )
+
+        # So is one that has expired.
+        other_id, other_username = await manager.create_or_validate_session(
+            "expired", new_username
+        )
+        assert other_id != "expired"
+        assert await manager.validate_session(other_id, other_username)
+
+    asyncio.run(main())
+
+
+def test_validated_sessions_are_cached(manager, redis_client):
+    async def main():
+        session_id, username = await manager.create_session()
+        assert await manager.validate_session(session_id, username)
+        # Served from the cache from now on.
+        await redis_client.delete(f"{SESSION_KEY_PREFIX}{session_id}")
+        assert await manager.validate_session(session_id, username)
+        assert manager.cache.hits == 1
+        assert not await manager.validate_session(session_id, "someone")
+
+        # Deleting the session drops it from the cache at once.
+        await manager.delete_session(session_id)
+        assert not await manager.validate_session(session_id, username)
+
+        # Only valid sessions are cached.
+        assert not await manager.validate_session("missing", username)
+        assert len(manager.cache) == 0
+
+    asyncio.run(main())
+
+
+def test_deleted_sessions_are_announced(manager, redis_client):
+    async def main():
+        session_id, username = await manager.create_session()
+        stale_id, _ = await manager.create_session()
+        async with redis_client.pubsub() as pubsub:
+            await pubsub.subscribe(SESSION_INVALIDATION_CHANNEL)
+            await manager.delete_session(session_id)
+            # Nothing is announced for sessions that do not exist
+            await manager.delete_session(session_id)
+            await manager.create_or_validate_session(session_id, username)
+            # or are still valid.
+            await manager.create_or_validate_session(
+                *await manager.create_session()
+            )
+            await manager.create_or_validate_session(stale_id, "someone")
+
+            keys = []
+            while len(keys) < 2:
+                message = await pubsub.get_message(timeout=1)
+                assert message is not None
+                if message["type"] == "message":
+                    data = json.loads(message["data"])
+                    assert data["origin"] == INSTANCE_ID
+                    keys.extend(data["keys"])
+            assert await pubsub.get_message(timeout=0.1) is None
+        assert keys == [
+            f"{SESSION_KEY_PREFIX}{session_id}",
+            f"{SESSION_KEY_PREFIX}{stale_id}",
+        ]
+
+    asyncio.run(main())
+
+
+def test_other_processes_drop_deleted_sessions(redis_client):
+    local = LocalCache(max_size=10, ttl=60)
+    listener = CacheInvalidationListener(local, SESSION_INVALIDATION_CHANNEL)
+    message = json.dumps(
+        {"origin": "other", "keys": ["session:a"], "prefix": None}
+    )
+
+    async def main():
+        listener.start()
+        while (await redis_client.pubsub_numsub(SESSION_INVALIDATION_CHANNEL))[
+            0
+        ][1] == 0:
+            await asyncio.sleep(0.01)
+        local.set("session:a", "alice")
+        local.set("session:b", "bob")
+        await redis_client.publish(SESSION_INVALIDATION_CHANNEL, message)
+        for _ in range(100):
+            if len(local) == 1:
+                break
+            await asyncio.sleep(0.01)
+        await listener.stop()
+
+    asyncio.run(main())
+    assert list(local._entries) == ["session:b"]
@@ -0,0 +1,108 @@
+"""
+Two Socket.IO servers in one process stand in for two workers. Each has
+its own AsyncRedisManager, so an event reaches the other one only through
+Redis, as it would across processes or containers.
+"""
+
+import asyncio
+import itertools
+
+import redis
+import socketio
+from engineio import packet as eio_packet
+
+from fourfury.settings import settings
+
+_eio_sids = itertools.count()
+
+
+class Node:
+    def __init__(self, url):
+        self.server = socketio.AsyncServer(
+            async_mode="asgi",
+            client_manager=socketio.AsyncRedisManager(
+                url, channel=settings.SOCKETIO_CHANNEL
+            ),
+        )
+        self.received = {}
+        self.server._send_eio_packet = self._receive
+
+    async def _receive(self, eio_sid, pkt):
+        assert pkt.packet_type == eio_packet.MESSAGE
+        event, *data = socketio.packet.Packet(encoded_packet=pkt.data).data
+        self.received.setdefault(eio_sid, []).append((event, *data))
+
+    async def start(self):
+        # What AsyncServer does on its first connection.
+        self.server.manager.initialize()
+        self.server.manager_initialized = True
+
+    async def stop(self):
+        await self.server.shutdown()
+
+    async def connect(self, *rooms):
+        """A client connected to this node, in the given rooms."""
+        eio_sid = f"eio-{next(_eio_sids)}"
+        sid = await self.server.manager.connect(eio_sid, "/")
+        for room in rooms:
+            await self.server.enter_room(sid, room)
+        return sid, eio_sid
+
+
+async def wait_for_subscribers(url, count):
+    client = redis.asyncio.Redis.from_url(url)
+    try:
+        channel = settings.SOCKETIO_CHANNEL
+        while (await client.pubsub_numsub(channel))[0][1] < count:
+            await asyncio.sleep(0.01)
+    finally:
+        await client.aclose()
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Event not delivered")
+
+
+def test_room_emit_reaches_other_node(redis_url):
+    async def main():
+        a, b = Node(redis_url), Node(redis_url)
+        await a.start()
+        await b.start()
+        await wait_for_subscribers(redis_url, 2)
+
+        _, player_1 = await a.connect("game-1")
+        _, player_2 = await b.connect("game-1")
+        _, other = await b.connect("game-2")
+
+        await a.server.emit("move_applied", {"move_number": 2}, room="game-1")
+        await wait_for(lambda: player_2 in b.received)
+        assert b.received[player_2] == [("move_applied", {"move_number": 2})]
+        assert a.received[player_1] == [("move_applied", {"move_number": 2})]
+        assert other not in b.received
+
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(main())
+
+
+def test_emit_to_client_on_other_node(redis_url):
+    async def main():
+        a, b = Node(redis_url), Node(redis_url)
+        await a.start()
+        await b.start()
+        await wait_for_subscribers(redis_url, 2)
+
+        sid, eio_sid = await b.connect()
+        await a.server.emit("rematch_started", {"game_id": "g"}, room=sid)
+        await wait_for(lambda: eio_sid in b.received)
+        assert b.received[eio_sid] == [("rematch_started", {"game_id": "g"})]
+
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(main())
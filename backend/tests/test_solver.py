@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from fourfury.ai.engine import SOLVER_MAX_EMPTY_CELLS, AIEngine
+from fourfury.ai.solver import CELLS, Outcome, Solver, describe_score
+from fourfury.constants import M, N, PlayerEnum
+from fourfury.core import calculate_row_by_col, detect_winner_at, init_board
+
+
+def random_endgame(seed, empty):
+    """A position with ``empty`` cells left that nobody has won yet."""
+    rng = random.Random(seed)
+    while True:
+        board = init_board()
+        piece = PlayerEnum.PLAYER_1
+        for _ in range(CELLS - empty):
+            col = rng.choice(
+                [
+                    c
+                    for c in range(M)
+                    if calculate_row_by_col(board, c) is not None
+                ]
+            )
+            row = calculate_row_by_col(board, col)
+            board[row][col] = piece
+            if detect_winner_at(board, row, col):
+                break
+            piece = (
+                PlayerEnum.PLAYER_2
+                if piece == PlayerEnum.PLAYER_1
+                else PlayerEnum.PLAYER_1
+            )
+        else:
+            return board, piece
+
+
+def brute_force(board, moves, piece):
+    """Score of the side to move by full tree search."""
+    scores = []
+    for col in range(M):
+        row = calculate_row_by_col(board, col)
+        if row is None:
+            continue
+        board[row][col] = piece
+        if detect_winner_at(board, row, col):
+            scores.append((CELLS + 1 - moves) // 2)
+        else:
+            opponent = (
+                PlayerEnum.PLAYER_2
+                if piece == PlayerEnum.PLAYER_1
+                else PlayerEnum.PLAYER_1
+            )
+            scores.append(-brute_force(board, moves + 1, opponent))
+        board[row][col] = PlayerEnum.EMPTY
+    return max(scores, default=0)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_solver_matches_brute_force(seed):
+    empty = 8
+    board, piece = random_endgame(seed, empty)
+    result = Solver().best_move(board)
+    assert result.score == brute_force(board, CELLS - empty, piece)
+
+    # The chosen move really has the reported score.
+    row = calculate_row_by_col(board, result.column)
+    board[row][result.column] = piece
+    if not detect_winner_at(board, row, result.column):
+        opponent = (
+            PlayerEnum.PLAYER_2
+            if piece == PlayerEnum.PLAYER_1
+            else PlayerEnum.PLAYER_1
+        )
+        assert -brute_force(board, CELLS - empty + 1, opponent) == result.score
+
+
+def test_solver_takes_immediate_win():
+    board = init_board()
+    board[5][0] = board[5][1] = board[5][2] = PlayerEnum.PLAYER_1
+    board[4][0] = board[4][1] = PlayerEnum.PLAYER_2
+    board[N - 1][5] = PlayerEnum.PLAYER_2
+
+    result = Solver().best_move(board)
+    assert result.column == 3
+    assert result.outcome == Outcome.WIN
+    assert result.plies == 1
+
+
+def test_solver_rejects_large_positions():
+    board = init_board()
+    board[5][3] = PlayerEnum.PLAYER_1
+    with pytest.raises(ValueError):
+        Solver().best_move(board)
+
+
+def test_describe_score():
+    # Player 1 wins with their 4th stone, 6 plies into the game.
+    assert describe_score((CELLS + 1 - 6) // 2, 6) == (Outcome.WIN, 1)
+    assert describe_score(0, 30) == (Outcome.DRAW, 12)
+    # The player to move loses to the opponent's very next move.
+    assert describe_score(-((CELLS - 7) // 2), 7) == (Outcome.LOSS, 2)
+
+
+def test_engine_solves_endgame():
+    board, piece = random_endgame(5, SOLVER_MAX_EMPTY_CELLS - 1)
+    assert piece == PlayerEnum.PLAYER_2
+    engine = AIEngine(difficulty=5)
+    move = engine.get_best_move(board)
+    assert engine.solver_result is not None
+    assert move == engine.solver_result.column
+    assert calculate_row_by_col(board, move) is not None
+
+
+def test_engine_solver_respects_threshold_and_difficulty():
+    engine = AIEngine(difficulty=5, time_budget_ms=50)
+    engine.get_best_move(random_endgame(1, SOLVER_MAX_EMPTY_CELLS + 1)[0])
+    assert engine.solver_result is None
+
+    easy = AIEngine(difficulty=2)
+    easy.get_best_move(random_endgame(5, SOLVER_MAX_EMPTY_CELLS - 1)[0])
+    assert easy.solver_result is None
@@ -2,7 +2,7 @@
 "use client";
 
 import { BACKEND_API_BASE_URL, SOCKETIO_BASE_URL } from "@/constants";
-import React, { useEffect, useState, useCallback, useMemo } from "react";
+import React, { useEffect, useState, useCallback, useMemo, useRef } from "react";
 import { useParams, useRouter } from "next/navigation";
 import { io, Socket } from "socket.io-client";
 import { HomeButton } from "@/components/buttons";
@@ -37,6 +37,17 @@ export interface GameData {
     ai_difficulty: number | null;
 }
 
+// Sent for every move instead of the full game; move_number is the version
+interface MoveAppliedData {
+    game_id: string;
+    move_number: number;
+    move: MovesData;
+    cells: [number, number, number][];
+    winner: number | null;
+    finished_at: string | null;
+    next_player_to_move_username: string;
+}
+
 interface SocketStatus {
     isConnected: boolean;
     error: string | null;
@@ -54,6 +65,8 @@ export default function PlayGame() {
     const [replayInProgress, setReplayInProgress] = useState(false);
     const [showExitWarning, setShowExitWarning] = useState(false);
     const router = useRouter();
+    // Latest game state for socket handlers, which outlive renders
+    const dataRef = useRef<GameData | null>(null);
     const { presenceState, forfeitMessage } = useGamePresence(socket, data);
 
     const playerName = useMemo(() => {
@@ -123,6 +136,10 @@ export default function PlayGame() {
         fetchGameData();
     }, [id]);
 
+    useEffect(() => {
+        dataRef.current = data;
+    }, [data]);
+
     // Socket.IO connection effect
     useEffect(() => {
         const socket = io(SOCKETIO_BASE_URL, {
@@ -151,15 +168,46 @@ export default function PlayGame() {
         const handleGameUpdate = (updatedGameData: string) => {
             try {
                 const updatedGame: GameData = JSON.parse(updatedGameData);
+                dataRef.current = updatedGame;
                 setData(updatedGame);
             } catch (error) {
                 console.error('Error parsing game update:', error);
             }
         };
 
+        const handleMoveApplied = (delta: MoveAppliedData) => {
+            const current = dataRef.current;
+            if (!current || current.id !== delta.game_id) return;
+            // move_number is rewritten during a replay, the move list is not
+            const version = current.movees.length + 1;
+            if (delta.move_number <= version) return;
+            if (delta.move_number !== version + 1) {
+                // Missed an update: ask for the full game
+                socket.emit('resync', delta.game_id);
+                return;
+            }
+
+            const board = current.board.map(row => [...row]);
+            delta.cells.forEach(([row, column, value]) => {
+                board[row][column] = value;
+            });
+            const updatedGame: GameData = {
+                ...current,
+                board,
+                movees: [...current.movees, delta.move],
+                move_number: delta.move_number,
+                winner: delta.winner,
+                finished_at: delta.finished_at,
+                next_player_to_move_username: delta.next_player_to_move_username,
+            };
+            dataRef.current = updatedGame;
+            setData(updatedGame);
+        };
+
         socket.on('connect', handleConnect);
         socket.on('disconnect', handleDisconnect);
         socket.on('game_update', handleGameUpdate);
+        socket.on('move_applied', handleMoveApplied);
         socket.on('connect_error', (error) => {
             console.error('Socket connection error:', error);
             setSocketStatus(prev => ({
@@ -176,6 +224,7 @@ export default function PlayGame() {
                 socket.off('connect', handleConnect);
                 socket.off('disconnect', handleDisconnect);
                 socket.off('game_update', handleGameUpdate);
+                socket.off('move_applied', handleMoveApplied);
                 if (data?.id) {
                     socket.emit('leave_game', data.id);
                 }